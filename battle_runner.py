@@ -3,7 +3,7 @@ Battle loop logic and game coordination - refactored with PyClashBot architectur
 """
 
 import time
-from config import INACTIVITY_TIMEOUT, DEFAULT_TIMEOUTS, MAX_RECOVERY_ATTEMPTS, MAX_BATTLE_END_ATTEMPTS
+from config import INACTIVITY_TIMEOUT, DEFAULT_TIMEOUTS, MAX_RECOVERY_ATTEMPTS, MAX_BATTLE_END_ATTEMPTS, NAVIGATION_CAPTURE_PROFILE
 
 
 class BattleRunner:
@@ -36,6 +36,10 @@ class BattleRunner:
                     )
                     break
 
+                # adb kept timing out on this device - reconnect and restart the game
+                if self.bot.recycle_if_wedged():
+                    first_battle = True
+
                 self.logger.change_status(
                     f"--- Starting round {game_round} (Battle {self.battle_count + 1}) ---"
                 )
@@ -75,8 +79,8 @@ class BattleRunner:
                         )
 
                         # Try clicking battle button as fallback
-                        self.bot.tap_screen(21, 511)  # Battle button fallback position
-                        time.sleep(2)
+                        self.bot.tap_screen_async(21, 511)  # Battle button fallback position
+                        time.sleep(self.bot.adaptive_delay(2))
 
                         # After fallback clicks, look for battle icon and click it
                         self.logger.log(
@@ -92,7 +96,7 @@ class BattleRunner:
                                     f"Found battle icon (confidence: {battle_confidence:.2f}), clicking to start battle..."
                                 )
                                 self.bot.tap_screen(battle_pos[0], battle_pos[1])
-                                time.sleep(2)
+                                time.sleep(self.bot.adaptive_delay(2))
 
                         # Check if battle started after recovery click
                         if self.bot.wait_for_battle_start(use_fallback=False):
@@ -102,14 +106,14 @@ class BattleRunner:
                         # Try different recovery positions
                         if recovery_attempts == 2:
                             self.logger.log("Trying additional recovery clicks...")
-                            self.bot.tap_screen(
+                            self.bot.tap_screen_async(
                                 21, 511
                             )  # Alternative fallback position
-                            time.sleep(1)
-                            self.bot.tap_screen(
+                            time.sleep(self.bot.adaptive_delay(1))
+                            self.bot.tap_screen_async(
                                 21, 511
                             )  # Another alternative fallback position
-                            time.sleep(2)
+                            time.sleep(self.bot.adaptive_delay(2))
 
                             # After final fallback clicks, look for battle icon again
                             self.logger.log(
@@ -125,7 +129,7 @@ class BattleRunner:
                                         f"Found battle icon (confidence: {battle_confidence:.2f}), clicking to start battle..."
                                     )
                                     self.bot.tap_screen(battle_pos[0], battle_pos[1])
-                                    time.sleep(2)
+                                    time.sleep(self.bot.adaptive_delay(2))
                     else:
                         # If recovery failed, check timeout
                         if time.time() - last_activity_time > INACTIVITY_TIMEOUT:
@@ -188,10 +192,10 @@ class BattleRunner:
                         self.logger.log("Issues with post-battle sequence, retrying...")
                         if battle_end_attempts < MAX_BATTLE_END_ATTEMPTS:
                             # Try some recovery clicks before next attempt
-                            self.bot.tap_screen(21, 511)  # OK button fallback
-                            time.sleep(1)
-                            self.bot.tap_screen(21, 511)  # Battle button fallback
-                            time.sleep(2)
+                            self.bot.tap_screen_async(21, 511)  # OK button fallback
+                            time.sleep(self.bot.adaptive_delay(1))
+                            self.bot.tap_screen_async(21, 511)  # Battle button fallback
+                            time.sleep(self.bot.adaptive_delay(2))
                         else:
                             self.logger.log(
                                 "Failed to handle battle end after all attempts, restarting app..."
@@ -236,7 +240,14 @@ class BattleRunner:
         cards_played_this_battle = 0
         not_in_battle_start = None  # Track when we first detect "not in battle"
 
+        # Measure this device's input latency once, while cards are on screen
+        self.bot.calibrate_input_latency()
+
         while self.bot.running and not self.shutdown_check():
+            if self.bot.recycle_requested:
+                self.logger.log("Leaving battle to recycle the instance")
+                break
+
             current_time = time.time()
             battle_elapsed = current_time - battle_start_time
 
@@ -280,15 +291,16 @@ class BattleRunner:
             battle_phase = self.bot.battle_strategy.get_battle_phase()
 
             # Check if we should wait for elixir or play immediately
-            screenshot = self.bot.take_screenshot()
+            # (only the card/elixir rows are needed, so skip the rest of the screen)
+            screenshot = self.bot.take_screenshot(profile="cards")
             if screenshot is None:
                 continue
 
             current_elixir = self.bot.battle_logic.detect_elixir_amount(screenshot)
-            is_2x_elixir = self.bot.battle_logic.detect_2x_elixir(screenshot)
 
             # Log battle status every 10 seconds
             if int(battle_elapsed) % 10 == 0:
+                is_2x_elixir = self.bot.is_double_elixir()
                 self.logger.change_status(
                     f"Battle phase: {battle_phase}, Elapsed: {battle_elapsed:.1f}s, "
                     f"Elixir: {current_elixir}, 2x: {is_2x_elixir}, Cards: {cards_played_this_battle}"
@@ -300,6 +312,8 @@ class BattleRunner:
             # Only play if we have at least 6 elixir
             if current_elixir is not None and current_elixir >= 6:
                 should_play = True
+            self.logger.record_frame_latency(screenshot)
+            screenshot.release()  # Buffer goes back to the capture pool
 
             if should_play:
                 if self.bot.play_card_strategically():
@@ -333,7 +347,7 @@ class BattleRunner:
             if not self.bot.running or self.shutdown_check():
                 return False
 
-            screenshot = self.bot.take_screenshot()
+            screenshot = self.bot.take_screenshot(NAVIGATION_CAPTURE_PROFILE)
             if screenshot is None:
                 continue
 
@@ -345,8 +359,13 @@ class BattleRunner:
                 self.logger.log(
                     f"Found Play Again button (confidence: {confidence:.2f}), clicking..."
                 )
-                self.bot.tap_screen(play_again_pos[0], play_again_pos[1])
-                time.sleep(2)
+                self.bot.tap_and_wait(
+                    play_again_pos[0],
+                    play_again_pos[1],
+                    max_wait=2,
+                    reference=screenshot,
+                    label="Play Again",
+                )
                 return True
 
             ok_pos, confidence = self.bot.find_template("ok_button", screenshot)
@@ -354,8 +373,10 @@ class BattleRunner:
                 self.logger.log(
                     f"Found OK button (confidence: {confidence:.2f}), clicking..."
                 )
-                self.bot.tap_screen(ok_pos[0], ok_pos[1])
-                time.sleep(3)  # Wait longer for transition to home screen
+                # Wait (up to 3s) for the transition to the home screen
+                self.bot.tap_and_wait(
+                    ok_pos[0], ok_pos[1], until="battle_button", max_wait=3, label="OK"
+                )
 
                 # Enhanced battle button search with continuous clicking
                 self.logger.log(
@@ -368,7 +389,7 @@ class BattleRunner:
                     if not self.bot.running or self.shutdown_check():
                         return False
 
-                    screenshot = self.bot.take_screenshot()
+                    screenshot = self.bot.take_screenshot(NAVIGATION_CAPTURE_PROFILE)
                     if screenshot is not None:
                         battle_pos, battle_confidence = self.bot.find_template(
                             "battle_button", screenshot
@@ -384,19 +405,19 @@ class BattleRunner:
                     self.logger.log(
                         "Battle button not found, clicking screen to refresh..."
                     )
-                    self.bot.tap_screen(21, 511)  # Click screen to refresh
-                    time.sleep(1)  # Wait 1 second between clicks as requested
+                    self.bot.tap_screen_async(21, 511)  # Click screen to refresh
+                    time.sleep(self.bot.adaptive_delay(1))  # Wait between clicks (1s, scaled to the device)
 
                 # If still no battle button found after timeout, try fallback position
                 self.logger.log(
                     "Battle button search timed out, trying fallback position..."
                 )
-                self.bot.tap_screen(21, 511)  # Fallback battle button position
+                self.bot.tap_screen_async(21, 511)  # Fallback battle button position
                 return True
 
             # Click deadspace to close any popups
-            self.bot.tap_screen(20, 200)  # Use deadspace coordinates from config
-            time.sleep(1)
+            self.bot.tap_screen_async(20, 200)  # Use deadspace coordinates from config
+            time.sleep(self.bot.adaptive_delay(1))
 
         self.logger.log("Timeout waiting for post-battle screen")
         return False
@@ -0,0 +1,100 @@
+"""
+Frame allocation benchmark
+
+Compares the per-tick allocations of the old capture path (fresh bytes for
+the dump, fresh image from the colour conversion) with the pooled path
+(dump read into a reused buffer, conversion written into a pooled image).
+
+Usage: python benchmarks/frame_pool_benchmark.py [ticks] [width] [height]
+"""
+
+import io
+import os
+import struct
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from emulators.buffer_pool import BufferPool  # noqa: E402
+from emulators.frame import Frame  # noqa: E402
+from emulators.framebuffer import (  # noqa: E402
+    PIXEL_FORMAT_RGBA_8888,
+    decode_raw_screencap,
+    parse_raw_header,
+)
+
+
+def make_dump(width, height):
+    """Synthetic raw screencap dump with a 16 byte header"""
+    header = struct.pack("<IIII", width, height, PIXEL_FORMAT_RGBA_8888, 0)
+    pixels = np.random.default_rng(0).integers(
+        0, 255, (height, width, 4), dtype=np.uint8
+    )
+    return header + pixels.tobytes()
+
+
+def unpooled_tick(stream):
+    stream.seek(0)
+    data = stream.read()
+    return Frame(decode_raw_screencap(data))
+
+
+def make_pooled_tick(pool, dump_size):
+    raw = bytearray(dump_size + 1)
+
+    def tick(stream):
+        stream.seek(0)
+        count = stream.readinto(raw)
+        data = memoryview(raw)[:count]
+        width, height, _, _ = parse_raw_header(data)
+        image = pool.acquire((height, width, 3))
+        return Frame(decode_raw_screencap(data, out=image), pool=pool)
+
+    return tick
+
+
+def run(name, tick, stream, ticks):
+    tick(stream).release()  # Warm-up: first tick allocates the buffers
+    tracemalloc.start()
+    started = time.perf_counter()
+    blocks = 0
+    for _ in range(ticks):
+        before = tracemalloc.take_snapshot()
+        frame = tick(stream)
+        after = tracemalloc.take_snapshot()
+        blocks += sum(
+            stat.count_diff
+            for stat in after.compare_to(before, "lineno")
+            if stat.size_diff > 64 * 1024
+        )
+        frame.release()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{name:>9}: {blocks / ticks:.2f} large allocations/tick, "
+        f"peak {peak / 1024 / 1024:.1f} MB, {elapsed / ticks * 1000:.2f} ms/tick"
+    )
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 720
+    height = int(sys.argv[3]) if len(sys.argv) > 3 else 1280
+
+    dump = make_dump(width, height)
+    stream = io.BytesIO(dump)
+    print(f"{ticks} ticks of {width}x{height} ({len(dump) / 1024 / 1024:.1f} MB dumps)")
+
+    run("unpooled", unpooled_tick, stream, ticks)
+    pool = BufferPool()
+    run("pooled", make_pooled_tick(pool, len(dump)), stream, ticks)
+    print(f"pool stats: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Card play input latency benchmark
+
+Times a card play (select tap, CARD_SELECTION_DELAY, placement tap) sent as
+two separate taps with a host-side sleep, as one tap sequence, and as one
+drag gesture (CARD_DRAG_DURATION), then BURST_TAPS repeated taps sent one by
+one and as a single burst_tap(). Input goes to a dead-space position, so run
+it on an emulator sitting on a menu screen.
+
+Usage: python benchmarks/input_latency_benchmark.py <device_id> [rounds]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import (  # noqa: E402
+    BURST_TAP_INTERVAL,
+    CARD_DRAG_DURATION,
+    CARD_SELECTION_DELAY,
+)
+from emulators.memu import MemuController  # noqa: E402
+
+DEAD_SPACE = (20, 200)
+BURST_TAPS = 20
+
+
+def separate_taps(emulator):
+    emulator.click(*DEAD_SPACE)
+    time.sleep(CARD_SELECTION_DELAY)
+    emulator.click(*DEAD_SPACE)
+
+
+def tap_sequence(emulator):
+    emulator.tap_sequence([DEAD_SPACE + (CARD_SELECTION_DELAY,), DEAD_SPACE])
+
+
+def drag(emulator):
+    emulator.swipe(*DEAD_SPACE, *DEAD_SPACE, CARD_DRAG_DURATION)
+
+
+def repeated_taps(emulator):
+    for _ in range(BURST_TAPS):
+        emulator.click(*DEAD_SPACE)
+        time.sleep(BURST_TAP_INTERVAL)
+
+
+def burst(emulator):
+    emulator.burst_tap(*DEAD_SPACE, BURST_TAPS, BURST_TAP_INTERVAL)
+
+
+def run(name, play, emulator, rounds):
+    play(emulator)  # Warm-up: starts the device shell
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        play(emulator)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(
+        f"{name:>14}: median {timings[len(timings) // 2] * 1000:.0f} ms, "
+        f"best {timings[0] * 1000:.0f} ms"
+    )
+    return timings[len(timings) // 2]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("device_id", help="adb serial, e.g. 127.0.0.1:21503")
+    parser.add_argument(
+        "rounds", type=int, nargs="?", default=20, help="timed runs per variant"
+    )
+    args = parser.parse_args()
+    if args.rounds < 1:
+        parser.error("rounds must be at least 1")
+    return args
+
+
+def main():
+    args = parse_args()
+
+    emulator = MemuController(args.device_id, "benchmark", capture_mode="png")
+    try:
+        if not emulator.device_tracker.wait_for_online(args.device_id, 10):
+            sys.exit(f"{args.device_id} is not online")
+        before = run("separate taps", separate_taps, emulator, args.rounds)
+        for name, play in (("tap sequence", tap_sequence), ("drag", drag)):
+            after = run(name, play, emulator, args.rounds)
+            print(f"{name} saves {(before - after) * 1000:.0f} ms per card play")
+        before = run("repeated taps", repeated_taps, emulator, args.rounds)
+        after = run("burst tap", burst, emulator, args.rounds)
+        print(f"burst tap takes {after / before:.0%} of the time for {BURST_TAPS} taps")
+    finally:
+        emulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Template lookup benchmark
+
+Times what find_template() spends getting its template before matching: the
+old per-call os.path.exists() + cv2.imread() of the PNG against a lookup in
+the preloaded TemplateStore, for full-size BGR and for a half-size
+grayscale capture profile. Run it from the project directory.
+
+Usage: python benchmarks/template_lookup_benchmark.py [calls]
+"""
+
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import REF_IMAGES  # noqa: E402
+from template_store import TemplateStore  # noqa: E402
+
+
+def read_from_disk(name, path, scale, grayscale):
+    if not os.path.exists(path):
+        return None
+    template = cv2.imread(path)
+    if template is None:
+        return None
+    if grayscale:
+        template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+    if scale != 1.0:
+        template = cv2.resize(
+            template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+        )
+    return template
+
+
+def run(name, lookup, calls, scale=1.0, grayscale=False):
+    entries = list(REF_IMAGES.items())
+    started = time.perf_counter()
+    for i in range(calls):
+        template_name, path = entries[i % len(entries)]
+        lookup(template_name, path, scale, grayscale)
+    elapsed = time.perf_counter() - started
+    print(f"{name:>24}: {elapsed / calls * 1e6:9.1f} us/call")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    started = time.perf_counter()
+    store = TemplateStore()
+    print(
+        f"Loaded {len(store)} templates in "
+        f"{(time.perf_counter() - started) * 1000:.1f} ms "
+        f"({len(store.missing)} missing)"
+    )
+
+    def from_store(name, path, scale, grayscale):
+        return store.get(name, scale=scale, grayscale=grayscale)
+
+    run("disk, full frame", read_from_disk, calls)
+    run("store, full frame", from_store, calls)
+    run("disk, half gray", read_from_disk, calls, 0.5, True)
+    run("store, half gray", from_store, calls, 0.5, True)
+
+
+if __name__ == "__main__":
+    main()
@@ -173,3 +173,147 @@ FALLBACK_CLICK_COUNT = 12
 FALLBACK_CLICK_INTERVAL = 3.0
 MAX_RECOVERY_ATTEMPTS = 3
 MAX_BATTLE_END_ATTEMPTS = 3
+
+# Screen capture settings
+# CAPTURE_MODE names a capture backend (emulators/capture_backends.py):
+# "socket" streams the raw framebuffer over the adb server socket,
+# "raw" streams it through `adb exec-out screencap`,
+# "png" uses the legacy screencap -> pull -> imread path,
+# "server" asks a helper script on the device over an adb-forwarded port,
+# "video" decodes a continuous screenrecord stream (see VIDEO_STREAM_COMMAND),
+# "replay" cycles through saved screenshots in REPLAY_CAPTURE_DIR.
+# "auto" benchmarks the backends once per device and caches the fastest.
+CAPTURE_MODE = "auto"
+CAPTURE_FALLBACK_MODE = "socket"  # Used when "auto" finds no working backend
+CAPTURE_BACKEND_CACHE = "capture_backends.json"
+CAPTURE_PROBE_SAMPLES = 3  # Timed captures per backend during the probe
+REPLAY_CAPTURE_DIR = None
+CAPTURE_TIMEOUT = 10
+# Opt-in background capture thread per emulator (overlaps capture with detection)
+BACKGROUND_CAPTURE = False
+BACKGROUND_CAPTURE_INTERVAL = 0.0  # Minimum seconds between background captures
+
+# Device tracking settings
+DEVICE_POLL_INTERVAL = 2.0  # Base delay before re-polling when track-devices drops
+DEVICE_RECONNECT_MAX_DELAY = 30.0  # Backoff cap for background `adb connect`
+DEVICE_ONLINE_WAIT = 2.0  # How long a capture/tap waits for a dropped device
+
+# ADB transport settings
+# "socket" talks to the adb server protocol directly, "subprocess" spawns the adb binary
+ADB_TRANSPORT = "socket"
+ADB_SERVER_HOST = "127.0.0.1"
+ADB_SERVER_PORT = 5037
+ADB_POOL_SIZE = 4  # Max concurrent connections (and idle sync sessions) per device
+ADB_SOCKET_TIMEOUT = 10
+
+# Input injection settings
+USE_PERSISTENT_SHELL = True  # Send taps/swipes through one long-lived device shell
+
+# Frame buffer pool settings
+FRAME_POOL_SIZE = 4  # Idle image buffers kept per device and resolution
+
+# Video stream capture settings (CAPTURE_MODE = "video")
+# One long-lived encoder stream replaces a screencap per tick
+VIDEO_STREAM_COMMAND = "screenrecord --output-format=h264 --bit-rate 8000000 -"
+VIDEO_FRAME_WAIT = 0.1  # screenrecord only emits frames when the screen changes
+
+# Screen change detection settings
+CHANGE_FINGERPRINT_SIZE = (24, 36)  # (width, height) of the grayscale thumbnail
+CHANGE_THRESHOLD = 12  # Max per-tile brightness difference still treated as "same screen"
+DETECTION_CACHE = True  # Reuse template results while the screen is unchanged
+
+# Capture profile settings
+# Named row bands (screen rows [start, stop)) usable as capture profiles;
+# "cards" covers the card slots and the elixir bar
+CAPTURE_BANDS = {
+    "cards": (530, 620),
+}
+NAVIGATION_CAPTURE_PROFILE = "full"  # "half", "gray" or "half_gray" cut menu/queue capture cost
+
+# Shared-memory frame bus settings
+# Run each emulator's capture loop in its own process and hand frames to the
+# bots through shared-memory ring slots, spreading capture/decode over cores
+CAPTURE_PROCESSES = False
+FRAME_BUS_SLOTS = 3
+FRAME_BUS_SLOT_BYTES = 1920 * 1080 * 3  # Largest BGR frame one slot can hold
+FRAME_BUS_POLL_INTERVAL = 0.002  # Reader poll period while waiting for a new frame
+FRAME_BUS_ZERO_COPY = False  # Hand out views into shared memory (valid until the ring wraps)
+
+# Device-side capture server settings (CAPTURE_MODE = "server")
+CAPTURE_SERVER_PORT = 27183  # Port the helper listens on inside the emulator
+CAPTURE_SERVER_PATH = "/data/local/tmp/crbot_capture.sh"
+CAPTURE_SERVER_REDEPLOY_DELAY = 5.0  # Min seconds between re-deploys of a dead helper
+
+# Adaptive transfer settings (raw and socket capture backends)
+# Full frames and bands are fetched raw or as `gzip` output, whichever gives
+# the higher estimated fleet-wide frame rate under the current load
+TRANSFER_MODES = ("raw", "gzip")  # The first mode is the fallback and never dropped
+TRANSFER_GZIP_LEVEL = 1
+TRANSFER_PROBE_SAMPLES = 3  # Captures per mode when (re)measuring
+TRANSFER_REEVALUATE_INTERVAL = 60.0  # Seconds between re-measuring the other modes
+TRANSFER_MAX_FAILURES = 3  # Consecutive failures before a mode is dropped
+
+# Card placement settings
+# "tap" selects the card and taps the target (one batched tap sequence),
+# "drag" drags the card from its slot to the target in one swipe
+CARD_PLACEMENT_MODE = "tap"
+CARD_PLACEMENT_MODES = {}  # Per-instance overrides, e.g. {"MEmu_2": "drag"}
+CARD_DRAG_DURATION = 120  # Milliseconds for a drag placement
+
+# Touch injection settings
+# "input" runs the device's `input` tool per tap/swipe; "sendevent" writes
+# precompiled raw touch events to the touchscreen's /dev/input node instead
+TOUCH_INPUT_MODE = "input"
+TOUCH_SWIPE_STEP_MS = 16  # Milliseconds between move events of a raw-event swipe
+TOUCH_DISCOVERY_RETRY = 60.0  # Seconds before a failed touchscreen lookup is retried
+
+# Input queue settings (per-device input worker)
+# Card plays always run first; housekeeping (fire-and-forget) taps are
+# limited to INPUT_RATE_LIMIT per second (0 disables the cap), and one
+# already waiting at the same point absorbs duplicates
+INPUT_RATE_LIMIT = 8
+
+# Burst tap settings (battlepass and card upgrade loops)
+# Repeated taps at one point run on the device as one command per chunk while
+# detection watches a background frame stream and stops the burst early
+BURST_TAP_INTERVAL = 0.05  # Default seconds between taps of a burst
+BURST_TAP_CHUNK = 20  # Taps per device command
+BURST_TAP_STOP_PATH = "/data/local/tmp/crbot_burst_stop"  # Device-side stop flag prefix
+
+# Input latency calibration
+# Tap-to-visible-change latency is measured per device (card-slot taps at the
+# first battle, plus every transition-aware tap) and configured delays such
+# as CARD_SELECTION_DELAY are scaled by how fast the device responds
+INPUT_LATENCY_WINDOW = 50  # Rolling window of samples per device
+INPUT_LATENCY_PERCENTILE = 90  # Percentile the delays are scaled by
+INPUT_LATENCY_MIN_SAMPLES = 5  # Configured delays are used until this many samples exist
+INPUT_LATENCY_REFERENCE = 0.3  # Latency (seconds) the configured delays were tuned for
+INPUT_LATENCY_SCALE_LIMITS = (0.25, 2.0)  # Bounds on scaling a configured delay
+INPUT_LATENCY_CALIBRATION_TAPS = 6  # Card-slot taps (select/deselect pairs) to calibrate
+# Screen region (x0, y0, x1, y1) watched while calibrating: card slot 1 inside
+# the "cards" band, clear of the animated arena and elixir bar
+INPUT_LATENCY_REGION = (109, 530, 173, 590)
+
+# Fleet-wide ADB scheduler
+# Caps adb operations running at once across all instances and grants free
+# slots to card plays first, then in-battle captures, menu navigation and
+# finally discovery/health checks (0 disables scheduling)
+ADB_MAX_CONCURRENT = 4
+
+# ADB subprocess deadlines
+# Every adb child process is killed (with its process tree) after the
+# deadline for its kind; ADB_TIMEOUT_RECYCLE_LIMIT timeouts on one device
+# within ADB_TIMEOUT_RECYCLE_WINDOW seconds get that instance recycled
+ADB_TIMEOUTS = {
+    "input": 5,
+    "capture": CAPTURE_TIMEOUT,
+    "pull": 15,
+    "app": 20,
+    "shell": 15,
+    "connect": 10,
+    "devices": 10,
+    "server": 15,
+    "default": 30,
+}
+ADB_TIMEOUT_RECYCLE_LIMIT = 3
+ADB_TIMEOUT_RECYCLE_WINDOW = 120.0
@@ -33,6 +33,11 @@ class ConsoleDisplay:
                 "losses": 0,
                 "cards_played": 0,
                 "restarts": 0,
+                "capture_ms": 0.0,
+                "card_play_ms": 0.0,
+                "input_latency_ms": 0.0,
+                "wait_saved": 0.0,
+                "adb_timeouts": 0,
                 "last_message": "Starting up...",
                 "runtime": "00:00:00",
                 "start_time": time.time(),
@@ -159,6 +164,11 @@ class ConsoleDisplay:
             f"Battles: {total_battles:<3} | W/L: {data['wins']}/{data['losses']} ({win_rate_str:<6}) | "
             f"Cards: {data['cards_played']:<4} | Restarts: {data['restarts']}"
         )
+        print(
+            f"   Capture: {data['capture_ms']:.0f}ms | Card play: {data['card_play_ms']:.0f}ms | "
+            f"Input latency: {data['input_latency_ms']:.0f}ms | "
+            f"Waits saved: {data['wait_saved']:.1f}s | ADB timeouts: {data['adb_timeouts']}"
+        )
 
         # Show current activity (truncated to fit)
         activity = data["last_message"]
@@ -3,39 +3,97 @@ Image detection and template matching utilities
 """
 
 import cv2
-import os
-from config import REF_IMAGES, CONFIDENCE_THRESHOLD
+from config import CONFIDENCE_THRESHOLD, DETECTION_CACHE
+from emulators.frame import Frame, as_image, fingerprint_of, fingerprints_differ
+from template_store import get_template_store
 
 
 class ImageDetector:
     """Handles image detection and template matching"""
 
-    def __init__(self, instance_name):
+    def __init__(self, instance_name, use_cache=DETECTION_CACHE, templates=None):
         self.instance_name = instance_name
+        # Decoded templates, shared by every detector in the process
+        self.templates = templates if templates is not None else get_template_store()
+        # Template results for the current screen, per capture profile;
+        # dropped once that profile's screen changes
+        self.use_cache = use_cache
+        self._caches = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def clear_cache(self):
+        """Forget cached template results"""
+        self._caches = {}
+
+    @staticmethod
+    def _profile_key(screenshot):
+        """Frames from different capture profiles are cached separately"""
+        if isinstance(screenshot, Frame):
+            return screenshot.origin, screenshot.scale, screenshot.image.ndim
+        return (0, 0), 1.0, screenshot.ndim
+
+    def _cached_result(self, screenshot, key):
+        """Return the cached result for `key` if the screen hasn't changed"""
+        profile_key = self._profile_key(screenshot)
+        fingerprint = fingerprint_of(screenshot)
+        cached_fingerprint, results = self._caches.get(profile_key, (None, None))
+        if fingerprints_differ(cached_fingerprint, fingerprint):
+            self._caches[profile_key] = (fingerprint, {})
+            return None
+        return results.get(key)
+
+    def _store_result(self, screenshot, key, match):
+        entry = self._caches.get(self._profile_key(screenshot))
+        if entry is not None:
+            entry[1][key] = match
+
+    def _template_for(self, template_name, screenshot):
+        """The template at the frame's scale and channels (None if it didn't load)"""
+        if not isinstance(screenshot, Frame):
+            return self.templates.get(template_name)
+        return self.templates.get(
+            template_name,
+            scale=screenshot.scale,
+            grayscale=screenshot.image.ndim == 2,
+        )
 
     def find_template(
         self, template_name, screenshot=None, confidence=CONFIDENCE_THRESHOLD
     ):
-        """Find a template image within a screenshot"""
-        if screenshot is None:
+        """
+        Find a template image within a screenshot (Frame or BGR array).
+
+        Reduced frames (bands, half-size, grayscale) are matched with a
+        matching template, and the position is returned in screen coordinates.
+        """
+        image = as_image(screenshot)
+        if image is None:
             print(
                 f"[{self.instance_name}] No screenshot provided for template matching"
             )
             return None, None
 
-        # Load template image
-        template_path = REF_IMAGES[template_name]
-        if not os.path.exists(template_path):
-            print(f"[{self.instance_name}] Template image not found: {template_path}")
+        # An unchanged screen gives the same answer - skip the matching
+        key = (template_name, confidence)
+        if self.use_cache:
+            cached = self._cached_result(screenshot, key)
+            if cached is not None:
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+
+        # Missing templates were reported once when the store loaded
+        template = self._template_for(template_name, screenshot)
+        if template is None:
             return None, None
 
-        template = cv2.imread(template_path)
-        if template is None:
-            print(f"[{self.instance_name}] Failed to load template: {template_path}")
+        if template.shape[0] > image.shape[0] or template.shape[1] > image.shape[1]:
+            # Template doesn't fit, e.g. a band that doesn't cover it
             return None, None
 
         # Perform template matching
-        result = cv2.matchTemplate(screenshot, template, cv2.TM_CCOEFF_NORMED)
+        result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
         min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(result)
 
         # Check if match is above confidence threshold
@@ -44,14 +102,27 @@ class ImageDetector:
             h, w = template.shape[:2]
             center_x = max_loc[0] + w // 2
             center_y = max_loc[1] + h // 2
-            return (center_x, center_y), max_val
+            if isinstance(screenshot, Frame):
+                center_x, center_y = screenshot.to_screen(center_x, center_y)
+            match = (center_x, center_y), max_val
         else:
-            return None, max_val
+            match = None, max_val
+
+        if self.use_cache:
+            self._store_result(screenshot, key, match)
+        return match
 
     def check_pixel_color(
         self, screenshot, x, y, expected_color=(255, 255, 255), tolerance=30
     ):
         """Check if pixel at (x, y) matches expected color within tolerance"""
+        if isinstance(screenshot, Frame):
+            if screenshot.image is None or screenshot.image.ndim == 2:
+                return False  # Colour checks need a colour profile
+            x, y = screenshot.to_frame(x, y)
+            if x < 0 or y < 0:
+                return False
+        screenshot = as_image(screenshot)
         if screenshot is None:
             return False
 
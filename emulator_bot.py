@@ -4,7 +4,15 @@ Main EmulatorBot class - refactored with PyClashBot architecture
 
 import time
 import random
-from emulators import MemuController
+import threading
+from collections import deque
+from concurrent.futures import CancelledError
+from emulators import MemuController, FrameGrabber
+from emulators.capture_profiles import apply_profile, get_capture_profile
+from emulators.frame import compute_fingerprint, fingerprint_of, fingerprints_differ
+from emulators.adb_process import add_timeout_listener, remove_timeout_listener
+from emulators.input_latency import get_latency_tracker
+from emulators.input_worker import PRIORITY_CRITICAL, PRIORITY_HOUSEKEEPING
 from detection import ImageDetector
 from battle_logic import BattleLogic
 from battle_strategy import BattleStrategy
@@ -13,11 +21,24 @@ from utils import wait_with_timeout, retry_with_fallback
 from config import (
     CONFIDENCE_THRESHOLD,
     CARD_SELECTION_DELAY,
+    CARD_PLACEMENT_MODE,
+    CARD_PLACEMENT_MODES,
+    CARD_DRAG_DURATION,
+    BACKGROUND_CAPTURE,
+    CAPTURE_TIMEOUT,
+    CAPTURE_FALLBACK_MODE,
+    BURST_TAP_INTERVAL,
+    BURST_TAP_CHUNK,
+    NAVIGATION_CAPTURE_PROFILE,
     FALLBACK_POSITIONS,
     CARD_SLOTS,
     DEFAULT_TIMEOUTS,
     FALLBACK_CLICK_COUNT,
     FALLBACK_CLICK_INTERVAL,
+    INPUT_LATENCY_CALIBRATION_TAPS,
+    INPUT_LATENCY_REGION,
+    ADB_TIMEOUT_RECYCLE_LIMIT,
+    ADB_TIMEOUT_RECYCLE_WINDOW,
 )
 
 
@@ -27,12 +48,26 @@ class EmulatorBot:
     """
 
     def __init__(
-        self, device_id, instance_name, use_console_display=True, logger_callback=None
+        self,
+        device_id,
+        instance_name,
+        use_console_display=True,
+        logger_callback=None,
+        background_capture=BACKGROUND_CAPTURE,
+        frame_source=None,
+        placement_mode=None,
     ):
         self.device_id = device_id
         self.instance_name = instance_name
         self.running = True
 
+        # How cards are placed: "tap" (select + tap target) or "drag"
+        self.placement_mode = placement_mode or CARD_PLACEMENT_MODES.get(
+            instance_name, CARD_PLACEMENT_MODE
+        )
+        if self.placement_mode not in ("tap", "drag"):
+            raise ValueError(f"Unknown card placement mode: {self.placement_mode}")
+
         # Initialize logger first
         self.logger = Logger(
             instance_name,
@@ -41,30 +76,444 @@ class EmulatorBot:
             callback=logger_callback,
         )
 
-        # Initialize emulator controller
-        self.emulator = MemuController(device_id, instance_name)
+        # Initialize emulator controller. With a frame source the capture
+        # process owns capture (and the backend probe); this one sends input
+        if frame_source is not None:
+            self.emulator = MemuController(
+                device_id, instance_name, capture_mode=CAPTURE_FALLBACK_MODE
+            )
+        else:
+            self.emulator = MemuController(device_id, instance_name)
+        # Measured tap-to-screen latency of this device, shared by its bots
+        self.input_latency = get_latency_tracker(device_id)
+        self._latency_calibrated = False
+
+        # Optional background capture thread feeding a latest-frame slot
+        self.frame_grabber = None
+        self._frame_source = frame_source
+        self._last_frame_seq = 0
+        self._last_input_time = 0.0
+        if frame_source is not None:
+            # Frames come from elsewhere, e.g. a capture process via the frame bus
+            self.frame_grabber = frame_source
+        elif background_capture:
+            self.frame_grabber = FrameGrabber(
+                self.emulator.capture_frame, name=f"{instance_name}-capture"
+            )
+            self.frame_grabber.start()
 
         # Initialize components
         self.detector = ImageDetector(instance_name)
         self.battle_logic = BattleLogic(instance_name, self.detector)
         self.battle_strategy = BattleStrategy()
 
-        self.logger.log("Bot initialized successfully")
+        # adb timeouts on this device; too many in a row get the instance recycled.
+        # Listeners run on whichever adb thread timed out, hence the lock
+        self._adb_timeouts = deque()
+        self._adb_timeout_lock = threading.Lock()
+        self.recycle_requested = False
+        add_timeout_listener(self._on_adb_timeout)
+
+        self.logger.log(
+            f"Bot initialized successfully (card placement: {self.placement_mode})"
+        )
 
     def stop(self):
         """Stop this bot instance"""
         self.running = False
+        remove_timeout_listener(self._on_adb_timeout)
+        if self.frame_grabber is not None:
+            self.frame_grabber.stop()
         self.emulator.stop()
+        self.logger.log(
+            f"Detection cache: {self.detector.cache_hits} hits, "
+            f"{self.detector.cache_misses} misses"
+        )
         self.logger.log("Bot stopped")
         self.logger.log_summary()
 
-    def take_screenshot(self):
-        """Take screenshot using emulator controller"""
-        return self.emulator.screenshot()
+    def take_screenshot(self, profile=None):
+        """
+        Take a screenshot as a Frame (pixel array plus capture metadata).
+
+        Args:
+            profile: Capture profile ("half", "gray", a band such as "cards", ...);
+                     reduced frames still take screen coordinates
+        """
+        if self.frame_grabber is None:
+            return self.emulator.capture_frame(profile)
+
+        frame = self._next_grabbed_frame()
+        if frame is None:
+            return None
+        return apply_profile(
+            frame, get_capture_profile(profile), self.emulator.buffer_pool
+        )
+
+    def _next_grabbed_frame(self):
+        """Next background frame captured after the last input"""
+        # Never hand out the same frame twice, and refuse frames whose capture
+        # started before our last tap - they can't show its effect yet
+        deadline = time.monotonic() + CAPTURE_TIMEOUT
+        while True:
+            remaining = deadline - time.monotonic()
+            seq, frame = self.frame_grabber.wait_for_frame(
+                self._last_frame_seq, timeout=max(remaining, 0)
+            )
+            if frame is None:
+                return None
+            self._last_frame_seq = seq
+            if frame.capture_start >= self._last_input_time or remaining <= 0:
+                return frame
+            frame.release()
+
+    @staticmethod
+    def _fingerprint(screenshot, region=None):
+        """Change-detection fingerprint of a frame, or of one (x0, y0, x1, y1) region"""
+        if region is None:
+            return fingerprint_of(screenshot)
+        x0, y0, x1, y1 = region
+        return compute_fingerprint(screenshot[y0:y1, x0:x1])
+
+    def wait_for_screen_change(
+        self, timeout=5.0, reference=None, interval=0.1, profile=None, region=None
+    ):
+        """
+        Wait until the screen differs from a reference frame.
+
+        Args:
+            timeout: Maximum time to wait in seconds
+            reference: Frame/image to compare against (default: the current screen)
+            interval: Time between captures in seconds
+            profile: Capture profile for the frames compared
+            region: Only compare this (x0, y0, x1, y1) screen region
+
+        Returns:
+            Frame: The first changed frame, or None on timeout
+        """
+        if reference is None:
+            reference = self.take_screenshot(profile)
+            if reference is None:
+                return None
+            reference_fingerprint = self._fingerprint(reference, region)
+            reference.release()
+        else:
+            reference_fingerprint = self._fingerprint(reference, region)
+
+        deadline = time.monotonic() + timeout
+        while self.running and time.monotonic() < deadline:
+            screenshot = self.take_screenshot(profile)
+            if screenshot is not None:
+                fingerprint = self._fingerprint(screenshot, region)
+                if fingerprints_differ(reference_fingerprint, fingerprint):
+                    return screenshot
+                screenshot.release()
+            time.sleep(interval)
+        return None
 
     def tap_screen(self, x, y, clicks=1, interval=0.1):
-        """Send a tap command using emulator controller"""
-        return self.emulator.click(x, y, clicks, interval)
+        """Send a tap command using emulator controller and wait for it"""
+        success = self._wait_for_input(
+            self.emulator.tap_async(x, y, clicks, interval)
+        )
+        # Like the other input paths: the tap counts once it has been sent
+        self._last_input_time = time.monotonic()
+        return success
+
+    def tap_screen_async(self, x, y, clicks=1, interval=0.1):
+        """
+        Queue a tap without waiting for it, for taps that need no confirmation.
+
+        These are housekeeping taps: they yield to card plays, are rate
+        limited, and repeats of one still waiting are merged into it.
+
+        Returns:
+            Future: Resolves to True if the tap was sent
+        """
+        future = self.emulator.tap_async(
+            x, y, clicks, interval, priority=PRIORITY_HOUSEKEEPING
+        )
+        future.add_done_callback(self._input_done)
+        return future
+
+    def tap_and_wait(
+        self,
+        x,
+        y,
+        until=None,
+        max_wait=2.0,
+        reference=None,
+        label="Tap",
+        profile=NAVIGATION_CAPTURE_PROFILE,
+    ):
+        """
+        Tap, then wait for the screen to react instead of sleeping a fixed time.
+
+        Without `until` this returns once the screen differs from `reference`
+        (the frame the tap target was found on); with `until` it returns once
+        one of those templates shows up. `max_wait` - the fixed sleep this
+        replaces - bounds the wait, and the time saved is logged.
+
+        Args:
+            until: Template name or names expected after the tap
+            max_wait: Upper bound on the wait in seconds
+            reference: Frame from before the tap (captured here if omitted)
+            label: Name of the tap in the log
+            profile: Capture profile used while waiting
+
+        Returns:
+            bool: True if the tap was sent
+        """
+        own_reference = None
+        if until is None and reference is None:
+            reference = own_reference = self.take_screenshot(profile)
+        try:
+            started = time.monotonic()
+            if not self.tap_screen(x, y):
+                return False
+
+            if until is None:
+                # Menu transitions take longer than a card tap, so they are
+                # not fed into the calibrated latency
+                frame = self.wait_for_screen_change(
+                    max_wait, reference, interval=0.1, profile=profile
+                )
+            else:
+                templates = (until,) if isinstance(until, str) else tuple(until)
+                frame = self._wait_for_any_template(
+                    templates, started + max_wait, profile
+                )
+        finally:
+            # The caller's reference is theirs to release; ours ends here
+            if own_reference is not None:
+                own_reference.release()
+
+        waited = time.monotonic() - started
+        if frame is None:
+            self.logger.log(f"{label}: no transition seen within {max_wait:.1f}s")
+            return True
+        frame.release()
+        saved = max(max_wait - waited, 0.0)
+        self.logger.record_wait_saved(saved)
+        self.logger.log(f"{label}: screen ready after {waited:.1f}s ({saved:.1f}s saved)")
+        return True
+
+    def _on_adb_timeout(self, device_id, kind):
+        """Count adb timeouts on this device and flag the instance once it looks wedged"""
+        if device_id != self.device_id:
+            return
+        with self._adb_timeout_lock:
+            self.logger.record_adb_timeout(kind)
+            self.logger.log(f"ADB {kind} command timed out")
+            now = time.monotonic()
+            self._adb_timeouts.append(now)
+            while self._adb_timeouts[0] < now - ADB_TIMEOUT_RECYCLE_WINDOW:
+                self._adb_timeouts.popleft()
+            if len(self._adb_timeouts) >= ADB_TIMEOUT_RECYCLE_LIMIT:
+                if not self.recycle_requested:
+                    self.logger.log(
+                        f"{len(self._adb_timeouts)} adb timeouts in "
+                        f"{ADB_TIMEOUT_RECYCLE_WINDOW:.0f}s - recycling instance"
+                    )
+                self.recycle_requested = True
+
+    def recycle_if_wedged(self):
+        """
+        Reconnect and restart the game if adb has kept timing out on this device.
+
+        Returns:
+            bool: True if the instance was recycled
+        """
+        with self._adb_timeout_lock:
+            if not self.recycle_requested:
+                return False
+            self.recycle_requested = False
+            self._adb_timeouts.clear()
+        self.logger.change_status("Recycling wedged instance...")
+        if not self.emulator.reconnect():
+            self.logger.log("Reconnect failed, restarting the app anyway")
+        self.restart_app()
+        return True
+
+    def adaptive_delay(self, default):
+        """A configured delay scaled to this device's measured input latency"""
+        return self.input_latency.delay(default)
+
+    def _record_input_latency(self, tapped_at, frame):
+        """Tap-to-visible-change latency from the first frame showing the change"""
+        self.input_latency.record(frame.capture_start - tapped_at)
+        p50 = self.input_latency.percentile(50)
+        p90 = self.input_latency.percentile(90)
+        self.logger.record_input_latency(p50, p90, self.input_latency.samples)
+
+    def calibrate_input_latency(self, taps=INPUT_LATENCY_CALIBRATION_TAPS):
+        """
+        Measure tap-to-visible-change latency by selecting and deselecting a card.
+
+        Only meaningful in battle, where tapping a card slot raises (and a
+        second tap lowers) the card. Only the slot (INPUT_LATENCY_REGION of
+        the "cards" band) is compared, and a tap is only sent while the slot
+        holds still, so arena and elixir animations are not mistaken for the
+        response. An even number of taps leaves the hand as it was. Runs
+        once per bot, and not at all if the device already has enough samples.
+        If it stops early with the card raised, the card is tapped back down.
+
+        Returns:
+            int: Number of latency samples recorded
+        """
+        if self._latency_calibrated or self.input_latency.calibrated:
+            return 0
+        self._latency_calibrated = True
+        card_x, card_y = CARD_SLOTS[0]
+        region = INPUT_LATENCY_REGION
+        wanted = taps + taps % 2
+        recorded = sent = 0
+        for _ in range(wanted * 2):  # Room for samples rejected as unsteady
+            if not self.running or recorded == wanted:
+                break
+            reference = self.take_screenshot("cards")
+            if reference is None:
+                continue
+            # The slot changing without a tap would time an animation instead
+            unsteady = self.wait_for_screen_change(
+                0.05, reference, interval=0.05, profile="cards", region=region
+            )
+            if unsteady is not None:
+                unsteady.release()
+                reference.release()
+                continue
+            tapped_at = time.monotonic()
+            if not self.tap_screen(card_x, card_y):
+                reference.release()
+                break
+            sent += 1
+            frame = self.wait_for_screen_change(
+                2.0, reference, interval=0.02, profile="cards", region=region
+            )
+            reference.release()
+            if frame is None:
+                break  # The card didn't react; keep the configured delays
+            self._record_input_latency(tapped_at, frame)
+            frame.release()
+            recorded += 1
+        if sent % 2:
+            self.tap_screen(card_x, card_y)  # Lower the card left raised
+
+        if self.input_latency.calibrated:
+            self.logger.log(
+                f"Input latency: p90 {self.input_latency.percentile() * 1000:.0f}ms, "
+                f"delays scaled x{self.input_latency.scale():.2f}"
+            )
+        return recorded
+
+    def _wait_for_any_template(self, templates, deadline, profile=None, interval=0.1):
+        """First frame before `deadline` showing one of `templates` (None on timeout)"""
+        while self.running and time.monotonic() < deadline:
+            screenshot = self.take_screenshot(profile)
+            if screenshot is not None:
+                if any(self.find_template(name, screenshot)[0] for name in templates):
+                    return screenshot
+                screenshot.release()
+            time.sleep(interval)
+        return None
+
+    def _input_done(self, future):
+        """Frames captured before a queued tap landed can't show its effect"""
+        self._last_input_time = max(self._last_input_time, time.monotonic())
+
+    @staticmethod
+    def _wait_for_input(future):
+        """Result of a queued input command (False if it was cancelled on stop)"""
+        try:
+            return future.result()
+        except CancelledError:
+            return False
+
+    def tap_sequence(self, taps):
+        """Send several taps, with optional delays after each, as one input operation"""
+        success = self._wait_for_input(
+            self.emulator.tap_sequence_async(taps, priority=PRIORITY_CRITICAL)
+        )
+        # The last tap lands only when the whole sequence has run
+        self._last_input_time = time.monotonic()
+        return success
+
+    def drag(self, x1, y1, x2, y2, duration=CARD_DRAG_DURATION):
+        """Drag from one point to another with a single swipe gesture"""
+        success = self._wait_for_input(
+            self.emulator.swipe_async(
+                x1, y1, x2, y2, duration, priority=PRIORITY_CRITICAL
+            )
+        )
+        self._last_input_time = time.monotonic()
+        return success
+
+    def burst_tap_until(
+        self, x, y, template_name, max_taps, interval=BURST_TAP_INTERVAL, timeout=None
+    ):
+        """
+        Burst-tap a point until a template appears, detecting while the taps run.
+
+        Taps go to the device in bursts of BURST_TAP_CHUNK; meanwhile frames
+        from a background stream are checked for the template, and the burst
+        is stopped as soon as it shows up.
+
+        Args:
+            x, y: Point to tap
+            template_name: Template to look for
+            max_taps: Maximum number of taps to send
+            interval: Seconds between taps (device side)
+            timeout: Maximum time in seconds (None: until max_taps are sent)
+
+        Returns:
+            tuple: (position, confidence, taps_sent); position is None if the
+            template never appeared
+        """
+        grabber = self.frame_grabber
+        if grabber is None:
+            grabber = FrameGrabber(
+                self.emulator.capture_frame, name=f"{self.instance_name}-burst"
+            )
+            grabber.start()
+        seq = self._last_frame_seq if grabber is self.frame_grabber else 0
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        position, confidence, taps = None, None, 0
+
+        try:
+            while self.running and taps < max_taps and position is None:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                count = min(BURST_TAP_CHUNK, max_taps - taps)
+                burst = self.emulator.burst_tap_async(x, y, count, interval)
+                taps += count
+
+                # Detect until the burst has run, checking one frame after it
+                while self.running:
+                    finished = burst.done()
+                    seq, frame = grabber.wait_for_frame(seq, timeout=CAPTURE_TIMEOUT)
+                    if frame is not None:
+                        try:
+                            position, confidence = self.find_template(
+                                template_name, frame
+                            )
+                        except Exception as e:
+                            self.logger.log(f"Template detection error: {e}")
+                        frame.release()
+                    timed_out = deadline is not None and time.monotonic() >= deadline
+                    if position is not None or timed_out or not self.running:
+                        self.emulator.stop_burst()
+                        break
+                    if finished or frame is None:
+                        break
+                self._wait_for_input(burst)
+        finally:
+            if grabber is self.frame_grabber:
+                self._last_frame_seq = seq
+            else:
+                grabber.stop()
+            self._last_input_time = time.monotonic()
+
+        return position, confidence, taps
 
     def restart_app(self):
         """Restart Clash Royale app using emulator controller"""
@@ -106,7 +555,26 @@ class EmulatorBot:
         screenshot = self.take_screenshot()
         if screenshot is None:
             return False
-        return self.battle_logic.is_in_battle(screenshot)
+        try:
+            in_battle = self.battle_logic.is_in_battle(screenshot)
+            # In-battle captures go ahead of other instances' menu traffic,
+            # including those of a capture process feeding this bot
+            self.emulator.in_battle = in_battle
+            if self._frame_source is not None:
+                self._frame_source.in_battle = in_battle
+            return in_battle
+        finally:
+            screenshot.release()
+
+    def is_double_elixir(self):
+        """Check for 2x elixir on a fresh full frame"""
+        screenshot = self.take_screenshot()
+        if screenshot is None:
+            return False
+        try:
+            return self.battle_logic.detect_2x_elixir(screenshot)
+        finally:
+            screenshot.release()
 
     def find_template(
         self, template_name, screenshot=None, confidence=CONFIDENCE_THRESHOLD
@@ -231,7 +699,7 @@ class EmulatorBot:
             ):  # After 5 seconds, start clicking deadspace
                 if random.randint(0, 2) == 0:  # 33% chance each cycle
                     deadspace_position = FALLBACK_POSITIONS.get("deadspace", (21, 511))
-                    self.tap_screen(
+                    self.tap_screen_async(
                         deadspace_position[0], deadspace_position[1]
                     )  # Deadspace click to handle UI
 
@@ -299,13 +767,14 @@ class EmulatorBot:
             if not self.running:
                 return False
 
-            screenshot = self.take_screenshot()
+            screenshot = self.take_screenshot(NAVIGATION_CAPTURE_PROFILE)
             if screenshot is None:
                 continue
 
             battle_position, confidence = self.find_template(
                 "battle_button", screenshot
             )
+            screenshot.release()
             if battle_position:
                 self.logger.log(
                     f"Found Battle button (confidence: {confidence:.2f}), clicking to start battle..."
@@ -336,6 +805,7 @@ class EmulatorBot:
 
         # Check which cards are available
         available_cards = self.battle_logic.check_which_cards_are_available(screenshot)
+        screenshot.release()
         if not available_cards:
             self.logger.change_status("No cards ready yet...")
             return False
@@ -346,16 +816,24 @@ class EmulatorBot:
 
         self.logger.change_status(f"Playing card {card_index} at {play_position}")
 
-        # Click the card
-        if not self.tap_screen(CARD_SLOTS[card_index][0], CARD_SLOTS[card_index][1]):
-            return False
-
-        time.sleep(CARD_SELECTION_DELAY)
-
-        # Play the card
-        if not self.tap_screen(play_position[0], play_position[1]):
+        # Select the card and place it in one input round trip
+        started = time.monotonic()
+        card_x, card_y = CARD_SLOTS[card_index]
+        if self.placement_mode == "drag":
+            placed = self.drag(card_x, card_y, play_position[0], play_position[1])
+        else:
+            placed = self.tap_sequence(
+                [
+                    (card_x, card_y, self.adaptive_delay(CARD_SELECTION_DELAY)),
+                    play_position,
+                ]
+            )
+        if not placed:
             return False
 
+        self.logger.record_card_play_latency(
+            time.monotonic() - started, self.placement_mode
+        )
         self.logger.add_card_played()
         return True
 
@@ -377,6 +855,7 @@ class EmulatorBot:
                 continue
 
             current_elixir = self.battle_logic.detect_elixir_amount(screenshot)
+            screenshot.release()
             if current_elixir is not None and current_elixir >= target_elixir:
                 self.logger.log(
                     f"Have {current_elixir} elixir (needed {target_elixir})"
@@ -402,6 +881,7 @@ class EmulatorBot:
             upgrade_possible_pos, confidence = self.find_template(
                 "upgrade_possible", screenshot
             )
+            screenshot.release()
 
             if upgrade_possible_pos:
                 upgrade_count += 1
@@ -409,17 +889,22 @@ class EmulatorBot:
                     f"Upgrade #{upgrade_count}: Found upgrade_possible (confidence: {confidence:.2f})"
                 )
 
-                # Click upgrade_possible
-                if not self.tap_screen(
-                    upgrade_possible_pos[0], upgrade_possible_pos[1]
+                # Click upgrade_possible and wait (up to 1s) for the card menu
+                if not self.tap_and_wait(
+                    upgrade_possible_pos[0],
+                    upgrade_possible_pos[1],
+                    until="upgrade_button",
+                    max_wait=1,
+                    label="Upgrade possible",
+                    profile=None,
                 ):
                     self.logger.log("Failed to click upgrade_possible, continuing...")
                     continue
 
-                time.sleep(1)
-
                 # Look for and click upgrade_button (first time)
                 screenshot = self.take_screenshot()
+                if screenshot is None:
+                    continue
                 upgrade_button_pos, button_confidence = self.find_template(
                     "upgrade_button", screenshot
                 )
@@ -427,8 +912,15 @@ class EmulatorBot:
                     self.logger.log(
                         f"Found upgrade_button (confidence: {button_confidence:.2f}), clicking..."
                     )
-                    self.tap_screen(upgrade_button_pos[0], upgrade_button_pos[1])
-                    time.sleep(0.5)
+                    self.tap_and_wait(
+                        upgrade_button_pos[0],
+                        upgrade_button_pos[1],
+                        max_wait=0.5,
+                        reference=screenshot,
+                        label="Upgrade button",
+                        profile=None,
+                    )
+                    screenshot.release()
 
                     # Look for and click upgrade_button (second time)
                     screenshot = self.take_screenshot()
@@ -439,10 +931,19 @@ class EmulatorBot:
                         self.logger.log(
                             f"Found upgrade_button again (confidence: {button_confidence2:.2f}), clicking..."
                         )
-                        self.tap_screen(upgrade_button_pos2[0], upgrade_button_pos2[1])
-                        time.sleep(1)
+                        self.tap_and_wait(
+                            upgrade_button_pos2[0],
+                            upgrade_button_pos2[1],
+                            max_wait=1,
+                            reference=screenshot,
+                            label="Upgrade",
+                            profile=None,
+                        )
                         self.logger.add_card_upgraded()
+                    if screenshot is not None:
+                        screenshot.release()
                 else:
+                    screenshot.release()
                     self.logger.log("Upgrade button not found, continuing...")
                     continue
 
@@ -455,30 +956,28 @@ class EmulatorBot:
                     self.logger.log(
                         f"Found Confirm button (confidence: {confirm_confidence:.2f}), clicking..."
                     )
-                    self.tap_screen(confirm_pos[0], confirm_pos[1])
-                    time.sleep(1)
+                    self.tap_and_wait(
+                        confirm_pos[0],
+                        confirm_pos[1],
+                        max_wait=1,
+                        reference=screenshot,
+                        label="Confirm",
+                        profile=None,
+                    )
+                if screenshot is not None:
+                    screenshot.release()
 
-                # Click at card scroll position until upgrade_possible.png is detected again
-                click_attempts = 0
-                max_click_attempts = 20  # Reduced from 30
+                # Tap the card scroll position until upgrade_possible.png is detected again
                 card_scroll_position = FALLBACK_POSITIONS.get("card_scroll", (21, 511))
-
-                while click_attempts < max_click_attempts and self.running:
-                    self.tap_screen(card_scroll_position[0], card_scroll_position[1])
-                    click_attempts += 1
-                    time.sleep(0.5)  # Faster clicking
-
-                    # Check if upgrade_possible is detected again
-                    screenshot = self.take_screenshot()
-                    if screenshot is not None:
-                        next_upgrade_pos, next_confidence = self.find_template(
-                            "upgrade_possible", screenshot
-                        )
-                        if next_upgrade_pos:
-                            self.logger.log(
-                                f"Found next upgrade after {click_attempts} clicks"
-                            )
-                            break
+                next_upgrade_pos, _, click_attempts = self.burst_tap_until(
+                    card_scroll_position[0],
+                    card_scroll_position[1],
+                    "upgrade_possible",
+                    max_taps=20,
+                    interval=0.5,
+                )
+                if next_upgrade_pos:
+                    self.logger.log(f"Found next upgrade after {click_attempts} clicks")
 
             else:
                 self.logger.log("No more upgrades available")
@@ -511,109 +1010,59 @@ class EmulatorBot:
             while self.running:
                 # First click at (114, 271) until ClaimRewards.png is detected
                 self.logger.log("Clicking at (114, 271) to progress battlepass...")
-                click_attempts = 0
                 max_click_attempts = 100  # Prevent infinite clicking
                 found_claim_button = False
 
-                # Keep clicking until we find a ClaimRewards button
-                while (
-                    click_attempts < max_click_attempts
-                    and self.running
-                    and not found_claim_button
-                ):
-                    try:
-                        self.tap_screen(114, 271)
-                        click_attempts += 1
-                        time.sleep(0.05)  # Wait between clicks
-
-                        # Check if ClaimRewards.png is detected
-                        screenshot = self.take_screenshot()
-                        if screenshot is not None:
-                            try:
-                                claim_rewards_pos, confidence = self.find_template(
-                                    "ClaimRewards", screenshot
-                                )
-                                if claim_rewards_pos:
-                                    claims_count += 1
-                                    self.logger.log(
-                                        f"Claim #{claims_count}: Found ClaimRewards button (confidence: {confidence:.2f}) after {click_attempts} clicks"
-                                    )
-
-                                    # Click the ClaimRewards button
-                                    if self.tap_screen(
-                                        claim_rewards_pos[0], claim_rewards_pos[1]
-                                    ):
-                                        self.logger.log(
-                                            "Successfully clicked ClaimRewards button"
-                                        )
-                                        time.sleep(2)  # Wait 2 seconds as requested
-                                        found_claim_button = True
-                                    else:
-                                        self.logger.log(
-                                            "Failed to click ClaimRewards button, continuing..."
-                                        )
-                            except Exception as template_error:
-                                if (
-                                    click_attempts % 20 == 0
-                                ):  # Log template errors less frequently
-                                    self.logger.log(
-                                        f"Template detection error on attempt {click_attempts}: {template_error}"
-                                    )
-                        else:
-                            if (
-                                click_attempts % 20 == 0
-                            ):  # Log screenshot failures less frequently
-                                self.logger.log(
-                                    f"Failed to take screenshot on attempt {click_attempts}"
-                                )
-
-                    except Exception as e:
+                # Burst-tap while watching for a ClaimRewards button
+                claim_rewards_pos, confidence, click_attempts = self.burst_tap_until(
+                    114, 271, "ClaimRewards", max_taps=max_click_attempts, interval=0.05
+                )
+                if claim_rewards_pos:
+                    claims_count += 1
+                    self.logger.log(
+                        f"Claim #{claims_count}: Found ClaimRewards button (confidence: {confidence:.2f}) within {click_attempts} clicks"
+                    )
+
+                    # Click the ClaimRewards button and wait (up to 2s) for the reward screen
+                    if self.tap_and_wait(
+                        claim_rewards_pos[0],
+                        claim_rewards_pos[1],
+                        max_wait=2,
+                        label="ClaimRewards",
+                    ):
+                        self.logger.log("Successfully clicked ClaimRewards button")
+                        found_claim_button = True
+                    else:
                         self.logger.log(
-                            f"Error during click attempt {click_attempts}: {e}"
+                            "Failed to click ClaimRewards button, continuing..."
                         )
                         continue
 
                 # If we found and clicked a claim button, look for the next one
                 if found_claim_button:
-                    # Keep clicking at (114, 271) until claim button is found again or 15 seconds timeout
+                    # Keep clicking at (114, 271) until claim button is found again or 25 seconds timeout
                     self.logger.log("Looking for next ClaimRewards button...")
                     start_time = time.time()
-                    timeout_duration = 25  # 15 seconds timeout
-                    found_next_claim = False
-
-                    while time.time() - start_time < timeout_duration and self.running:
-                        try:
-                            self.tap_screen(114, 271)
-                            time.sleep(0.5)  # Wait between clicks
-
-                            # Check if ClaimRewards.png is detected again
-                            screenshot = self.take_screenshot()
-                            if screenshot is not None:
-                                try:
-                                    next_claim_pos, next_confidence = (
-                                        self.find_template("ClaimRewards", screenshot)
-                                    )
-                                    if next_claim_pos:
-                                        self.logger.log(
-                                            f"Found next ClaimRewards button (confidence: {next_confidence:.2f}) after {time.time() - start_time:.1f} seconds"
-                                        )
-                                        found_next_claim = True
-                                        break
-                                except Exception as template_error:
-                                    self.logger.log(
-                                        f"Template detection error during next claim search: {template_error}"
-                                    )
-                        except Exception as e:
-                            self.logger.log(f"Error during next claim search: {e}")
-                            continue
-
-                    if not found_next_claim:
+                    timeout_duration = 25  # 25 seconds timeout
+
+                    next_claim_pos, next_confidence, _ = self.burst_tap_until(
+                        114,
+                        271,
+                        "ClaimRewards",
+                        max_taps=int(timeout_duration / 0.5),
+                        interval=0.5,
+                        timeout=timeout_duration,
+                    )
+                    if not next_claim_pos:
                         self.logger.log(
-                            "No ClaimRewards button found after 15 seconds timeout"
+                            f"No ClaimRewards button found after {timeout_duration} seconds timeout"
                         )
                         self.logger.log("Ending battlepass claiming sequence")
                         break
-                    # If found_next_claim is True, continue the main loop to claim the next reward
+                    self.logger.log(
+                        f"Found next ClaimRewards button (confidence: {next_confidence:.2f}) after {time.time() - start_time:.1f} seconds"
+                    )
+                    # Continue the main loop to claim the next reward
                 else:
                     # No claim button found after max attempts
                     self.logger.log(
@@ -2,16 +2,18 @@
 Emulator detection and ADB utilities
 """
 
+import shlex
 import subprocess
-from config import MEMU_PORTS
+from config import MEMU_PORTS, ADB_TRANSPORT
+from emulators.adb_client import AdbError, get_adb_client
+from emulators.adb_process import run_adb
+from emulators.transport import create_transport
 
 
 def check_adb_available():
     """Check if ADB is available in the system"""
     try:
-        result = subprocess.run(
-            "adb version", shell=True, capture_output=True, text=True
-        )
+        result = run_adb(["adb", "version"], kind="server", text=True)
         if result.returncode != 0:
             print("ERROR: ADB (Android Debug Bridge) is not installed or not in PATH!")
             print("Please install ADB and add it to your system PATH.")
@@ -29,9 +31,20 @@ def get_connected_devices():
     """Get list of all currently connected ADB devices"""
     try:
         print("Getting list of all connected ADB devices...")
-        devices_result = subprocess.run(
-            "adb devices", shell=True, capture_output=True, text=True
-        )
+        if ADB_TRANSPORT == "socket":
+            try:
+                states = get_adb_client().devices()
+                connected_devices = [
+                    device_id
+                    for device_id, state in states.items()
+                    if state == "device"
+                ]
+                print(f"Found {len(connected_devices)} connected ADB device(s)")
+                return connected_devices
+            except AdbError:
+                pass  # Fall back to the adb binary (it also starts the server)
+
+        devices_result = run_adb(["adb", "devices"], kind="devices", text=True)
         if devices_result.returncode != 0:
             print("Failed to get ADB devices list")
             return []
@@ -53,14 +66,8 @@ def get_connected_devices():
 def test_device_responsiveness(device_id):
     """Test if a device is responsive"""
     try:
-        test_result = subprocess.run(
-            f"adb -s {device_id} shell echo test",
-            shell=True,
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        return test_result.returncode == 0 and "test" in test_result.stdout
+        test_result = create_transport(device_id).shell("echo test", timeout=5)
+        return test_result.exit_code == 0 and "test" in test_result.stdout
     except Exception:
         return False
 
@@ -79,9 +86,19 @@ def connect_to_memu_ports():
         print(f"Checking for MEmu instance on port {port}...")
 
         # Try to connect to this port
-        result = subprocess.run(
-            f"adb connect {device_id}", shell=True, capture_output=True, text=True
-        )
+        try:
+            result = run_adb(
+                ["adb", "connect", device_id],
+                kind="connect",
+                device_id=device_id,
+                text=True,
+            )
+        except subprocess.TimeoutExpired:
+            print(f"✗ Connecting to port {port} timed out")
+            continue
+        except OSError as e:
+            print(f"✗ Could not run adb for port {port}: {e}")
+            continue
         if result.returncode == 0:
             # Verify the device is actually responsive
             if test_device_responsiveness(device_id):
@@ -136,12 +153,11 @@ def detect_memu_instances():
 
 
 def send_adb_command(device_id, command, timeout=10):
-    """Send an ADB command to a specific device"""
+    """Send an ADB command (e.g. "shell input tap 1 2") to a specific device"""
     try:
-        full_command = f"adb -s {device_id} {command}"
-        result = subprocess.run(
-            full_command, shell=True, capture_output=True, text=True, timeout=timeout
-        )
+        # Split like a shell would, but without running one on the host
+        args = ["adb", "-s", device_id, *shlex.split(command)]
+        result = run_adb(args, device_id=device_id, timeout=timeout, text=True)
         return result.returncode == 0, result.stdout, result.stderr
     except subprocess.TimeoutExpired:
         return False, "", "Command timeout"
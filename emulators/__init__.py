@@ -2,7 +2,25 @@
 Emulator package for Clash Royale Bot
 """
 
+from .adb_scheduler import AdbScheduler, get_adb_scheduler
 from .base import BaseEmulatorController
+from .capture_backends import CAPTURE_BACKENDS, CaptureBackend, register_capture_backend
+from .frame import Frame, as_image
 from .memu import MemuController
+from .frame_grabber import FrameGrabber
+from .frame_bus import FrameBus, FrameBusReader
 
-__all__ = ["BaseEmulatorController", "MemuController"]
+__all__ = [
+    "AdbScheduler",
+    "get_adb_scheduler",
+    "BaseEmulatorController",
+    "MemuController",
+    "FrameGrabber",
+    "FrameBus",
+    "FrameBusReader",
+    "Frame",
+    "as_image",
+    "CAPTURE_BACKENDS",
+    "CaptureBackend",
+    "register_capture_backend",
+]
@@ -0,0 +1,408 @@
+"""
+Pure-Python client for the ADB server smart-socket protocol
+
+Talks to the adb server on localhost:5037 directly instead of spawning the
+`adb` binary for every command. Covers the host services we use
+(host:devices, host:connect, host:transport) and the device services
+shell:, exec: and sync: (pull).
+"""
+
+import socket
+import struct
+import threading
+import time
+from collections import namedtuple
+from config import ADB_SERVER_HOST, ADB_SERVER_PORT, ADB_POOL_SIZE, ADB_SOCKET_TIMEOUT
+
+ShellResult = namedtuple("ShellResult", ["exit_code", "stdout", "stderr"])
+
+# shell v2 packet ids
+_SHELL_STDOUT = 1
+_SHELL_STDERR = 2
+_SHELL_EXIT = 3
+
+_SYNC_CHUNK = 64 * 1024
+_EXIT_MARKER = b"__adb_exit__"
+
+# FAIL messages of a device without shell v2; anything else (e.g. "device
+# offline") may be transient and must not downgrade the device for good
+_SHELL_V2_UNSUPPORTED = ("unknown service", "not supported")
+
+
+class AdbError(Exception):
+    """Raised when the adb server rejects a request or the connection fails"""
+
+
+class AdbServerUnavailable(AdbError):
+    """Raised when nothing is listening on the adb server port"""
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    """Read exactly `size` bytes or raise AdbError on early EOF"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise AdbError(f"Connection closed after {received}/{size} bytes")
+        received += count
+    return bytes(buffer)
+
+
+def grow_buffer(buffer: bytearray, needed: int):
+    """
+    Enlarge a reused output buffer to hold at least `needed` bytes.
+
+    It grows by half again (or to `needed` plus one chunk, if more), so an
+    output that keeps growing a little does not resize it on every read.
+    """
+    if len(buffer) < needed:
+        size = max(len(buffer) * 3 // 2, needed + _SYNC_CHUNK)
+        buffer.extend(bytes(size - len(buffer)))
+
+
+def _recv_into(sock: socket.socket, buffer: bytearray) -> int:
+    """Read until EOF into `buffer`, growing it as needed; returns the bytes read"""
+    received = 0
+    while True:
+        if received == len(buffer):
+            grow_buffer(buffer, received + 1)
+        # The view must be gone before the next grow_buffer() resizes the buffer
+        with memoryview(buffer) as view:
+            count = sock.recv_into(view[received:])
+        if count == 0:
+            return received
+        received += count
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    """Read until the server closes the stream"""
+    chunks = []
+    while True:
+        chunk = sock.recv(_SYNC_CHUNK)
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
+
+def _shell_v2_unsupported(error: Exception) -> bool:
+    """True if opening a shell v2 service failed because adbd lacks it"""
+    message = str(error).strip().lower()
+    return message == "closed" or any(text in message for text in _SHELL_V2_UNSUPPORTED)
+
+
+class _DevicePool:
+    """Idle sync connections and a concurrency cap for one device"""
+
+    def __init__(self, size: int):
+        self.idle_sync = []
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+
+
+class AdbClient:
+    """Smart-socket client with a small connection pool per device"""
+
+    def __init__(
+        self,
+        host: str = ADB_SERVER_HOST,
+        port: int = ADB_SERVER_PORT,
+        timeout: float = ADB_SOCKET_TIMEOUT,
+        pool_size: int = ADB_POOL_SIZE,
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._pools: dict[str, _DevicePool] = {}
+        self._pools_lock = threading.Lock()
+        self._shell_v2: dict[str, bool] = {}
+
+    # ------------------------------------------------------------------
+    # Low level protocol helpers
+    # ------------------------------------------------------------------
+    def _connect(self, timeout: float | None = None) -> socket.socket:
+        """Open a fresh connection to the adb server"""
+        try:
+            sock = socket.create_connection(
+                (self.host, self.port), timeout=timeout or self.timeout
+            )
+        except OSError as e:
+            raise AdbServerUnavailable(
+                f"Cannot reach adb server at {self.host}:{self.port}: {e}"
+            )
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @staticmethod
+    def _send_request(sock: socket.socket, request: str):
+        """Send a length-prefixed request and wait for OKAY"""
+        payload = request.encode()
+        sock.sendall(b"%04x" % len(payload) + payload)
+        AdbClient._read_status(sock)
+
+    @staticmethod
+    def _read_status(sock: socket.socket):
+        """Consume an OKAY status or raise AdbError with the FAIL message"""
+        status = _recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            raise AdbError(
+                AdbClient._read_length_prefixed(sock).decode(errors="replace")
+            )
+        raise AdbError(f"Unexpected adb status: {status!r}")
+
+    @staticmethod
+    def _read_length_prefixed(sock: socket.socket) -> bytes:
+        """Read a 4-hex-digit length followed by that many bytes"""
+        length = int(_recv_exact(sock, 4), 16)
+        return _recv_exact(sock, length) if length else b""
+
+    def _host_query(self, request: str, timeout: float | None = None) -> bytes:
+        """Run a host service that answers with one length-prefixed payload"""
+        with self._connect(timeout) as sock:
+            self._send_request(sock, request)
+            return self._read_length_prefixed(sock)
+
+    def _pool(self, serial: str) -> _DevicePool:
+        with self._pools_lock:
+            pool = self._pools.get(serial)
+            if pool is None:
+                pool = _DevicePool(self.pool_size)
+                self._pools[serial] = pool
+            return pool
+
+    def open_service(
+        self, serial: str, service: str, timeout: float | None = None
+    ) -> socket.socket:
+        """Switch a new connection to the device transport and open a service"""
+        sock = self._connect(timeout)
+        try:
+            self._send_request(sock, f"host:transport:{serial}")
+            self._send_request(sock, service)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    # ------------------------------------------------------------------
+    # Host services
+    # ------------------------------------------------------------------
+    def devices(self) -> dict[str, str]:
+        """Return {serial: state} as reported by host:devices"""
+        payload = self._host_query("host:devices").decode(errors="replace")
+        states = {}
+        for line in payload.splitlines():
+            if "\t" in line:
+                serial, state = line.split("\t", 1)
+                states[serial.strip()] = state.strip()
+        return states
+
+    def track_devices(self) -> socket.socket:
+        """
+        Open host:track-devices; the socket then delivers a length-prefixed
+        device list now and on every change, until it is closed.
+        """
+        sock = self._connect()
+        try:
+            self._send_request(sock, "host:track-devices")
+        except BaseException:
+            sock.close()
+            raise
+        sock.settimeout(None)  # Lists only arrive on changes
+        return sock
+
+    def connect(self, address: str, timeout: float | None = None) -> str:
+        """Ask the server to connect to a TCP device (adb connect)"""
+        payload = self._host_query(f"host:connect:{address}", timeout)
+        return payload.decode(errors="replace")
+
+    def forward(
+        self, serial: str, local: str, remote: str, timeout: float | None = None
+    ):
+        """Forward a host socket to a device socket (adb forward)"""
+        with self._connect(timeout) as sock:
+            # One OKAY for the transport, one once the listener is installed
+            self._send_request(sock, f"host-serial:{serial}:forward:{local};{remote}")
+            self._read_status(sock)
+
+    def remove_forward(self, serial: str, local: str, timeout: float | None = None):
+        """Remove a forward set up by forward() (adb forward --remove)"""
+        with self._connect(timeout) as sock:
+            # Acknowledged like forward: transport, then removal
+            self._send_request(sock, f"host-serial:{serial}:killforward:{local}")
+            self._read_status(sock)
+
+    def version(self) -> int:
+        """Return the adb server protocol version"""
+        return int(self._host_query("host:version"), 16)
+
+    # ------------------------------------------------------------------
+    # Device services
+    # ------------------------------------------------------------------
+    def exec_out(
+        self, serial: str, command: str, timeout: float | None = None
+    ) -> bytes:
+        """Run a command with a binary-safe stdout stream (adb exec-out)"""
+        with self._pool(serial).slots:
+            with self.open_service(serial, f"exec:{command}", timeout) as sock:
+                return _recv_all(sock)
+
+    def exec_out_into(
+        self, serial: str, command: str, buffer: bytearray, timeout: float | None = None
+    ) -> int:
+        """
+        Like exec_out, but stream stdout into a caller-owned, reused buffer.
+
+        Output that does not fit grows the buffer (grow_buffer()) and is read
+        on from the same stream. Returns the number of bytes written.
+        """
+        with self._pool(serial).slots:
+            with self.open_service(serial, f"exec:{command}", timeout) as sock:
+                return _recv_into(sock, buffer)
+
+    def shell(
+        self, serial: str, command: str, timeout: float | None = None
+    ) -> ShellResult:
+        """Run a shell command and return its exit code, stdout and stderr"""
+        with self._pool(serial).slots:
+            supports_v2 = self._shell_v2.get(serial)
+            if supports_v2 is not False:
+                try:
+                    result = self._shell_v2_command(serial, command, timeout)
+                except AdbError as e:
+                    if supports_v2 or not _shell_v2_unsupported(e):
+                        raise  # A real failure, not a missing protocol
+                    self._shell_v2[serial] = False
+                else:
+                    self._shell_v2[serial] = True
+                    return result
+            return self._shell_v1_command(serial, command, timeout)
+
+    def _shell_v2_command(self, serial, command, timeout) -> ShellResult:
+        """shell,v2 separates stdout/stderr and reports the exit code"""
+        stdout, stderr, exit_code = [], [], None
+        with self.open_service(serial, f"shell,v2,raw:{command}", timeout) as sock:
+            while True:
+                try:
+                    header = _recv_exact(sock, 5)
+                except AdbError:
+                    break
+                packet_id, length = struct.unpack("<BI", header)
+                data = _recv_exact(sock, length) if length else b""
+                if packet_id == _SHELL_STDOUT:
+                    stdout.append(data)
+                elif packet_id == _SHELL_STDERR:
+                    stderr.append(data)
+                elif packet_id == _SHELL_EXIT:
+                    exit_code = data[0] if data else 0
+                    break
+        if exit_code is None:
+            raise AdbError("shell_v2 stream closed without exit status")
+        return ShellResult(
+            exit_code,
+            b"".join(stdout).decode(errors="replace"),
+            b"".join(stderr).decode(errors="replace"),
+        )
+
+    def _shell_v1_command(self, serial, command, timeout) -> ShellResult:
+        """Legacy shell: appends an exit-code marker to recover $?"""
+        service = f'shell:{command}; echo "{_EXIT_MARKER.decode()}$?"'
+        with self.open_service(serial, service, timeout) as sock:
+            output = _recv_all(sock)
+        exit_code = 0
+        marker_at = output.rfind(_EXIT_MARKER)
+        if marker_at != -1:
+            code_start = marker_at + len(_EXIT_MARKER)
+            code_text = output[code_start:].strip()
+            exit_code = int(code_text) if code_text.isdigit() else 0
+            output = output[:marker_at]
+        return ShellResult(exit_code, output.decode(errors="replace"), "")
+
+    # ------------------------------------------------------------------
+    # Sync service (pooled, since a sync session serves many requests)
+    # ------------------------------------------------------------------
+    def _acquire_sync(self, serial: str, timeout: float | None) -> socket.socket:
+        pool = self._pool(serial)
+        with pool.lock:
+            if pool.idle_sync:
+                sock = pool.idle_sync.pop()
+                sock.settimeout(timeout or self.timeout)
+                return sock
+        return self.open_service(serial, "sync:", timeout)
+
+    def _release_sync(self, serial: str, sock: socket.socket):
+        pool = self._pool(serial)
+        with pool.lock:
+            if len(pool.idle_sync) < self.pool_size:
+                pool.idle_sync.append(sock)
+                return
+        sock.close()
+
+    def pull(
+        self, serial: str, remote_path: str, timeout: float | None = None
+    ) -> bytes:
+        """Read a device file into memory over the sync protocol"""
+        with self._pool(serial).slots:
+            sock = self._acquire_sync(serial, timeout)
+            try:
+                path = remote_path.encode()
+                sock.sendall(b"RECV" + struct.pack("<I", len(path)) + path)
+                chunks = []
+                while True:
+                    tag, length = struct.unpack("<4sI", _recv_exact(sock, 8))
+                    if tag == b"DATA":
+                        chunks.append(_recv_exact(sock, length))
+                    elif tag == b"DONE":
+                        break
+                    elif tag == b"FAIL":
+                        message = _recv_exact(sock, length).decode(errors="replace")
+                        raise AdbError(f"pull {remote_path} failed: {message}")
+                    else:
+                        raise AdbError(f"Unexpected sync response: {tag!r}")
+            except BaseException:
+                sock.close()
+                raise
+            self._release_sync(serial, sock)
+            return b"".join(chunks)
+
+    def close(self):
+        """Close every pooled connection"""
+        with self._pools_lock:
+            pools = list(self._pools.values())
+        for pool in pools:
+            with pool.lock:
+                while pool.idle_sync:
+                    sock = pool.idle_sync.pop()
+                    try:
+                        sock.sendall(b"QUIT" + struct.pack("<I", 0))
+                    except OSError:
+                        pass
+                    sock.close()
+
+    def wait_for_server(self, timeout: float = 5.0) -> bool:
+        """Return True once the adb server accepts connections"""
+        deadline = time.time() + timeout
+        while True:
+            try:
+                self.version()
+                return True
+            except (AdbError, ValueError):
+                if time.time() >= deadline:
+                    return False
+                time.sleep(0.2)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_adb_client() -> AdbClient:
+    """Return the process-wide adb client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AdbClient()
+        return _client
@@ -0,0 +1,147 @@
+"""
+ADB subprocess execution layer
+
+Every adb child process goes through run_adb(), which gives it a deadline
+for its kind of command (ADB_TIMEOUTS) and, when the deadline passes, kills
+the whole process tree - `adb` may leave a forked server or shell behind
+that would otherwise keep the pipe open and hang the caller.
+
+Timeouts are counted per device (socket and persistent-shell timeouts are
+reported here too) and announced to listeners, so a bot can log them and
+recycle a wedged instance.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+from collections import Counter, defaultdict
+from config import ADB_TIMEOUTS
+
+_INPUT_COMMANDS = ("input ", "printf ", "sendevent ")
+_APP_COMMANDS = ("am ", "monkey ", "pm ")
+
+
+def command_kind(command: str) -> str:
+    """Deadline class of a device shell command ("input", "app", "capture", "shell")"""
+    command = command.lstrip()
+    if command.startswith(_INPUT_COMMANDS):
+        return "input"
+    if command.startswith(_APP_COMMANDS):
+        return "app"
+    if command.startswith("screencap"):
+        return "capture"
+    return "shell"
+
+
+def deadline_for(kind: str) -> float:
+    """Seconds an operation of `kind` may take"""
+    return ADB_TIMEOUTS.get(kind, ADB_TIMEOUTS["default"])
+
+
+def _kill_tree(process: subprocess.Popen):
+    """Kill a process and everything it started"""
+    try:
+        if os.name == "nt":
+            subprocess.run(
+                ["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                capture_output=True,
+                timeout=5,
+            )
+        else:
+            # The child leads its own session, so its group is the whole tree
+            os.killpg(process.pid, signal.SIGKILL)
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+
+def run_adb(
+    args,
+    kind: str = "default",
+    device_id: str | None = None,
+    timeout: float | None = None,
+    shell: bool = False,
+    text: bool = False,
+) -> subprocess.CompletedProcess:
+    """
+    Run an adb command with a hard deadline.
+
+    Args:
+        args: Argument list, or a command string with shell=True
+        kind: Key into ADB_TIMEOUTS for the default deadline
+        device_id: Device the timeout is counted against (None: fleet-wide)
+        timeout: Deadline in seconds, overriding the kind's
+
+    Returns:
+        CompletedProcess: With captured stdout/stderr
+
+    Raises:
+        subprocess.TimeoutExpired: After the process tree has been killed
+    """
+    timeout = timeout if timeout is not None else deadline_for(kind)
+    if os.name == "nt":
+        options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        options = {"start_new_session": True}
+    process = subprocess.Popen(
+        args,
+        shell=shell,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=text,
+        **options,
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_tree(process)
+        try:
+            process.communicate(timeout=2)
+        except subprocess.TimeoutExpired:
+            pass  # Pipes held open by an unkillable grandchild; give up on them
+        record_timeout(device_id, kind)
+        raise
+    except BaseException:
+        _kill_tree(process)
+        raise
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+_timeouts = defaultdict(Counter)
+_listeners = []
+_lock = threading.Lock()
+
+
+def record_timeout(device_id: str | None, kind: str):
+    """Count a timed-out adb operation and notify listeners"""
+    with _lock:
+        _timeouts[device_id][kind] += 1
+        listeners = list(_listeners)
+    for listener in listeners:
+        try:
+            listener(device_id, kind)
+        except Exception as e:
+            print(f"ADB timeout listener failed: {e}")
+
+
+def timeout_counts(device_id: str | None) -> dict[str, int]:
+    """Timeouts so far for a device, by kind"""
+    with _lock:
+        return dict(_timeouts.get(device_id, {}))
+
+
+def add_timeout_listener(callback):
+    """Call `callback(device_id, kind)` on every recorded timeout"""
+    with _lock:
+        _listeners.append(callback)
+
+
+def remove_timeout_listener(callback):
+    with _lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
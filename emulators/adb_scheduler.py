@@ -0,0 +1,206 @@
+"""
+Fleet-wide ADB scheduler
+
+Every bot thread talks to the same adb server. Unbounded, a burst of
+captures and navigation taps from ten instances queues up inside the
+server and delays the card plays that matter. All transport operations
+therefore take a slot from one process-wide scheduler that caps how many
+run at once and hands free slots out by priority:
+
+    CARD_PLAY   in-battle card plays
+    CAPTURE     in-battle captures
+    NAVIGATION  menu navigation taps and captures (the default)
+    DISCOVERY   device discovery, probing and health checks
+
+Operations of the same priority run in arrival order. The priority of an
+operation comes from the calling thread (see adb_priority()), so code
+below the controllers does not need to know what it is working for.
+
+Capture processes (CAPTURE_PROCESSES) talk to the same adb server. The main
+process hands them its shared slot semaphore (shared_slots()), and they
+install it with use_shared_adb_slots(), so ADB_MAX_CONCURRENT caps the
+whole fleet. Priorities still order the waiters within each process.
+"""
+
+import heapq
+import itertools
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+from config import ADB_MAX_CONCURRENT
+
+CARD_PLAY = 0
+CAPTURE = 1
+NAVIGATION = 2
+DISCOVERY = 3
+
+PRIORITY_NAMES = {
+    CARD_PLAY: "card_play",
+    CAPTURE: "capture",
+    NAVIGATION: "navigation",
+    DISCOVERY: "discovery",
+}
+
+_context = threading.local()
+
+
+def current_priority() -> int:
+    """Priority of adb operations started by this thread"""
+    return getattr(_context, "priority", NAVIGATION)
+
+
+@contextmanager
+def adb_priority(priority: int):
+    """Run the enclosed adb operations of this thread at `priority`"""
+    previous = current_priority()
+    _context.priority = priority
+    try:
+        yield
+    finally:
+        _context.priority = previous
+
+
+class AdbScheduler:
+    """Caps concurrent adb operations and grants slots by priority"""
+
+    def __init__(self, max_concurrent: int = ADB_MAX_CONCURRENT, shared=None):
+        self.max_concurrent = max_concurrent
+        # Semaphore bounding slots across processes (see shared_slots())
+        self._shared = shared
+        self._condition = threading.Condition()
+        self._waiting = []  # Heap of (priority, arrival)
+        self._counter = itertools.count()
+        self._active = 0
+        self._stats = {
+            priority: {"operations": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+    @contextmanager
+    def slot(self, priority: int | None = None):
+        """
+        Hold one adb slot for the enclosed operation.
+
+        Nested slots on the same thread reuse the outer one, so an operation
+        implemented on top of another never waits for itself.
+        """
+        if getattr(_context, "holding", False) or self.max_concurrent <= 0:
+            yield
+            return
+        if priority is None:
+            priority = current_priority()
+
+        started = time.monotonic()
+        ticket = (priority, next(self._counter))
+
+        def granted():
+            return self._waiting[0] == ticket and self._active < self.max_concurrent
+
+        with self._condition:
+            heapq.heappush(self._waiting, ticket)
+            self._condition.wait_for(granted)
+            heapq.heappop(self._waiting)
+            self._active += 1
+            # The next waiter may fit into another free slot
+            self._condition.notify_all()
+
+        shared = self._shared
+        try:
+            if shared is not None:
+                shared.acquire()
+            # The wait spans both the local grant and the fleet-wide semaphore,
+            # so contention with capture processes shows up in the stats
+            waited = time.monotonic() - started
+            with self._condition:
+                self._record(priority, waited)
+            _context.holding = True
+            try:
+                yield
+            finally:
+                _context.holding = False
+                if shared is not None:
+                    shared.release()
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify_all()
+
+    def shared_slots(self):
+        """
+        Semaphore that extends this scheduler's cap to child processes.
+
+        Created on first use; pass it to the children, which install it
+        with use_shared_adb_slots().
+        """
+        with self._condition:
+            if self._shared is None and self.max_concurrent > 0:
+                self._shared = multiprocessing.BoundedSemaphore(self.max_concurrent)
+            return self._shared
+
+    def _record(self, priority: int, waited: float):
+        stats = self._stats.setdefault(
+            priority, {"operations": 0, "total_wait": 0.0, "max_wait": 0.0}
+        )
+        stats["operations"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+    @property
+    def queue_depth(self) -> int:
+        """Operations waiting for a slot"""
+        with self._condition:
+            return len(self._waiting)
+
+    @property
+    def active(self) -> int:
+        """Operations holding a slot"""
+        with self._condition:
+            return self._active
+
+    def stats(self) -> dict:
+        """Per priority name: operations, avg_wait_ms and max_wait_ms"""
+        with self._condition:
+            summary = {}
+            for priority, stats in sorted(self._stats.items()):
+                average = stats["total_wait"] / max(stats["operations"], 1)
+                summary[PRIORITY_NAMES.get(priority, str(priority))] = {
+                    "operations": stats["operations"],
+                    "avg_wait_ms": average * 1000,
+                    "max_wait_ms": stats["max_wait"] * 1000,
+                }
+            return summary
+
+    def report(self) -> str:
+        """One-line summary of queue depth and wait times"""
+        parts = [
+            f"{name} {stats['operations']} ops, "
+            f"{stats['avg_wait_ms']:.0f}ms avg/{stats['max_wait_ms']:.0f}ms max wait"
+            for name, stats in self.stats().items()
+            if stats["operations"]
+        ]
+        return (
+            f"ADB scheduler ({self.max_concurrent} slots, "
+            f"{self.queue_depth} queued): " + ("; ".join(parts) or "idle")
+        )
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_adb_scheduler() -> AdbScheduler:
+    """Process-wide scheduler shared by all transports"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AdbScheduler()
+        return _scheduler
+
+
+def use_shared_adb_slots(shared):
+    """Make this process's scheduler draw from a parent's shared_slots()"""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = AdbScheduler(shared=shared)
+        return _scheduler
@@ -2,8 +2,34 @@
 Base emulator controller interface
 """
 
+import itertools
+import threading
+import time
+from concurrent.futures import Future
 import numpy as np
 from abc import ABC, abstractmethod
+from config import BURST_TAP_INTERVAL, CAPTURE_BACKEND_CACHE, CAPTURE_PROBE_SAMPLES
+from .adb_scheduler import CAPTURE, NAVIGATION, adb_priority
+from .buffer_pool import BufferPool
+from .capture_backends import (
+    CAPTURE_BACKENDS,
+    CaptureBackend,
+    load_backend_choice,
+    save_backend_choice,
+)
+from .capture_profiles import apply_profile, get_capture_profile
+from .frame import Frame
+from .input_worker import (
+    InputWorker,
+    PRIORITY_CRITICAL,
+    PRIORITY_HOUSEKEEPING,
+    PRIORITY_NORMAL,
+)
+
+
+def normalize_taps(taps) -> list[tuple[int, int, float]]:
+    """Expand (x, y) entries of a tap sequence to (x, y, delay)"""
+    return [(tap[0], tap[1], tap[2] if len(tap) > 2 else 0.0) for tap in taps]
 
 
 class BaseEmulatorController(ABC):
@@ -16,6 +42,131 @@ class BaseEmulatorController(ABC):
         self.device_id = device_id
         self.instance_name = instance_name
         self.running = True
+        self._frame_counter = itertools.count(1)
+        # Per-device image buffers reused across captures
+        self.buffer_pool = BufferPool()
+        # Registered capture backend used by capture_frame(), if any
+        self.capture_backend = None
+        # Set by the bot; in-battle captures get a higher adb priority
+        self.in_battle = False
+        # Orders and runs input commands off the caller's thread
+        self.input_worker = InputWorker(name=f"{instance_name}-input")
+        # Burst taps are numbered so stop_burst() only stops the latest one
+        self._burst_lock = threading.Lock()
+        self._burst_id = 0
+        self._stopped_burst = 0
+        self._burst_future = None
+
+    @property
+    def capture_backend_name(self) -> str:
+        """Name of the capture path recorded on each Frame"""
+        if self.capture_backend is not None:
+            return self.capture_backend.name
+        return "screenshot"
+
+    def use_capture_backend(self, name: str) -> CaptureBackend:
+        """
+        Switch to a registered capture backend.
+
+        Raises:
+            ValueError: If no backend is registered under `name`
+        """
+        try:
+            backend_class = CAPTURE_BACKENDS[name]
+        except KeyError:
+            raise ValueError(f"Unknown capture backend: {name}")
+        if self.capture_backend is not None:
+            self.capture_backend.close()
+        self.capture_backend = backend_class(self)
+        return self.capture_backend
+
+    def probe_capture_backends(
+        self, samples: int = CAPTURE_PROBE_SAMPLES
+    ) -> dict[str, float | None]:
+        """
+        Time every auto-selectable backend on this device.
+
+        Returns:
+            dict: Backend name -> average seconds per frame (None if it failed)
+        """
+        timings = {}
+        for name, backend_class in CAPTURE_BACKENDS.items():
+            if not backend_class.auto_select:
+                continue
+            backend = backend_class(self)
+            try:
+                timings[name] = self._time_backend(backend, samples)
+            except Exception as e:
+                print(f"[{self.instance_name}] Capture backend {name} failed: {e}")
+                timings[name] = None
+            finally:
+                backend.close()
+        return timings
+
+    @staticmethod
+    def _time_backend(backend: CaptureBackend, samples: int) -> float | None:
+        # The first frame pays for connections and stream start-up
+        frame = backend.read_frame()
+        if frame is None:
+            return None
+        frame.release()
+        started = time.perf_counter()
+        for _ in range(samples):
+            frame = backend.read_frame()
+            if frame is None:
+                return None
+            frame.release()
+        return (time.perf_counter() - started) / samples
+
+    def _undeploy_capture_backend(self, name: str):
+        try:
+            CAPTURE_BACKENDS[name](self).undeploy()
+        except Exception as e:
+            print(
+                f"[{self.instance_name}] Could not undeploy capture backend {name}: {e}"
+            )
+
+    def auto_select_capture_backend(
+        self, cache_path: str = CAPTURE_BACKEND_CACHE
+    ) -> str | None:
+        """
+        Use the cached backend for this device, or probe and cache the fastest.
+
+        Returns:
+            str: Selected backend name, or None if no backend works right now
+        """
+        name = load_backend_choice(self.device_id, cache_path)
+        if name is not None:
+            frame = self.use_capture_backend(name).read_frame()
+            if frame is not None:
+                frame.release()
+                print(f"[{self.instance_name}] Using cached capture backend: {name}")
+                return name
+            print(f"[{self.instance_name}] Cached capture backend {name} failed")
+
+        timings = self.probe_capture_backends()
+        summary = ", ".join(
+            (
+                f"{backend}={seconds * 1000:.0f}ms"
+                if seconds is not None
+                else f"{backend}=failed"
+            )
+            for backend, seconds in timings.items()
+        )
+        print(f"[{self.instance_name}] Capture backend probe: {summary}")
+
+        working = {backend: t for backend, t in timings.items() if t is not None}
+        name = min(working, key=working.get) if working else None
+        # Don't leave helpers of the backends that lost running on the device
+        for backend in timings:
+            if backend != name:
+                self._undeploy_capture_backend(backend)
+        if name is None:
+            return None
+        save_backend_choice(self.device_id, name, timings, cache_path)
+        self.use_capture_backend(name)
+        print(f"[{self.instance_name}] Selected capture backend: {name}")
+        return name
 
     @abstractmethod
     def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.1) -> bool:
@@ -33,6 +184,85 @@ class BaseEmulatorController(ABC):
         """
         pass
 
+    def tap_sequence(self, taps) -> bool:
+        """
+        Tap several points in order as one input operation.
+
+        Controllers that can should send the whole sequence in one command;
+        this default taps one by one and sleeps on the host.
+
+        Args:
+            taps: Sequence of (x, y) or (x, y, delay) tuples, where delay is
+                  seconds to wait after that tap
+
+        Returns:
+            bool: True if every tap was sent, False otherwise
+        """
+        for x, y, delay in normalize_taps(taps):
+            if not self.click(x, y):
+                return False
+            if delay > 0:
+                time.sleep(delay)
+        return True
+
+    def burst_tap(
+        self, x: int, y: int, n: int, interval: float = BURST_TAP_INTERVAL
+    ) -> bool:
+        """
+        Tap one point `n` times, `interval` seconds apart, as one input operation.
+
+        A burst can be cut short with stop_burst(). Controllers that can
+        should run the whole burst on the device in one command; this
+        default taps one by one from the host.
+
+        Returns:
+            bool: True if every tap that ran was sent, False otherwise
+        """
+        with self._burst_lock:
+            self._burst_id += 1
+            burst_id = self._burst_id
+        return self._run_burst(x, y, n, interval, burst_id)
+
+    def burst_tap_async(
+        self, x: int, y: int, n: int, interval: float = BURST_TAP_INTERVAL
+    ) -> Future:
+        """Queue a burst tap on the input worker (see tap_async and burst_tap)"""
+        with self._burst_lock:
+            self._burst_id += 1
+            self._burst_future = self.input_worker.submit(
+                self._run_burst, x, y, n, interval, self._burst_id
+            )
+            return self._burst_future
+
+    def stop_burst(self):
+        """Stop the latest burst tap, whether it is still queued or running"""
+        with self._burst_lock:
+            self._stopped_burst = burst_id = self._burst_id
+            future = self._burst_future
+        if future is not None and (future.done() or future.cancel()):
+            return
+        self._signal_burst_stop(burst_id)
+
+    def _burst_stopped(self, burst_id: int) -> bool:
+        with self._burst_lock:
+            return self._stopped_burst >= burst_id
+
+    def _run_burst(
+        self, x: int, y: int, n: int, interval: float, burst_id: int
+    ) -> bool:
+        """Host-side burst; checks for stop_burst() before every tap"""
+        for _ in range(n):
+            if self._burst_stopped(burst_id):
+                break
+            if not self.click(x, y):
+                return False
+            time.sleep(interval)
+        return True
+
+    def _signal_burst_stop(self, burst_id: int):
+        """Tell a running burst to stop (the host-side burst polls instead)"""
+        pass
+
     @abstractmethod
     def swipe(self, x1: int, y1: int, x2: int, y2: int, duration: int = 1000) -> bool:
         """
@@ -48,6 +278,53 @@ class BaseEmulatorController(ABC):
         """
         pass
 
+    def tap_async(
+        self,
+        x: int,
+        y: int,
+        clicks: int = 1,
+        interval: float = 0.1,
+        priority: int = PRIORITY_NORMAL,
+    ) -> Future:
+        """
+        Queue a tap on the input worker and return without waiting.
+
+        Input runs in submission order per device and priority, so a later
+        tap or swipe never overtakes this one unless it is more urgent. At
+        PRIORITY_HOUSEKEEPING, a duplicate of a tap still waiting shares its
+        Future instead of being queued again.
+
+        Returns:
+            Future: Resolves to click()'s result
+        """
+        return self.input_worker.submit(
+            self.click,
+            x,
+            y,
+            clicks,
+            interval,
+            priority=priority,
+            key=("tap", x, y, clicks) if priority == PRIORITY_HOUSEKEEPING else None,
+        )
+
+    def swipe_async(
+        self,
+        x1: int,
+        y1: int,
+        x2: int,
+        y2: int,
+        duration: int = 1000,
+        priority: int = PRIORITY_NORMAL,
+    ) -> Future:
+        """Queue a swipe on the input worker (see tap_async)"""
+        return self.input_worker.submit(
+            self.swipe, x1, y1, x2, y2, duration, priority=priority
+        )
+
+    def tap_sequence_async(self, taps, priority: int = PRIORITY_CRITICAL) -> Future:
+        """Queue a tap sequence (a card play by default) on the input worker"""
+        return self.input_worker.submit(self.tap_sequence, taps, priority=priority)
+
     @abstractmethod
     def screenshot(self) -> np.ndarray | None:
         """
@@ -58,6 +335,37 @@ class BaseEmulatorController(ABC):
         """
         pass
 
+    def capture_frame(self, profile=None) -> Frame | None:
+        """
+        Take a screenshot and wrap it with capture metadata.
+
+        Args:
+            profile: Capture profile name or CaptureProfile (default: full frame)
+
+        Returns:
+            Frame: Screenshot with sequence number and timestamps, or None if failed
+        """
+        with adb_priority(CAPTURE if self.in_battle else NAVIGATION):
+            if self.capture_backend is not None:
+                frame = self.capture_backend.read_frame(profile)
+                if frame is not None:
+                    frame.seq = next(self._frame_counter)
+                return frame
+
+            capture_start = time.monotonic()
+            image = self.screenshot()
+        if image is None:
+            return None
+        frame = Frame(
+            image,
+            seq=next(self._frame_counter),
+            capture_start=capture_start,
+            capture_end=time.monotonic(),
+            backend=self.capture_backend_name,
+            pool=self.buffer_pool,
+        )
+        return apply_profile(frame, get_capture_profile(profile), self.buffer_pool)
+
     @abstractmethod
     def start_app(self, package_name: str) -> bool:
         """
@@ -84,6 +392,13 @@ class BaseEmulatorController(ABC):
         """
         pass
 
+    def reconnect(self) -> bool:
+        """Re-establish the connection to the device (nothing to do by default)"""
+        return True
+
     def stop(self):
         """Stop the emulator controller"""
         self.running = False
+        self.input_worker.stop()
+        if self.capture_backend is not None:
+            self.capture_backend.close()
@@ -0,0 +1,72 @@
+"""
+Reusable image buffers
+
+Captures decode into buffers taken from a per-device pool instead of
+allocating a fresh image every frame. Frames hand their buffer back with
+Frame.release() once the caller is done with them.
+"""
+
+import threading
+import numpy as np
+from config import FRAME_POOL_SIZE
+
+
+class BufferPool:
+    """Free lists of numpy arrays keyed by shape and dtype"""
+
+    def __init__(self, max_per_shape: int = FRAME_POOL_SIZE):
+        self.max_per_shape = max_per_shape
+        self._free = {}
+        self._lock = threading.Lock()
+        self.allocations = 0
+        self.reuses = 0
+        self.dropped = 0
+
+    @staticmethod
+    def _key(shape, dtype) -> tuple:
+        return tuple(shape), np.dtype(dtype).str
+
+    def acquire(self, shape, dtype=np.uint8) -> np.ndarray:
+        """
+        Take a buffer of the given shape, allocating only if none is free.
+
+        The contents are whatever the previous user left behind.
+        """
+        with self._lock:
+            free = self._free.get(self._key(shape, dtype))
+            if free:
+                self.reuses += 1
+                return free.pop()
+            self.allocations += 1
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, array: np.ndarray | None):
+        """Return a buffer to the pool (views and surplus buffers are dropped)"""
+        if array is None:
+            return
+        # Views would recycle memory still owned by another array
+        if not array.flags.owndata or not array.flags.c_contiguous:
+            self.dropped += 1
+            return
+        with self._lock:
+            free = self._free.setdefault(self._key(array.shape, array.dtype), [])
+            if len(free) >= self.max_per_shape or any(a is array for a in free):
+                self.dropped += 1
+                return
+            free.append(array)
+
+    def stats(self) -> dict:
+        """Allocation counters and the number of idle buffers"""
+        with self._lock:
+            idle = sum(len(free) for free in self._free.values())
+        return {
+            "allocations": self.allocations,
+            "reuses": self.reuses,
+            "dropped": self.dropped,
+            "idle": idle,
+        }
+
+    def clear(self):
+        """Drop all idle buffers"""
+        with self._lock:
+            self._free.clear()
@@ -0,0 +1,497 @@
+"""
+Screen capture backends
+
+Each backend is one way of getting pixels off a device. Controllers look
+backends up by name in CAPTURE_BACKENDS, and `CAPTURE_MODE = "auto"` probes
+them once per device and caches the fastest working one on disk.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+import cv2
+import numpy as np
+from config import (
+    CAPTURE_BACKEND_CACHE,
+    CAPTURE_TIMEOUT,
+    REPLAY_CAPTURE_DIR,
+    TRANSFER_GZIP_LEVEL,
+    VIDEO_FRAME_WAIT,
+    VIDEO_STREAM_COMMAND,
+)
+from .capture_profiles import apply_profile, get_capture_profile
+from .capture_server import CaptureServer
+from .frame import Frame
+from .frame_grabber import FrameGrabber
+from .framebuffer import decode_raw_rows, decode_raw_screencap, parse_raw_header
+from .transfer import GzipInflater, TransferSelector
+from .transport import SocketTransport, SubprocessTransport, scheduled
+from .video_stream import VideoStream
+
+CAPTURE_BACKENDS = {}
+
+# Several controllers may probe at startup and share one cache file
+_cache_lock = threading.Lock()
+
+if os.name == "nt":
+    import msvcrt
+
+    def _lock_file(f):
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock_file(f):
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def register_capture_backend(cls):
+    """Class decorator adding a backend to the registry under `cls.name`"""
+    CAPTURE_BACKENDS[cls.name] = cls
+    return cls
+
+
+class CaptureBackend(ABC):
+    """
+    One capture path for one controller.
+
+    Backends use the controller's `device_id`, `instance_name`, `transport`,
+    `buffer_pool` and `screenshots_dir`.
+    """
+
+    name = "base"
+    # Whether the startup probe should consider this backend
+    auto_select = True
+
+    def __init__(self, controller):
+        self.controller = controller
+
+    @property
+    def log_prefix(self) -> str:
+        return f"[{self.controller.instance_name}]"
+
+    @abstractmethod
+    def capture(self) -> np.ndarray | None:
+        """Capture one BGR image, or None on failure"""
+        pass
+
+    def capture_rows(self, start: int, stop: int) -> np.ndarray | None:
+        """
+        Capture only screen rows [start, stop) if the backend can cut them
+        before transfer; None means "capture the full screen instead".
+        """
+        return None
+
+    def read_frame(self, profile=None) -> Frame | None:
+        """Capture one image for a capture profile and wrap it with timing metadata"""
+        profile = get_capture_profile(profile)
+        capture_start = time.monotonic()
+        image = None
+        origin = (0, 0)
+        if profile.rows is not None:
+            image = self.capture_rows(*profile.rows)
+            if image is not None:
+                origin = (0, profile.rows[0])
+        if image is None:
+            image = self.capture()
+        if image is None:
+            return None
+        frame = Frame(
+            image,
+            capture_start=capture_start,
+            capture_end=time.monotonic(),
+            backend=self.name,
+            pool=self.controller.buffer_pool,
+            origin=origin,
+        )
+        return apply_profile(frame, profile, self.controller.buffer_pool)
+
+    def close(self):
+        """Release anything the backend keeps open"""
+        pass
+
+    def undeploy(self):
+        """Remove anything the backend installed on the device"""
+        pass
+
+
+@register_capture_backend
+class PngCaptureBackend(CaptureBackend):
+    """screencap to a PNG on the device, pull it and load it from disk"""
+
+    name = "png"
+
+    def capture(self) -> np.ndarray | None:
+        transport = self.controller.transport
+        screenshot_path = os.path.join(
+            self.controller.screenshots_dir, "screenshot.png"
+        )
+
+        # Remove old screenshot file if it exists to ensure fresh capture
+        if os.path.exists(screenshot_path):
+            os.remove(screenshot_path)
+
+        # Capture screenshot with specific device
+        result = transport.shell(
+            "screencap /sdcard/screenshot.png",
+            timeout=CAPTURE_TIMEOUT,  # Add timeout to prevent hanging
+        )
+        if result.exit_code != 0:
+            print(f"{self.log_prefix} Failed to capture screenshot: {result.stderr}")
+            return None
+
+        # Small delay to ensure screenshot is ready on device
+        time.sleep(0.05)
+
+        # Download screenshot with specific device
+        if not transport.pull("/sdcard/screenshot.png", screenshot_path):
+            print(f"{self.log_prefix} Failed to download screenshot")
+            return None
+
+        # Load image
+        if not os.path.exists(screenshot_path):
+            print(f"{self.log_prefix} Screenshot file not found after download")
+            return None
+
+        screenshot = cv2.imread(screenshot_path)
+        if screenshot is None:
+            print(f"{self.log_prefix} Failed to load screenshot image")
+            return None
+
+        return screenshot
+
+
+@register_capture_backend
+class RawCaptureBackend(CaptureBackend):
+    """
+    Raw framebuffer over `adb exec-out screencap` through the adb binary.
+
+    Each capture path (full frames, each band) picks raw or `gzip -1`
+    transfer with its own TransferSelector.
+    """
+
+    name = "raw"
+
+    def __init__(self, controller):
+        super().__init__(controller)
+        self.transport = self._create_transport()
+        # Dumps are streamed into reused buffers (keyed by command), grown as needed
+        self._buffers = {}
+        # (width, height, pixel_format, header_size) of the last full dump
+        self._header = None
+        self._selectors = {}
+        self._inflater = GzipInflater()
+
+    def _create_transport(self):
+        return scheduled(SubprocessTransport(self.controller.device_id))
+
+    def _selector(self, key) -> TransferSelector:
+        selector = self._selectors.get(key)
+        if selector is None:
+            selector = self._selectors[key] = TransferSelector()
+        return selector
+
+    def _transfer(self, key, command: str):
+        """
+        Run a dump command in the mode the selector picks and time it.
+
+        Returns:
+            The uncompressed output (a view of a reused buffer), or None
+        """
+        selector = self._selector(key)
+        mode = selector.choose()
+        started = time.monotonic()
+        cpu_started = time.thread_time()
+        data = None
+        if mode == "gzip":
+            compressed = self._read_dump(f"{command} | gzip -{TRANSFER_GZIP_LEVEL}")
+            if compressed:
+                try:
+                    data = self._inflater.inflate(compressed)
+                except zlib.error as e:
+                    print(f"{self.log_prefix} Bad gzip frame: {e}")
+        else:
+            data = self._read_dump(command)
+
+        if not data:
+            selector.failed(mode)
+            if mode == selector.modes[0]:
+                return None
+            return self._read_dump(command)  # This frame still goes out raw
+        selector.record(
+            mode, time.monotonic() - started, time.thread_time() - cpu_started
+        )
+        return data
+
+    @property
+    def transfer_modes(self) -> dict:
+        """Current transfer mode per capture path ("full" or the band rows)"""
+        return {
+            "full" if key is None else key: selector.current
+            for key, selector in self._selectors.items()
+        }
+
+    def capture(self) -> np.ndarray | None:
+        data = self._transfer(None, "screencap")
+        if not data:
+            print(f"{self.log_prefix} Failed to capture raw screenshot")
+            return None
+
+        try:
+            self._header = parse_raw_header(data)
+            width, height, _, _ = self._header
+            image = self.controller.buffer_pool.acquire((height, width, 3))
+            return decode_raw_screencap(data, out=image)
+        except ValueError as e:
+            print(f"{self.log_prefix} Failed to decode raw screenshot: {e}")
+            return None
+
+    def capture_rows(self, start: int, stop: int) -> np.ndarray | None:
+        """Cut the rows out of the dump on the device, so only they are transferred"""
+        if self._header is None:
+            return None  # Layout unknown until one full capture has been decoded
+        width, height, pixel_format, header_size = self._header
+        stop = min(stop, height)
+        if not 0 <= start < stop:
+            return None
+        row_bytes = width * 4
+        length = (stop - start) * row_bytes
+        offset = header_size + start * row_bytes
+
+        data = self._transfer(
+            (start, stop), f"screencap | tail -c +{offset + 1} | head -c {length}"
+        )
+        if data is None or len(data) != length:
+            # Resolution changed or the pipe failed - relearn from a full capture
+            self._header = None
+            return None
+        image = self.controller.buffer_pool.acquire((stop - start, width, 3))
+        return decode_raw_rows(data, width, pixel_format, out=image)
+
+    def _read_dump(self, command: str) -> memoryview | None:
+        """
+        Read a command's output, reusing one buffer per command across captures.
+
+        Output larger than the buffer (gzip sizes vary from frame to frame)
+        grows it with headroom while the same stream is read on, so a capture
+        never has to be repeated.
+        """
+        buffer = self._buffers.get(command)
+        if buffer is None:
+            buffer = self._buffers[command] = bytearray()
+        count = self.transport.exec_out_into(command, buffer, timeout=CAPTURE_TIMEOUT)
+        if count is None:
+            return None
+        return memoryview(buffer)[:count]
+
+    def close(self):
+        for selector in self._selectors.values():
+            selector.close()
+
+
+@register_capture_backend
+class SocketCaptureBackend(RawCaptureBackend):
+    """Raw framebuffer over the adb server socket protocol (no process spawn)"""
+
+    name = "socket"
+
+    def _create_transport(self):
+        return scheduled(SocketTransport(self.controller.device_id))
+
+
+@register_capture_backend
+class ServerCaptureBackend(CaptureBackend):
+    """Raw framebuffer from a helper server on the device over an adb-forwarded port"""
+
+    name = "server"
+
+    def __init__(self, controller):
+        super().__init__(controller)
+        self.server = CaptureServer(controller.transport, controller.instance_name)
+
+    def capture(self) -> np.ndarray | None:
+        data = self.server.read_dump()
+        if data is None:
+            return None
+
+        try:
+            width, height, _, _ = parse_raw_header(data)
+            image = self.controller.buffer_pool.acquire((height, width, 3))
+            return decode_raw_screencap(data, out=image)
+        except ValueError as e:
+            # Most likely the resolution changed; reconnecting relearns the size
+            print(f"{self.log_prefix} Bad dump from capture server: {e}")
+            self.server.close()
+            return None
+
+    def close(self):
+        self.server.close()
+
+    def undeploy(self):
+        self.server.undeploy()
+
+
+@register_capture_backend
+class VideoCaptureBackend(CaptureBackend):
+    """Newest frame of a continuously decoded screenrecord stream"""
+
+    name = "video"
+    # read_frame() hands back the newest decoded frame after a short wait, so
+    # a probe would time that wait rather than capture latency or freshness;
+    # use it by setting CAPTURE_MODE = "video"
+    auto_select = False
+
+    def __init__(self, controller):
+        super().__init__(controller)
+        self.video_stream = VideoStream(
+            lambda: controller.transport.open_stream(VIDEO_STREAM_COMMAND),
+            name=f"{controller.instance_name}-video",
+        )
+        self.grabber = None
+        self._seq = 0
+
+    def read_frame(self, profile=None) -> Frame | None:
+        profile = get_capture_profile(profile)
+        timeout = VIDEO_FRAME_WAIT
+        if self.grabber is None:
+            self.grabber = FrameGrabber(
+                self.video_stream.read,
+                name=f"{self.controller.instance_name}-video-decode",
+            )
+            self.grabber.start()
+            timeout = CAPTURE_TIMEOUT
+
+        seq, frame = self.grabber.wait_for_frame(self._seq, timeout)
+        if frame is None:
+            # A static screen produces no new frames - reuse the last one
+            seq, frame = self.grabber.latest()
+        self._seq = seq
+        if frame is None:
+            return None
+        # New Frame so releasing it never touches the grabber's copy
+        frame = Frame(
+            frame.image,
+            capture_start=frame.capture_start,
+            capture_end=frame.capture_end,
+            backend=self.name,
+        )
+        return apply_profile(frame, profile, self.controller.buffer_pool)
+
+    def capture(self) -> np.ndarray | None:
+        frame = self.read_frame()
+        return frame.image if frame is not None else None
+
+    def close(self):
+        if self.grabber is not None:
+            self.grabber.stop()
+        self.video_stream.close()
+
+
+@register_capture_backend
+class ReplayCaptureBackend(CaptureBackend):
+    """Cycles through saved screenshots in REPLAY_CAPTURE_DIR (offline testing)"""
+
+    name = "replay"
+    auto_select = False
+
+    def __init__(self, controller, directory: str | None = REPLAY_CAPTURE_DIR):
+        super().__init__(controller)
+        self.paths = sorted(glob.glob(os.path.join(directory or "", "*.png")))
+        self._index = 0
+
+    def capture(self) -> np.ndarray | None:
+        if not self.paths:
+            print(f"{self.log_prefix} No screenshots to replay")
+            return None
+        path = self.paths[self._index % len(self.paths)]
+        self._index += 1
+        return cv2.imread(path)
+
+
+@contextmanager
+def _locked_cache(path: str):
+    """
+    Hold the cache for this thread and process.
+
+    Capture processes share the file, so a sidecar lock file serializes
+    their read-modify-write cycles as well.
+    """
+    with _cache_lock:
+        try:
+            lock = open(f"{path}.lock", "a")
+        except OSError:
+            lock = None  # Unwritable directory; writes will fail and say so
+        try:
+            if lock is not None:
+                try:
+                    _lock_file(lock)
+                except OSError:
+                    pass  # Still serialized within this process
+            yield
+        finally:
+            if lock is not None:
+                try:
+                    _unlock_file(lock)
+                except OSError:
+                    pass
+                lock.close()
+
+
+def load_backend_choice(device_id: str, path: str = CAPTURE_BACKEND_CACHE):
+    """Return the cached backend name for a device, or None"""
+    try:
+        with _locked_cache(path), open(path) as f:
+            entry = json.load(f).get(device_id)
+    except (OSError, ValueError, AttributeError):
+        return None
+    if not isinstance(entry, dict):
+        return None
+    name = entry.get("backend")
+    return name if name in CAPTURE_BACKENDS else None
+
+
+def save_backend_choice(
+    device_id: str, name: str, timings: dict, path: str = CAPTURE_BACKEND_CACHE
+):
+    """Record the selected backend and the probe timings for a device"""
+    with _locked_cache(path):
+        _update_cache(device_id, name, timings, path)
+
+
+def _update_cache(device_id: str, name: str, timings: dict, path: str):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if not isinstance(cache, dict):
+        cache = {}
+    cache[device_id] = {
+        "backend": name,
+        "timings_ms": {
+            backend: round(seconds * 1000, 1) if seconds is not None else None
+            for backend, seconds in timings.items()
+        },
+        "selected_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    # Replace the file in one step so readers never see it half written
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Could not write capture backend cache {path}: {e}")
@@ -0,0 +1,123 @@
+"""
+Reduced-cost capture profiles
+
+Navigation and battle checks rarely need a full-colour, full-size frame. A
+profile asks for a row band, a single channel and/or a smaller scale; the
+resulting Frame records its origin and scale so detection can map
+coordinates back to the screen.
+"""
+
+from typing import NamedTuple
+import cv2
+import numpy as np
+from config import CAPTURE_BANDS
+from .frame import Frame
+
+
+class CaptureProfile(NamedTuple):
+    """What part of the screen to capture, and at what fidelity"""
+
+    name: str
+    scale: float = 1.0
+    grayscale: bool = False
+    rows: tuple[int, int] | None = None  # Screen rows [start, stop) to keep
+
+    @property
+    def is_full(self) -> bool:
+        return self.scale == 1.0 and not self.grayscale and self.rows is None
+
+
+FULL = CaptureProfile("full")
+
+CAPTURE_PROFILES = {
+    "full": FULL,
+    "half": CaptureProfile("half", scale=0.5),
+    "gray": CaptureProfile("gray", grayscale=True),
+    "half_gray": CaptureProfile("half_gray", scale=0.5, grayscale=True),
+}
+CAPTURE_PROFILES.update(
+    (name, CaptureProfile(name, rows=tuple(rows)))
+    for name, rows in CAPTURE_BANDS.items()
+)
+
+
+def get_capture_profile(profile) -> CaptureProfile:
+    """
+    Resolve a profile name (or None for full frames) to a CaptureProfile.
+
+    Raises:
+        ValueError: If the name is not a known profile
+    """
+    if profile is None:
+        return FULL
+    if isinstance(profile, CaptureProfile):
+        return profile
+    try:
+        return CAPTURE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown capture profile: {profile}")
+
+
+def apply_profile(frame: Frame, profile: CaptureProfile, pool=None) -> Frame:
+    """
+    Derive a reduced frame from a full-screen one on the host.
+
+    Rows are only cut if the frame still covers the whole screen (a band cut
+    on the device arrives already cropped). The source frame is released.
+    """
+    image = frame.image
+    origin_y = frame.origin[1]
+    if profile.rows is not None and frame.is_full_screen:
+        start, stop = profile.rows
+        image = image[start:stop]
+        origin_y = start
+
+    if profile.grayscale and image.ndim == 3:
+        image = cv2.cvtColor(
+            image, cv2.COLOR_BGR2GRAY, dst=_buffer(pool, image.shape[:2])
+        )
+
+    if profile.scale != 1.0:
+        height, width = image.shape[:2]
+        size = (max(int(width * profile.scale), 1), max(int(height * profile.scale), 1))
+        image = cv2.resize(
+            image,
+            size,
+            dst=_buffer(pool, (size[1], size[0]) + image.shape[2:]),
+            interpolation=cv2.INTER_AREA,
+        )
+
+    if image is frame.image:
+        # Nothing left to do (e.g. a band that was already cut on the device)
+        frame.profile = profile.name
+        return frame
+
+    if not image.flags.owndata:
+        # Still a view of the source frame's buffer - copy the band out
+        band = _buffer(pool, image.shape)
+        if band is None:
+            image = image.copy()
+        else:
+            np.copyto(band, image)
+            image = band
+
+    derived = Frame(
+        image,
+        seq=frame.seq,
+        capture_start=frame.capture_start,
+        capture_end=frame.capture_end,
+        backend=frame.backend,
+        pool=pool,
+        origin=(frame.origin[0], origin_y),
+        scale=frame.scale * profile.scale,
+        profile=profile.name,
+    )
+    frame.release()
+    return derived
+
+
+def _buffer(pool, shape) -> np.ndarray | None:
+    """Pooled output buffer for an OpenCV dst= argument (None without a pool)"""
+    if pool is None:
+        return None
+    return pool.acquire(shape)
@@ -0,0 +1,244 @@
+"""
+Device-side capture server
+
+A tiny shell script is pushed to the emulator and served by toybox `nc -L`
+on a device-local port, which the host reaches through `adb forward`. Each
+frame is then one request/response on an already-open TCP connection:
+
+    F  ->  one raw `screencap` dump
+    I  ->  size of a raw dump in bytes, as a text line
+    P  ->  "OK" (health check)
+
+Raw dumps carry no length prefix, so the dump size is asked for once per
+connection and every response is read to exactly that size. A response
+whose header no longer matches (resolution change) or a dead connection
+drops the connection; the next capture reconnects, and re-deploys the
+helper if it no longer answers the health check.
+"""
+
+import base64
+import socket
+import time
+from config import (
+    CAPTURE_SERVER_PATH,
+    CAPTURE_SERVER_PORT,
+    CAPTURE_SERVER_REDEPLOY_DELAY,
+    CAPTURE_TIMEOUT,
+)
+from .adb_scheduler import DISCOVERY, adb_priority
+
+# Pid of the running listener. `pkill -f` on the script path would also
+# match the `sh -c` running the pkill, and kill it before it finished
+CAPTURE_SERVER_PID_PATH = f"{CAPTURE_SERVER_PATH}.pid"
+
+CAPTURE_SERVER_SCRIPT = """\
+#!/system/bin/sh
+# crbot capture server: one request per line on stdin, answers on stdout
+while read -r request; do
+  case "$request" in
+    F) screencap ;;
+    I) screencap | wc -c ;;
+    P) echo OK ;;
+    *) exit 0 ;;
+  esac
+done
+"""
+
+
+def _free_local_port() -> int:
+    """Ask the OS for an unused loopback port to forward from"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _stop_listener_command() -> str:
+    """Device command that kills the listener recorded in the pid file"""
+    return (
+        f"[ -f {CAPTURE_SERVER_PID_PATH} ] && kill $(cat {CAPTURE_SERVER_PID_PATH}) 2>/dev/null; "
+        f"rm -f {CAPTURE_SERVER_PID_PATH}"
+    )
+
+
+class CaptureServer:
+    """Deploys the helper on one device and fetches raw dumps from it"""
+
+    def __init__(
+        self,
+        transport,
+        name: str,
+        remote_port: int = CAPTURE_SERVER_PORT,
+        timeout: float = CAPTURE_TIMEOUT,
+    ):
+        self.transport = transport
+        self.name = name
+        self.remote_port = remote_port
+        self.timeout = timeout
+        self.local_port = None
+        self.dump_size = None
+        self.deploys = 0
+        self._sock = None
+        self._reader = None
+        self._buffer = None
+        self._last_deploy = None
+
+    @property
+    def connected(self) -> bool:
+        return self._sock is not None
+
+    def deploy(self) -> bool:
+        """Push the helper, (re)start its listener and forward a host port to it"""
+        with adb_priority(DISCOVERY):
+            return self._deploy()
+
+    def _deploy(self) -> bool:
+        self._last_deploy = time.monotonic()
+        self.deploys += 1
+        script = base64.b64encode(CAPTURE_SERVER_SCRIPT.encode()).decode()
+        result = self.transport.shell(
+            f"echo {script} | base64 -d > {CAPTURE_SERVER_PATH}",
+            timeout=self.timeout,
+        )
+        if result.exit_code != 0:
+            print(f"[{self.name}] Could not push capture server: {result.stderr}")
+            return False
+
+        # The old listener may be hung; start from a clean slate
+        self.transport.shell(_stop_listener_command(), timeout=self.timeout)
+        result = self.transport.shell(
+            f"setsid nohup toybox nc -L -s 127.0.0.1 -p {self.remote_port} "
+            f"sh {CAPTURE_SERVER_PATH} > /dev/null 2>&1 < /dev/null & "
+            f"echo $! > {CAPTURE_SERVER_PID_PATH}",
+            timeout=self.timeout,
+        )
+        if result.exit_code != 0:
+            print(f"[{self.name}] Could not start capture server: {result.stderr}")
+            return False
+
+        self._remove_forward()
+        self.local_port = _free_local_port()
+        if not self.transport.forward(
+            f"tcp:{self.local_port}", f"tcp:{self.remote_port}"
+        ):
+            print(f"[{self.name}] adb forward to the capture server failed")
+            self.local_port = None
+            return False
+        return True
+
+    def connect(self) -> bool:
+        """Open a connection to the helper and check that it answers"""
+        self.close()
+        if self.local_port is None:
+            return False
+        try:
+            sock = socket.create_connection(
+                ("127.0.0.1", self.local_port), timeout=self.timeout
+            )
+        except OSError:
+            return False
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+        # adb accepts forwarded connections even when nothing listens on the
+        # device, so only an answer proves the helper is alive
+        try:
+            if not self.ping():
+                raise OSError("no answer to health check")
+            self.dump_size = int(self._request_line(b"I\n"))
+        except (OSError, ValueError):
+            self.close()
+            return False
+        return True
+
+    def _request_line(self, request: bytes) -> bytes:
+        self._sock.sendall(request)
+        line = self._reader.readline()
+        if not line:
+            raise OSError("capture server closed the connection")
+        return line.strip()
+
+    def ping(self) -> bool:
+        """Health check on the open connection"""
+        if self._sock is None:
+            return False
+        try:
+            return self._request_line(b"P\n") == b"OK"
+        except OSError:
+            return False
+
+    def ensure_running(self) -> bool:
+        """Connect, re-deploying the helper if it does not answer"""
+        if self._sock is not None:
+            return True
+        if self.connect():
+            return True
+        if self._last_deploy is not None:
+            if time.monotonic() - self._last_deploy < CAPTURE_SERVER_REDEPLOY_DELAY:
+                return False
+            print(f"[{self.name}] Capture server not answering, re-deploying")
+        if not self.deploy():
+            return False
+        # Give the listener a moment to come up
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.connect():
+                return True
+            time.sleep(0.1)
+        return False
+
+    def read_dump(self) -> memoryview | None:
+        """
+        Fetch one raw screencap dump.
+
+        Returns a view of a reused buffer (valid until the next call), or None
+        if the helper could not be reached.
+        """
+        if not self.ensure_running():
+            return None
+        size = self.dump_size
+        if self._buffer is None or len(self._buffer) != size:
+            self._buffer = bytearray(size)
+        view = memoryview(self._buffer)
+        try:
+            self._sock.sendall(b"F\n")
+            received = 0
+            while received < size:
+                count = self._reader.readinto(view[received:])
+                if not count:
+                    raise OSError("capture server closed the connection")
+                received += count
+        except OSError as e:
+            print(f"[{self.name}] Capture server read failed: {e}")
+            self.close()
+            return None
+        return view
+
+    def undeploy(self):
+        """Stop the helper, remove its script and drop the port forward"""
+        self.close()
+        self._last_deploy = None
+        with adb_priority(DISCOVERY):
+            self._remove_forward()
+            self.transport.shell(
+                f"{_stop_listener_command()}; rm -f {CAPTURE_SERVER_PATH}",
+                timeout=self.timeout,
+            )
+
+    def _remove_forward(self):
+        """Drop the forward of a previous deploy, if any"""
+        local_port, self.local_port = self.local_port, None
+        if local_port is not None:
+            self.transport.remove_forward(f"tcp:{local_port}")
+
+    def close(self):
+        """Drop the connection (the helper keeps running for the next one)"""
+        sock, self._sock = self._sock, None
+        reader, self._reader = self._reader, None
+        if reader is not None:
+            reader.close()
+        if sock is not None:
+            try:
+                sock.sendall(b"Q\n")
+            except OSError:
+                pass
+            sock.close()
@@ -0,0 +1,346 @@
+"""
+Process-wide ADB device registry
+
+Follows `adb track-devices` on a background thread so that controllers can
+check a cached online flag instead of spawning `adb devices` per frame.
+Watched network devices (MEmu's 127.0.0.1:<port>) are reconnected in the
+background with exponential backoff when they drop.
+
+With ADB_TRANSPORT = "socket" the tracker talks to the adb server directly
+(host:track-devices, host:devices, host:connect) and spawns the adb binary
+only to start a server that is not running.
+"""
+
+import socket
+import subprocess
+import threading
+from config import ADB_TRANSPORT, DEVICE_POLL_INTERVAL, DEVICE_RECONNECT_MAX_DELAY
+from utils import exponential_backoff
+from .adb_client import AdbError, AdbServerUnavailable, get_adb_client
+from .adb_process import run_adb
+from .adb_scheduler import DISCOVERY, get_adb_scheduler
+from .transport import ensure_adb_server
+
+STATE_ONLINE = "device"
+STATE_OFFLINE = "offline"
+STATE_UNAUTHORIZED = "unauthorized"
+STATE_ABSENT = "absent"
+
+
+def parse_device_list(text: str) -> dict[str, str]:
+    """Parse `adb devices` / track-devices payload into {device_id: state}"""
+    states = {}
+    for line in text.splitlines():
+        if "\t" not in line:
+            continue
+        device_id, state = line.split("\t", 1)
+        states[device_id.strip()] = state.strip()
+    return states
+
+
+class DeviceTracker:
+    """Keeps the last known ADB state of every device with change callbacks"""
+
+    def __init__(
+        self, poll_interval: float = DEVICE_POLL_INTERVAL, kind: str = ADB_TRANSPORT
+    ):
+        self.poll_interval = poll_interval
+        # "socket" uses the adb server protocol, anything else the adb binary
+        self.kind = kind
+        self._states: dict[str, str] = {}
+        self._listeners = []
+        self._watched: dict[str, int] = {}  # Device -> number of watchers
+        self._reconnecting: set[str] = set()
+        self._condition = threading.Condition()
+        self._ready = False
+        self._running = False
+        self._thread = None
+        self._close_stream = None
+
+    def start(self, ready_timeout: float = 3.0):
+        """Start following device changes and wait for the first snapshot"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._track_loop, name="adb-device-tracker", daemon=True
+        )
+        self._thread.start()
+        with self._condition:
+            self._condition.wait_for(lambda: self._ready, timeout=ready_timeout)
+
+    def stop(self):
+        """Stop the tracker thread and any open track-devices stream"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        close_stream = self._close_stream
+        if close_stream is not None:
+            close_stream()
+
+    def add_listener(self, callback):
+        """Register callback(device_id, old_state, new_state) for state changes"""
+        with self._condition:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """Unregister a previously added state change callback"""
+        with self._condition:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def watch(self, device_id: str):
+        """Keep this device connected, reconnecting in the background if it drops"""
+        with self._condition:
+            self._watched[device_id] = self._watched.get(device_id, 0) + 1
+            state = self._states.get(device_id, STATE_ABSENT)
+        if self._ready and state != STATE_ONLINE:
+            self._schedule_reconnect(device_id)
+
+    def unwatch(self, device_id: str):
+        """Undo one watch(); the last one stops reconnecting the device"""
+        with self._condition:
+            watchers = self._watched.get(device_id, 0) - 1
+            if watchers > 0:
+                self._watched[device_id] = watchers
+            else:
+                self._watched.pop(device_id, None)
+            self._condition.notify_all()
+
+    def get_state(self, device_id: str) -> str:
+        """Return the cached state of a device (STATE_ABSENT if unknown)"""
+        if not self._ready:
+            self.refresh()
+        with self._condition:
+            return self._states.get(device_id, STATE_ABSENT)
+
+    def is_online(self, device_id: str) -> bool:
+        """Return True if the device is currently connected and authorized"""
+        return self.get_state(device_id) == STATE_ONLINE
+
+    def wait_for_online(self, device_id: str, timeout: float) -> bool:
+        """Block until the device comes online or the timeout expires"""
+        if self.is_online(device_id):
+            return True
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._states.get(device_id) == STATE_ONLINE, timeout=timeout
+            )
+
+    def refresh(self) -> bool:
+        """Take one synchronous `adb devices` snapshot"""
+        if self.kind == "socket":
+            try:
+                with get_adb_scheduler().slot(DISCOVERY):
+                    states = get_adb_client().devices()
+            except (AdbError, OSError, ValueError):
+                pass  # Fall back to the adb binary (it also starts the server)
+            else:
+                self._apply_snapshot(states)
+                return True
+        try:
+            with get_adb_scheduler().slot(DISCOVERY):
+                result = run_adb(["adb", "devices"], kind="devices", text=True)
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        if result.returncode != 0:
+            return False
+        self._apply_snapshot(parse_device_list(result.stdout))
+        return True
+
+    def _apply_snapshot(self, new_states: dict[str, str]):
+        """Replace the known states and fire callbacks for every change"""
+        with self._condition:
+            old_states = self._states
+            self._states = new_states
+            self._ready = True
+            listeners = list(self._listeners)
+            watched = set(self._watched)
+            self._condition.notify_all()
+
+        changes = []
+        for device_id in set(old_states) | set(new_states):
+            old = old_states.get(device_id, STATE_ABSENT)
+            new = new_states.get(device_id, STATE_ABSENT)
+            if old != new:
+                changes.append((device_id, old, new))
+
+        for device_id, old, new in changes:
+            for callback in listeners:
+                try:
+                    callback(device_id, old, new)
+                except Exception as e:
+                    print(f"Device state callback failed for {device_id}: {e}")
+
+        for device_id in watched:
+            if new_states.get(device_id, STATE_ABSENT) != STATE_ONLINE:
+                self._schedule_reconnect(device_id)
+
+    def _track_loop(self):
+        """Follow `adb track-devices`, falling back to polling if it fails"""
+        attempt = 0
+        while self._running:
+            if self._follow_track_devices():
+                attempt = 0
+            if not self._running:
+                break
+
+            # The stream ended or could not start - poll once and back off
+            attempt += 1
+            self.refresh()
+            delay = exponential_backoff(
+                attempt,
+                base_delay=self.poll_interval,
+                max_delay=DEVICE_RECONNECT_MAX_DELAY,
+            )
+            with self._condition:
+                self._condition.wait_for(lambda: not self._running, timeout=delay)
+
+    def _open_track_stream(self):
+        """
+        Start following device changes.
+
+        Returns:
+            tuple: (binary file object, close function), or None if it failed
+        """
+        if self.kind == "socket":
+            client = get_adb_client()
+            try:
+                try:
+                    sock = client.track_devices()
+                except AdbServerUnavailable:
+                    if not ensure_adb_server(client):
+                        return None
+                    sock = client.track_devices()
+            except (AdbError, OSError):
+                return None
+            stream = sock.makefile("rb")
+
+            def close():
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+                stream.close()
+                sock.close()
+
+            return stream, close
+
+        try:
+            process = subprocess.Popen(
+                ["adb", "track-devices"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except OSError:
+            return None
+
+        def close():
+            try:
+                process.kill()
+                process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+
+        return process.stdout, close
+
+    def _follow_track_devices(self) -> bool:
+        """Read length-prefixed device lists until the stream ends"""
+        opened = self._open_track_stream()
+        if opened is None:
+            return False
+        stream, self._close_stream = opened
+
+        received_any = False
+        try:
+            while self._running:
+                length_hex = stream.read(4)
+                if len(length_hex) < 4:
+                    break
+                try:
+                    length = int(length_hex, 16)
+                except ValueError:
+                    break
+                payload = stream.read(length) if length else b""
+                self._apply_snapshot(
+                    parse_device_list(payload.decode(errors="replace"))
+                )
+                received_any = True
+        except OSError:
+            pass  # Closed by stop()
+        finally:
+            close_stream, self._close_stream = self._close_stream, None
+            if close_stream is not None:
+                close_stream()
+        return received_any
+
+    def _connect(self, device_id: str):
+        """Ask the adb server to connect a network device"""
+        if self.kind == "socket":
+            try:
+                get_adb_client().connect(device_id)
+                return
+            except (AdbError, OSError):
+                pass  # Fall back to the adb binary (it also starts the server)
+        run_adb(["adb", "connect", device_id], kind="connect", device_id=device_id)
+
+    def _schedule_reconnect(self, device_id: str):
+        """Start a background reconnect loop for a watched network device"""
+        if ":" not in device_id:
+            return  # Only TCP devices can be reconnected with `adb connect`
+        with self._condition:
+            if device_id in self._reconnecting or not self._running:
+                return
+            self._reconnecting.add(device_id)
+        threading.Thread(
+            target=self._reconnect_loop,
+            args=(device_id,),
+            name=f"adb-reconnect-{device_id}",
+            daemon=True,
+        ).start()
+
+    def _reconnect_loop(self, device_id: str):
+        """Run `adb connect` with exponential backoff until the device is back"""
+
+        def settled():
+            # Back online, no longer wanted, or the tracker is shutting down
+            if not self._running or device_id not in self._watched:
+                return True
+            return self._states.get(device_id) == STATE_ONLINE
+
+        attempt = 0
+        try:
+            while True:
+                with self._condition:
+                    if settled():
+                        return
+                attempt += 1
+                print(f"Reconnecting {device_id} (attempt {attempt})...")
+                try:
+                    with get_adb_scheduler().slot(DISCOVERY):
+                        self._connect(device_id)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+                delay = exponential_backoff(
+                    attempt, max_delay=DEVICE_RECONNECT_MAX_DELAY
+                )
+                with self._condition:
+                    self._condition.wait_for(settled, timeout=delay)
+        finally:
+            with self._condition:
+                self._reconnecting.discard(device_id)
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_device_tracker() -> DeviceTracker:
+    """Return the process-wide device tracker, starting it on first use"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = DeviceTracker()
+            _tracker.start()
+        return _tracker
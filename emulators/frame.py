@@ -0,0 +1,215 @@
+"""
+Captured frame with capture metadata
+"""
+
+import time
+import cv2
+import numpy as np
+from config import CHANGE_FINGERPRINT_SIZE, CHANGE_THRESHOLD
+
+
+class Frame:
+    """
+    A captured screen image plus when, how and how fast it was captured.
+
+    Frames behave like the underlying BGR array for indexing, `.shape` and
+    numpy conversion, so code written for bare screenshots keeps working.
+    Timestamps come from time.monotonic(). Frames built from a BufferPool
+    hand their buffer back on release(); the image must not be used after.
+
+    Reduced capture profiles produce frames covering part of the screen
+    (`origin` is the screen position of the top-left pixel) and/or scaled
+    down by `scale`. Indexing a frame takes screen coordinates and maps them
+    into the image, raising IndexError outside the captured area; chained
+    indexing (`frame[y][x]`) only maps the row.
+    """
+
+    __slots__ = (
+        "image",
+        "seq",
+        "capture_start",
+        "capture_end",
+        "backend",
+        "pool",
+        "origin",
+        "scale",
+        "profile",
+        "_fingerprint",
+    )
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        seq: int = 0,
+        capture_start: float | None = None,
+        capture_end: float | None = None,
+        backend: str = "unknown",
+        pool=None,
+        origin: tuple[int, int] = (0, 0),
+        scale: float = 1.0,
+        profile: str = "full",
+    ):
+        now = time.monotonic()
+        self.image = image
+        self.seq = seq
+        self.capture_start = capture_start if capture_start is not None else now
+        self.capture_end = capture_end if capture_end is not None else now
+        self.backend = backend
+        self.pool = pool
+        self.origin = origin
+        self.scale = scale
+        self.profile = profile
+        self._fingerprint = None
+
+    @property
+    def shape(self) -> tuple:
+        return self.image.shape
+
+    @property
+    def resolution(self) -> tuple[int, int]:
+        """(width, height) of the frame"""
+        height, width = self.image.shape[:2]
+        return width, height
+
+    @property
+    def is_full_screen(self) -> bool:
+        """True if frame coordinates are screen coordinates"""
+        return self.origin == (0, 0) and self.scale == 1.0
+
+    def to_screen(self, x: float, y: float) -> tuple[int, int]:
+        """Map frame pixel coordinates to screen coordinates"""
+        return (
+            int(round(x / self.scale)) + self.origin[0],
+            int(round(y / self.scale)) + self.origin[1],
+        )
+
+    def to_frame(self, x: float, y: float) -> tuple[int, int]:
+        """Map screen coordinates to frame pixel coordinates"""
+        return (
+            int((x - self.origin[0]) * self.scale),
+            int((y - self.origin[1]) * self.scale),
+        )
+
+    @property
+    def capture_duration(self) -> float:
+        """Seconds the capture took"""
+        return self.capture_end - self.capture_start
+
+    @property
+    def age(self) -> float:
+        """Seconds since the capture finished"""
+        return time.monotonic() - self.capture_end
+
+    @property
+    def fingerprint(self) -> np.ndarray | None:
+        """
+        Downsampled grayscale thumbnail used for change detection.
+
+        Cached once computed, so it survives release(); None if the frame was
+        released before anyone asked for it.
+        """
+        if self._fingerprint is None and self.image is not None:
+            self._fingerprint = compute_fingerprint(self.image)
+        return self._fingerprint
+
+    def changed_since(self, other, threshold: int = CHANGE_THRESHOLD) -> bool:
+        """True if this frame shows a different screen than `other`"""
+        return fingerprints_differ(self.fingerprint, fingerprint_of(other), threshold)
+
+    def is_stale(self, max_age: float) -> bool:
+        """True if the frame was captured more than `max_age` seconds ago"""
+        return self.age > max_age
+
+    def release(self):
+        """Return the image buffer to its pool (safe to call more than once)"""
+        image, self.image = self.image, None
+        if self.pool is not None and image is not None:
+            self.pool.release(image)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def __getitem__(self, key):
+        if self.is_full_screen:
+            return self.image[key]
+        if not isinstance(key, tuple):
+            key = (key,)
+        mapped = list(key)
+        # Axis 0 is y, axis 1 is x
+        for axis, origin in ((0, self.origin[1]), (1, self.origin[0])):
+            if axis < len(mapped):
+                mapped[axis] = self._map_index(
+                    mapped[axis], origin, self.image.shape[axis]
+                )
+        return self.image[tuple(mapped)]
+
+    def _map_index(self, index, origin: int, size: int):
+        """Map one screen-coordinate index or slice onto an image axis"""
+        if isinstance(index, slice):
+            start, stop = index.start, index.stop
+            if start is not None:
+                start = max(int((start - origin) * self.scale), 0)
+            if stop is not None:
+                stop = max(int((stop - origin) * self.scale), 0)
+            return slice(start, stop, index.step)
+        position = int((index - origin) * self.scale)
+        if not 0 <= position < size:
+            raise IndexError(f"Screen coordinate {index} is outside this frame")
+        return position
+
+    def __len__(self) -> int:
+        return len(self.image)
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is not None and dtype != self.image.dtype:
+            return self.image.astype(dtype)
+        return self.image
+
+    def __repr__(self) -> str:
+        if self.image is None:
+            return f"Frame(seq={self.seq}, released)"
+        width, height = self.resolution
+        return (
+            f"Frame(seq={self.seq}, {width}x{height}, backend={self.backend}, "
+            f"profile={self.profile}, "
+            f"capture={self.capture_duration * 1000:.0f}ms)"
+        )
+
+
+def as_image(screenshot) -> np.ndarray | None:
+    """Return the pixel array of a Frame, or the argument itself if it is an array"""
+    if isinstance(screenshot, Frame):
+        return screenshot.image
+    return screenshot
+
+
+def compute_fingerprint(image: np.ndarray) -> np.ndarray:
+    """
+    Shrink an image to a small grayscale thumbnail.
+
+    Each thumbnail pixel is the mean of one screen tile, so comparing
+    thumbnails is a cheap tile diff.
+    """
+    small = cv2.resize(image, CHANGE_FINGERPRINT_SIZE, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return small
+
+
+def fingerprint_of(screenshot) -> np.ndarray | None:
+    """Fingerprint of a Frame (cached) or a bare image array"""
+    if screenshot is None:
+        return None
+    if isinstance(screenshot, Frame):
+        return screenshot.fingerprint
+    return compute_fingerprint(screenshot)
+
+
+def fingerprints_differ(first, second, threshold: int = CHANGE_THRESHOLD) -> bool:
+    """True unless both fingerprints exist and no tile moved past `threshold`"""
+    if first is None or second is None or first.shape != second.shape:
+        return True
+    return int(cv2.absdiff(first, second).max()) > threshold
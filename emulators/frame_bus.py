@@ -0,0 +1,414 @@
+"""
+Shared-memory frame bus
+
+With many emulators, capture and decode in one process contend for the GIL.
+A FrameBus moves an emulator's capture loop into its own process, which
+publishes frames into ring slots in `multiprocessing.shared_memory`. Bots
+(and the GUI) attach to the ring by name and read frames without pickling.
+
+Layout: a ring header (published count, slot count, slot size) followed by
+fixed-size slots. Each slot starts with a seqlock header (lock, frame seq,
+shape, capture timestamps) and then the pixels. The writer makes the lock
+odd while it fills a slot and even again when done; readers retry if the
+lock moved while they were reading, so neither side ever takes a lock.
+Frame N lives in slot (N - 1) % slots, so the latest frame is found from
+the published count alone.
+
+Timestamps are time.monotonic(), which is system-wide on Windows and Linux,
+so they compare directly with the reader's last input time.
+"""
+
+import multiprocessing
+import struct
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from config import (
+    BACKGROUND_CAPTURE_INTERVAL,
+    FRAME_BUS_POLL_INTERVAL,
+    FRAME_BUS_SLOT_BYTES,
+    FRAME_BUS_SLOTS,
+    FRAME_BUS_ZERO_COPY,
+)
+from .adb_scheduler import use_shared_adb_slots
+from .buffer_pool import BufferPool
+from .frame import Frame
+
+_RING_HEADER = struct.Struct("<QIQ")  # published count, slot count, slot bytes
+_SLOT_HEADER = struct.Struct("<QQIIIdd")  # lock, seq, h, w, c, start, end
+_RING_HEADER_SIZE = 64
+_SLOT_HEADER_SIZE = 64
+_READ_RETRIES = 8
+
+
+class SharedFrameRing:
+    """Ring of frame slots in one shared memory block"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool = False):
+        self.shm = shm
+        self.owner = owner
+        self._published, self.slot_count, self.slot_bytes = _RING_HEADER.unpack_from(
+            shm.buf, 0
+        )
+
+    @classmethod
+    def create(
+        cls, slots: int = FRAME_BUS_SLOTS, slot_bytes: int = FRAME_BUS_SLOT_BYTES
+    ):
+        """Allocate a new ring; the creator unlinks it when done"""
+        size = _RING_HEADER_SIZE + slots * (_SLOT_HEADER_SIZE + slot_bytes)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        _RING_HEADER.pack_into(shm.buf, 0, 0, slots, slot_bytes)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str):
+        """Open an existing ring by its shared memory name"""
+        return cls(shared_memory.SharedMemory(name=name))
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def published(self) -> int:
+        """Sequence number of the newest complete frame (0 before the first)"""
+        return _RING_HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def _slot_offset(self, seq: int) -> int:
+        slot = (seq - 1) % self.slot_count
+        return _RING_HEADER_SIZE + slot * (_SLOT_HEADER_SIZE + self.slot_bytes)
+
+    def _pixels(self, offset: int, shape: tuple) -> np.ndarray:
+        return np.ndarray(
+            shape,
+            dtype=np.uint8,
+            buffer=self.shm.buf,
+            offset=offset + _SLOT_HEADER_SIZE,
+        )
+
+    def publish(self, frame: Frame) -> int:
+        """
+        Copy a frame into the next slot (single writer only).
+
+        Returns:
+            int: The frame's bus sequence number, or 0 if it does not fit a slot
+        """
+        image = np.ascontiguousarray(frame.image, dtype=np.uint8)
+        if image.nbytes > self.slot_bytes:
+            return 0
+        shape = image.shape + (1,) * (3 - image.ndim)
+        seq = self._published + 1
+        offset = self._slot_offset(seq)
+        buf = self.shm.buf
+
+        lock = struct.unpack_from("<Q", buf, offset)[0]
+        struct.pack_into("<Q", buf, offset, lock + 1)  # Odd: slot being written
+        np.copyto(self._pixels(offset, image.shape), image)
+        _SLOT_HEADER.pack_into(
+            buf,
+            offset,
+            lock + 1,
+            seq,
+            *shape,
+            frame.capture_start,
+            frame.capture_end,
+        )
+        struct.pack_into("<Q", buf, offset, lock + 2)  # Even: slot complete
+        struct.pack_into("<Q", buf, 0, seq)
+        self._published = seq
+        return seq
+
+    def read(self, after_seq: int = 0, copy_into=None, discard=None):
+        """
+        Read the newest frame if it is newer than `after_seq`.
+
+        Args:
+            after_seq: Sequence number the caller has already seen
+            copy_into: Callable(shape) returning an array to copy the pixels
+                       into; None returns a view into shared memory, valid
+                       until the writer laps the ring (see is_current)
+            discard: Callable(array) taking back a copy_into array whose
+                     copy was torn by the writer and is not returned
+
+        Returns:
+            tuple: (seq, image, capture_start, capture_end), or None if there
+            is nothing newer or the writer kept overwriting the slot
+        """
+        buf = self.shm.buf
+        for _ in range(_READ_RETRIES):
+            seq = self.published
+            if seq <= after_seq:
+                return None
+            offset = self._slot_offset(seq)
+            lock, slot_seq, height, width, channels, start, end = (
+                _SLOT_HEADER.unpack_from(buf, offset)
+            )
+            if lock % 2 or slot_seq != seq:
+                continue  # Being written or already reused for a newer frame
+            shape = (height, width) if channels == 1 else (height, width, channels)
+            image = self._pixels(offset, shape)
+            if copy_into is not None:
+                target = copy_into(shape)
+                np.copyto(target, image)
+                image = target
+            if struct.unpack_from("<Q", buf, offset)[0] == lock:
+                return seq, image, start, end
+            if copy_into is not None and discard is not None:
+                discard(image)  # Torn copy; the retry takes a fresh array
+        return None
+
+    def is_current(self, seq: int) -> bool:
+        """Whether frame `seq` is still intact in its slot (for zero-copy readers)"""
+        lock, slot_seq = struct.unpack_from("<QQ", self.shm.buf, self._slot_offset(seq))
+        return lock % 2 == 0 and slot_seq == seq
+
+    def close(self):
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Zero-copy frames still reference the block; GC closes it
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class FrameBusReader:
+    """
+    Reads one emulator's frames from a SharedFrameRing.
+
+    Offers the FrameGrabber interface (wait_for_frame, latest, seq, stop), so
+    EmulatorBot can use it in place of an in-process grabber.
+    """
+
+    def __init__(
+        self,
+        ring_name: str,
+        zero_copy: bool = FRAME_BUS_ZERO_COPY,
+        poll_interval: float = FRAME_BUS_POLL_INTERVAL,
+        pool: BufferPool | None = None,
+        battle_flag=None,
+    ):
+        self.ring = SharedFrameRing.attach(ring_name)
+        self.zero_copy = zero_copy
+        self.poll_interval = poll_interval
+        self.pool = pool if pool is not None else BufferPool()
+        self._battle_flag = battle_flag
+        self._seq = 0
+        self._running = True
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    @property
+    def seq(self) -> int:
+        return self.ring.published if self._running else self._seq
+
+    @property
+    def in_battle(self) -> bool:
+        return self._battle_flag is not None and self._battle_flag.is_set()
+
+    @in_battle.setter
+    def in_battle(self, value: bool):
+        """Tell the capture process to capture at battle priority (or not)"""
+        if self._battle_flag is None:
+            return
+        if value:
+            self._battle_flag.set()
+        else:
+            self._battle_flag.clear()
+
+    def _read(self, after_seq: int):
+        if self.zero_copy:
+            result = self.ring.read(after_seq)
+        else:
+            result = self.ring.read(after_seq, self.pool.acquire, self.pool.release)
+        if result is None:
+            return None
+        seq, image, start, end = result
+        self._seq = seq
+        return Frame(
+            image,
+            seq=seq,
+            capture_start=start,
+            capture_end=end,
+            backend="bus",
+            pool=None if self.zero_copy else self.pool,
+        )
+
+    def latest(self):
+        """
+        Return the most recent frame without waiting.
+
+        Returns:
+            tuple: (seq, frame), or (0, None) before the first frame
+        """
+        if not self._running:
+            return 0, None
+        frame = self._read(0)
+        return (frame.seq, frame) if frame is not None else (0, None)
+
+    def wait_for_frame(self, after_seq: int = 0, timeout: float | None = None):
+        """
+        Wait for a frame newer than `after_seq` by polling the ring.
+
+        Returns:
+            tuple: (seq, frame), or (after_seq, None) on timeout/stop
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._running:
+            frame = self._read(after_seq)
+            if frame is not None:
+                return frame.seq, frame
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        return after_seq, None
+
+    def is_current(self, frame: Frame) -> bool:
+        """Whether a zero-copy frame has not been overwritten yet"""
+        return self._running and self.ring.is_current(frame.seq)
+
+    def stop(self, timeout: float = 0.0):
+        """Stop handing out frames and wake up waiters (within one poll period)"""
+        self._running = False
+
+    def close(self):
+        """Detach from the ring once no thread reads from it any more"""
+        self._running = False
+        self.ring.close()
+
+
+def _capture_worker(
+    ring_name,
+    device_id,
+    instance_name,
+    stop_event,
+    controller_factory,
+    interval,
+    adb_slots=None,
+    battle_flag=None,
+):
+    """Capture process: publish an emulator's frames until stop_event is set"""
+    if adb_slots is not None:
+        # Share the parent's adb slot cap instead of adding our own
+        use_shared_adb_slots(adb_slots)
+    ring = SharedFrameRing.attach(ring_name)
+    if controller_factory is None:
+        from .memu import MemuController
+
+        # The bot keeps the input side; this is the device's only capturer
+        controller = MemuController(device_id, instance_name, capture_only=True)
+    else:
+        controller = controller_factory(device_id, instance_name)
+    warned = False
+    try:
+        while not stop_event.is_set():
+            started = time.monotonic()
+            if battle_flag is not None:
+                # In-battle captures go ahead of other instances' menu traffic
+                controller.in_battle = battle_flag.is_set()
+            try:
+                frame = controller.capture_frame()
+            except Exception as e:
+                print(f"[{instance_name}] Capture process error: {e}")
+                frame = None
+            if frame is None:
+                stop_event.wait(0.5)
+                continue
+
+            if not ring.publish(frame) and not warned:
+                print(
+                    f"[{instance_name}] Frame {frame.shape} does not fit a "
+                    f"{ring.slot_bytes}-byte frame bus slot"
+                )
+                warned = True
+            frame.release()
+
+            remaining = interval - (time.monotonic() - started)
+            if remaining > 0:
+                stop_event.wait(remaining)
+    except KeyboardInterrupt:
+        pass  # Ctrl+C reaches every process; the parent shuts us down
+    finally:
+        controller.stop()
+        ring.close()
+
+
+class FrameBus:
+    """
+    Owns one emulator's shared frame ring and the process that fills it.
+
+    `controller_factory(device_id, instance_name)` builds the controller in
+    the capture process (default: a capture-only MemuController) and must be
+    picklable.
+    `adb_slots` is the parent's AdbScheduler.shared_slots(), if any.
+    Readers pass the bot's battle state back to the capture process through
+    a shared flag, so it captures at the same adb priority the bot would.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        instance_name: str,
+        slots: int = FRAME_BUS_SLOTS,
+        slot_bytes: int = FRAME_BUS_SLOT_BYTES,
+        controller_factory=None,
+        interval: float = BACKGROUND_CAPTURE_INTERVAL,
+        adb_slots=None,
+    ):
+        self.device_id = device_id
+        self.instance_name = instance_name
+        self.ring = SharedFrameRing.create(slots, slot_bytes)
+        self.controller_factory = controller_factory
+        self.interval = interval
+        self.adb_slots = adb_slots
+        self._stop_event = multiprocessing.Event()
+        self._battle_flag = multiprocessing.Event()
+        self.process = None
+
+    @property
+    def name(self) -> str:
+        """Shared memory name readers attach to"""
+        return self.ring.name
+
+    def start(self):
+        """Start the capture process"""
+        if self.process is not None:
+            return
+        self.process = multiprocessing.Process(
+            target=_capture_worker,
+            args=(
+                self.ring.name,
+                self.device_id,
+                self.instance_name,
+                self._stop_event,
+                self.controller_factory,
+                self.interval,
+                self.adb_slots,
+                self._battle_flag,
+            ),
+            name=f"{self.instance_name}-capture",
+            daemon=True,
+        )
+        self.process.start()
+
+    def reader(self, **kwargs) -> FrameBusReader:
+        """New reader attached to this bus (see FrameBusReader)"""
+        return FrameBusReader(self.ring.name, battle_flag=self._battle_flag, **kwargs)
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the capture process and free the shared memory"""
+        self._stop_event.set()
+        if self.process is not None:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                print(
+                    f"[{self.instance_name}] Capture process did not exit, killing it"
+                )
+                self.process.terminate()
+                self.process.join(timeout)
+        self.ring.close()
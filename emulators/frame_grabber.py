@@ -0,0 +1,127 @@
+"""
+Background frame grabber
+
+Runs captures on a dedicated thread and keeps only the most recent frame in
+a "latest frame" slot, so the bot thread can detect and decide while the
+next capture is already in flight.
+"""
+
+import threading
+import time
+from config import BACKGROUND_CAPTURE_INTERVAL
+
+
+class FrameGrabber:
+    """Continuously captures frames into a latest-frame slot with sequence numbers"""
+
+    def __init__(
+        self,
+        capture_func,
+        name: str = "frame-grabber",
+        interval: float = BACKGROUND_CAPTURE_INTERVAL,
+        retry_delay: float = 0.5,
+    ):
+        self.capture_func = capture_func
+        self.name = name
+        self.interval = interval
+        self.retry_delay = retry_delay
+        self._condition = threading.Condition()
+        self._latest = None
+        self._seq = 0
+        self._delivered_seq = 0
+        self._running = False
+        self._thread = None
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self):
+        """Start the capture thread (no-op if it is already running)"""
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop capturing and wake up any waiters"""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while self._running:
+            started = time.monotonic()
+            try:
+                frame = self.capture_func()
+            except Exception as e:
+                print(f"[{self.name}] Capture failed: {e}")
+                frame = None
+
+            if frame is None:
+                self.failures += 1
+                self._sleep(self.retry_delay)
+                continue
+
+            with self._condition:
+                # A frame nobody picked up is ours to recycle
+                skipped = None
+                if self._seq > self._delivered_seq:
+                    skipped = self._latest
+                # Frames that carry their own sequence number (Frame.seq) keep it
+                self._seq = getattr(frame, "seq", None) or self._seq + 1
+                self._latest = frame
+                self._condition.notify_all()
+            if skipped is not None and hasattr(skipped, "release"):
+                skipped.release()
+
+            remaining = self.interval - (time.monotonic() - started)
+            if remaining > 0:
+                self._sleep(remaining)
+
+    def _sleep(self, seconds: float):
+        """Sleep that returns early when the grabber is stopped"""
+        with self._condition:
+            self._condition.wait_for(lambda: not self._running, timeout=seconds)
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the latest frame (0 before the first capture)"""
+        with self._condition:
+            return self._seq
+
+    def latest(self):
+        """
+        Return the most recent frame without waiting.
+
+        Returns:
+            tuple: (seq, frame), or (0, None) before the first capture
+        """
+        with self._condition:
+            self._delivered_seq = self._seq
+            return self._seq, self._latest
+
+    def wait_for_frame(self, after_seq: int = 0, timeout: float | None = None):
+        """
+        Wait for a frame newer than `after_seq`.
+
+        Args:
+            after_seq: Sequence number the caller has already seen
+            timeout: Maximum time to wait in seconds (None waits forever)
+
+        Returns:
+            tuple: (seq, frame), or (after_seq, None) on timeout/stop
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._seq > after_seq or not self._running, timeout=timeout
+            )
+            if self._seq > after_seq:
+                self._delivered_seq = self._seq
+                return self._seq, self._latest
+            return after_seq, None
@@ -0,0 +1,104 @@
+"""
+Raw framebuffer decoding for `screencap` output without the `-p` flag
+"""
+
+import struct
+import cv2
+import numpy as np
+
+# Pixel formats reported by screencap (android.graphics.PixelFormat values)
+PIXEL_FORMAT_RGBA_8888 = 1
+PIXEL_FORMAT_RGBX_8888 = 2
+PIXEL_FORMAT_BGRA_8888 = 5
+
+# Older Android releases write width, height, format (12 bytes); newer ones
+# append a colorspace field (16 bytes)
+RAW_HEADER_SIZES = (12, 16)
+BYTES_PER_PIXEL = 4
+
+_COLOR_CONVERSIONS = {
+    PIXEL_FORMAT_RGBA_8888: cv2.COLOR_RGBA2BGR,
+    PIXEL_FORMAT_RGBX_8888: cv2.COLOR_RGBA2BGR,
+    PIXEL_FORMAT_BGRA_8888: cv2.COLOR_BGRA2BGR,
+}
+
+
+def parse_raw_header(data) -> tuple[int, int, int, int]:
+    """
+    Parse the header of a raw screencap dump.
+
+    Args:
+        data: Raw bytes as streamed by `exec-out screencap`
+
+    Returns:
+        tuple: (width, height, pixel_format, header_size)
+
+    Raises:
+        ValueError: If the buffer does not look like a raw screencap dump
+    """
+    if len(data) < RAW_HEADER_SIZES[0]:
+        raise ValueError(f"Raw screencap too short ({len(data)} bytes)")
+
+    width, height, pixel_format = struct.unpack_from("<III", data, 0)
+    header_size = len(data) - width * height * BYTES_PER_PIXEL
+    if header_size not in RAW_HEADER_SIZES:
+        raise ValueError(
+            f"Unexpected raw screencap size {len(data)} for {width}x{height}"
+        )
+    if pixel_format not in _COLOR_CONVERSIONS:
+        raise ValueError(f"Unsupported screencap pixel format: {pixel_format}")
+
+    return width, height, pixel_format, header_size
+
+
+def decode_raw_screencap(data, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    Convert a raw screencap dump into a BGR image without touching the disk.
+
+    Args:
+        data: Raw bytes (or any buffer) as streamed by `exec-out screencap`
+        out: Optional preallocated (height, width, 3) uint8 array to write into
+
+    Returns:
+        numpy.ndarray: BGR image of shape (height, width, 3)
+
+    Raises:
+        ValueError: If the buffer does not look like a raw screencap dump
+    """
+    width, height, pixel_format, header_size = parse_raw_header(data)
+    return decode_raw_rows(data, width, pixel_format, offset=header_size, out=out)
+
+
+def decode_raw_rows(
+    data, width: int, pixel_format: int, offset: int = 0, out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Convert headerless raw framebuffer rows (e.g. a band cut on the device).
+
+    Args:
+        data: Buffer holding whole rows of 4-byte pixels
+        width: Row width in pixels
+        pixel_format: screencap pixel format of the rows
+        offset: Bytes to skip at the start of `data`
+        out: Optional preallocated (rows, width, 3) uint8 array to write into
+
+    Returns:
+        numpy.ndarray: BGR image of shape (rows, width, 3)
+
+    Raises:
+        ValueError: If the data is not a whole number of rows or the format is unknown
+    """
+    if pixel_format not in _COLOR_CONVERSIONS:
+        raise ValueError(f"Unsupported screencap pixel format: {pixel_format}")
+    row_bytes = width * BYTES_PER_PIXEL
+    rows, remainder = divmod(len(data) - offset, row_bytes)
+    if remainder or rows <= 0:
+        raise ValueError(f"{len(data) - offset} bytes is not whole {width}px rows")
+    pixels = np.frombuffer(
+        data, dtype=np.uint8, count=rows * row_bytes, offset=offset
+    ).reshape(rows, width, BYTES_PER_PIXEL)
+    if out is not None and out.shape != (rows, width, 3):
+        raise ValueError(
+            f"Output buffer shape {out.shape} does not match {width}x{rows}"
+        )
+    return cv2.cvtColor(pixels, _COLOR_CONVERSIONS[pixel_format], dst=out)
@@ -0,0 +1,78 @@
+"""
+Per-device input latency tracking
+
+Keeps a rolling window of tap-to-visible-change latencies for each device
+and scales configured delays by a percentile of it, so a fast instance
+stops waiting as long as a slow one needs to.
+"""
+
+import threading
+from collections import deque
+from config import (
+    INPUT_LATENCY_MIN_SAMPLES,
+    INPUT_LATENCY_PERCENTILE,
+    INPUT_LATENCY_REFERENCE,
+    INPUT_LATENCY_SCALE_LIMITS,
+    INPUT_LATENCY_WINDOW,
+)
+
+
+class InputLatencyTracker:
+    """Rolling percentile estimate of one device's input latency"""
+
+    def __init__(
+        self,
+        window: int = INPUT_LATENCY_WINDOW,
+        min_samples: int = INPUT_LATENCY_MIN_SAMPLES,
+    ):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        """Add one tap-to-visible-change measurement"""
+        with self._lock:
+            self._samples.append(max(seconds, 0.0))
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    @property
+    def calibrated(self) -> bool:
+        """True once there are enough samples to adapt delays"""
+        return self.samples >= self.min_samples
+
+    def percentile(self, q: float = INPUT_LATENCY_PERCENTILE) -> float | None:
+        """q-th percentile (nearest rank) of the window, None without samples"""
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        rank = round(q / 100 * (len(ordered) - 1))
+        return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+    def scale(self) -> float:
+        """Factor applied to configured delays (1.0 until calibrated)"""
+        if not self.calibrated:
+            return 1.0
+        low, high = INPUT_LATENCY_SCALE_LIMITS
+        return min(max(self.percentile() / INPUT_LATENCY_REFERENCE, low), high)
+
+    def delay(self, default: float) -> float:
+        """A configured delay adapted to this device"""
+        return default * self.scale()
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_latency_tracker(device_id: str) -> InputLatencyTracker:
+    """Shared tracker for a device, created on first use"""
+    with _trackers_lock:
+        tracker = _trackers.get(device_id)
+        if tracker is None:
+            tracker = _trackers[device_id] = InputLatencyTracker()
+        return tracker
@@ -0,0 +1,146 @@
+"""
+Per-device input worker
+
+Input commands are queued to one thread per device. Callers get a Future
+back, so fire-and-forget taps do not block the bot loop while the device
+shell round trip completes.
+
+Commands run in submission order within a priority; battle-critical input
+(card plays) overtakes anything queued at a lower priority. Housekeeping
+commands are rate limited per device, and a housekeeping tap that is
+already waiting at the same point absorbs duplicates instead of queueing
+them, so repeated deadspace taps cannot pile up behind a slow adb. Taps a
+caller waits for are neither merged nor throttled.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import Future
+from config import INPUT_RATE_LIMIT
+from .adb_scheduler import CARD_PLAY, NAVIGATION, adb_priority
+
+PRIORITY_CRITICAL = 0  # Card plays - never merged or rate limited
+PRIORITY_NORMAL = 1  # Taps the caller waits for - never merged or rate limited
+PRIORITY_HOUSEKEEPING = 2  # Fire-and-forget deadspace/fallback taps
+
+
+class InputWorker:
+    """Runs one device's input commands on a dedicated thread"""
+
+    def __init__(
+        self, name: str = "input-worker", rate_limit: float = INPUT_RATE_LIMIT
+    ):
+        self.name = name
+        self.min_interval = 1.0 / rate_limit if rate_limit > 0 else 0.0
+        self._heap = []
+        self._keys = {}  # Coalescing key -> future of the pending command
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self._last_run = 0.0
+        self.coalesced = 0
+        self.throttled = 0
+
+    def start(self):
+        """Start the worker thread (no-op if it is already running)"""
+        with self._condition:
+            if self._thread is not None or self._stopped:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, func, *args, priority: int = PRIORITY_NORMAL, key=None) -> Future:
+        """
+        Queue `func(*args)` behind earlier commands of the same or higher priority.
+
+        Args:
+            priority: PRIORITY_CRITICAL, PRIORITY_NORMAL or PRIORITY_HOUSEKEEPING
+            key: Hashable identity of a housekeeping command; one whose
+                 key matches a command still waiting is merged into it and
+                 gets the same Future (ignored at other priorities)
+
+        Returns:
+            Future: Resolves to func's result (cancelled if the worker stops)
+        """
+        if priority != PRIORITY_HOUSEKEEPING:
+            key = None
+        with self._condition:
+            if self._stopped:
+                future = Future()
+                future.cancel()
+                return future
+            if key is not None and (priority, key) in self._keys:
+                self.coalesced += 1
+                return self._keys[(priority, key)]
+            future = Future()
+            entry = (priority, next(self._counter), future, func, args, key)
+            heapq.heappush(self._heap, entry)
+            if key is not None:
+                self._keys[(priority, key)] = future
+            self._condition.notify()
+        self.start()
+        return future
+
+    @property
+    def pending(self) -> int:
+        """Commands queued but not yet started"""
+        with self._condition:
+            return len(self._heap)
+
+    def _next_command(self):
+        """Pop the next runnable command, waiting out the rate limit"""
+        with self._condition:
+            while True:
+                if self._stopped:
+                    return None
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                priority = self._heap[0][0]
+                wait = self._last_run + self.min_interval - time.monotonic()
+                if priority == PRIORITY_HOUSEKEEPING and wait > 0:
+                    # A more urgent command arriving meanwhile wakes us up
+                    self.throttled += 1
+                    self._condition.wait(wait)
+                    continue
+                entry = heapq.heappop(self._heap)
+                priority, _, _, _, _, key = entry
+                if key is not None:
+                    self._keys.pop((priority, key), None)
+                self._last_run = time.monotonic()
+                return entry
+
+    def _run(self):
+        while True:
+            entry = self._next_command()
+            if entry is None:
+                return
+            priority, _, future, func, args, _ = entry
+            if not future.set_running_or_notify_cancel():
+                continue  # Cancelled while queued
+            # Card plays also go first when the adb server is contended
+            adb_level = CARD_PLAY if priority == PRIORITY_CRITICAL else NAVIGATION
+            try:
+                with adb_priority(adb_level):
+                    result = func(*args)
+                future.set_result(result)
+            except BaseException as e:
+                future.set_exception(e)
+
+    def stop(self, timeout: float = 2.0):
+        """Cancel queued commands and stop after the one in flight"""
+        with self._condition:
+            self._stopped = True
+            thread = self._thread
+            for entry in self._heap:
+                entry[2].cancel()
+            self._heap.clear()
+            self._keys.clear()
+            self._condition.notify_all()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
@@ -4,31 +4,174 @@ MEmu emulator controller implementation
 
 import os
 import time
-import subprocess
-import cv2
 import numpy as np
-from .base import BaseEmulatorController
+from config import (
+    BURST_TAP_STOP_PATH,
+    CAPTURE_FALLBACK_MODE,
+    CAPTURE_MODE,
+    DEVICE_ONLINE_WAIT,
+    TOUCH_INPUT_MODE,
+    USE_PERSISTENT_SHELL,
+)
+from .adb_client import ShellResult
+from .adb_process import deadline_for
+from .adb_scheduler import DISCOVERY, adb_priority, get_adb_scheduler
+from .base import BaseEmulatorController, normalize_taps
+from .device_tracker import get_device_tracker
+from .frame import Frame
+from .shell_session import ShellSession, ShellSessionError
+from .touch_input import get_touch_injector
+from .transport import AdbTransport, create_transport, unscheduled
 
 
 class MemuController(BaseEmulatorController):
     """MEmu emulator controller implementation"""
 
-    def __init__(self, device_id: str, instance_name: str):
+    def __init__(
+        self,
+        device_id: str,
+        instance_name: str,
+        capture_mode: str = CAPTURE_MODE,
+        transport: AdbTransport | None = None,
+        touch_mode: str = TOUCH_INPUT_MODE,
+        capture_only: bool = False,
+    ):
         super().__init__(device_id, instance_name)
+        self.capture_mode = capture_mode
+        self.touch_mode = touch_mode
+        self._touch_injector = None
+        self._touch_missing = False
+        self.transport = transport or create_transport(device_id)
+        # A capture-only controller (capture process) sends no input, so it
+        # needs neither the device shell nor the device tracker
+        self.shell_session = (
+            ShellSession(self.transport)
+            if USE_PERSISTENT_SHELL and not capture_only
+            else None
+        )
         self.screenshots_dir = f"screenshots_{instance_name}"
         os.makedirs(self.screenshots_dir, exist_ok=True)
 
+        # Shared registry replaces a per-frame `adb devices` check
+        self.device_tracker = None
+        if not capture_only:
+            self.device_tracker = get_device_tracker()
+            self.device_tracker.add_listener(self._on_device_state_change)
+            self.device_tracker.watch(device_id)
+
+        if capture_mode != "auto":
+            self.use_capture_backend(capture_mode)
+        elif self.auto_select_capture_backend() is None:
+            print(
+                f"[{instance_name}] No capture backend worked, using {CAPTURE_FALLBACK_MODE}"
+            )
+            self.use_capture_backend(CAPTURE_FALLBACK_MODE)
+
+    def _on_device_state_change(self, device_id: str, old_state: str, new_state: str):
+        """Log state transitions of this controller's device"""
+        if device_id == self.device_id:
+            print(
+                f"[{self.instance_name}] Device state changed: {old_state} -> {new_state}"
+            )
+
+    def _ensure_online(self) -> bool:
+        """Check the cached device state, briefly waiting for a background reconnect"""
+        if self.device_tracker is None or self.device_tracker.is_online(self.device_id):
+            return True
+        state = self.device_tracker.get_state(self.device_id)
+        if self.device_tracker.wait_for_online(self.device_id, DEVICE_ONLINE_WAIT):
+            return True
+        print(f"[{self.instance_name}] Device not online (state: {state})")
+        return False
+
+    def stop(self):
+        """Stop the controller and detach from the device registry"""
+        super().stop()
+        if self.device_tracker is not None:
+            self.device_tracker.remove_listener(self._on_device_state_change)
+            self.device_tracker.unwatch(self.device_id)
+        if self.shell_session is not None:
+            self.shell_session.close()
+
+    def reconnect(self) -> bool:
+        """Drop the device shell (restarted by the next command) and reconnect adb"""
+        if self.shell_session is not None:
+            self.shell_session.close()
+        try:
+            return self.transport.connect()
+        except Exception as e:
+            print(f"[{self.instance_name}] Error reconnecting: {e}")
+            return False
+
+    def _run_input(
+        self, command: str, timeout: float | None = None, scheduled: bool = True
+    ) -> ShellResult:
+        """
+        Run an input command through the persistent shell, if enabled.
+
+        Short commands hold an adb slot while they run. A long device-side
+        loop (a burst) passes scheduled=False: holding a slot for its whole
+        run would starve every other device's captures and taps.
+        """
+        if self.shell_session is not None:
+            try:
+                if not scheduled:
+                    return self.shell_session.run(command, timeout)
+                # The open stream bypasses ScheduledTransport; take the slot
+                # here so card plays keep their priority on this path too
+                with get_adb_scheduler().slot():
+                    return self.shell_session.run(command, timeout)
+            except ShellSessionError as e:
+                print(f"[{self.instance_name}] Shell session error: {e}")
+                if e.command_sent:
+                    return ShellResult(-1, "", str(e))
+        # Session unavailable - fall back to a one-shot shell command
+        transport = self.transport if scheduled else unscheduled(self.transport)
+        return transport.shell(command, timeout=timeout)
+
+    def _touch(self):
+        """
+        Raw-event injector when TOUCH_INPUT_MODE is "sendevent" (found lazily).
+
+        Until a touchscreen is found, input goes through the input tool;
+        discovery is retried after TOUCH_DISCOVERY_RETRY.
+        """
+        if self.touch_mode != "sendevent":
+            return None
+        if self._touch_injector is None:
+            with adb_priority(DISCOVERY):
+                self._touch_injector = get_touch_injector(
+                    self.device_id, self.transport
+                )
+            if self._touch_injector is None and not self._touch_missing:
+                print(
+                    f"[{self.instance_name}] No touchscreen found, using the input tool"
+                )
+            elif self._touch_injector is not None and self._touch_missing:
+                print(f"[{self.instance_name}] Touchscreen found, using raw events")
+            self._touch_missing = self._touch_injector is None
+        return self._touch_injector
+
+    def _tap_command(self, x: int, y: int) -> str:
+        touch = self._touch()
+        if touch is not None:
+            return touch.tap_command(x, y)
+        return f"input tap {x} {y}"
+
+    def _swipe_command(self, x1: int, y1: int, x2: int, y2: int, duration: int) -> str:
+        touch = self._touch()
+        if touch is not None:
+            return touch.swipe_command(x1, y1, x2, y2, duration)
+        return f"input swipe {x1} {y1} {x2} {y2} {duration}"
+
     def click(self, x: int, y: int, clicks: int = 1, interval: float = 0.1) -> bool:
         """Send a tap command to this emulator via ADB"""
+        if not self._ensure_online():
+            return False
         try:
             for _ in range(clicks):
-                result = subprocess.run(
-                    f"adb -s {self.device_id} shell input tap {x} {y}",
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                )
-                if result.returncode != 0:
+                result = self._run_input(self._tap_command(x, y))
+                if result.exit_code != 0:
                     print(
                         f"[{self.instance_name}] Failed to tap screen at ({x}, {y}): {result.stderr}"
                     )
@@ -42,103 +185,106 @@ class MemuController(BaseEmulatorController):
             print(f"[{self.instance_name}] Error tapping screen: {e}")
             return False
 
-    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration: int = 1000) -> bool:
-        """Swipe on the emulator screen"""
+    def tap_sequence(self, taps) -> bool:
+        """Send all taps in one shell command, sleeping between them on the device"""
+        if not self._ensure_online():
+            return False
+        steps = []
+        for x, y, delay in normalize_taps(taps):
+            steps.append(self._tap_command(x, y))
+            if delay > 0:
+                steps.append(f"sleep {delay:g}")
+        if not steps:
+            return True
         try:
-            result = subprocess.run(
-                f"adb -s {self.device_id} shell input swipe {x1} {y1} {x2} {y2} {duration}",
-                shell=True,
-                capture_output=True,
-                text=True,
-            )
-            if result.returncode == 0:
-                return True
-            else:
-                print(f"[{self.instance_name}] Failed to swipe: {result.stderr}")
+            # && stops the sequence at the first failed tap
+            result = self._run_input(" && ".join(steps))
+            if result.exit_code != 0:
+                print(
+                    f"[{self.instance_name}] Failed to send tap sequence: {result.stderr}"
+                )
                 return False
+            return True
         except Exception as e:
-            print(f"[{self.instance_name}] Error swiping: {e}")
+            print(f"[{self.instance_name}] Error sending tap sequence: {e}")
             return False
 
-    def screenshot(self) -> np.ndarray | None:
-        """Take screenshot via ADB and load it into memory"""
-        try:
-            # First check if device is still online
-            devices_result = subprocess.run(
-                "adb devices", shell=True, capture_output=True, text=True
-            )
-            if f"{self.device_id}\tdevice" not in devices_result.stdout:
-                if f"{self.device_id}\toffline" in devices_result.stdout:
-                    print(
-                        f"[{self.instance_name}] Device is offline - attempting reconnection..."
-                    )
-                    # Try to reconnect
-                    subprocess.run(
-                        f"adb connect {self.device_id}", shell=True, capture_output=True
-                    )
-                    time.sleep(2)
-                    # Check again
-                    devices_result = subprocess.run(
-                        "adb devices", shell=True, capture_output=True, text=True
-                    )
-                    if f"{self.device_id}\tdevice" not in devices_result.stdout:
-                        print(f"[{self.instance_name}] Failed to reconnect device")
-                        return None
-                else:
-                    print(
-                        f"[{self.instance_name}] Device not found in ADB devices list"
-                    )
-                    return None
-
-            screenshot_path = os.path.join(self.screenshots_dir, "screenshot.png")
-
-            # Remove old screenshot file if it exists to ensure fresh capture
-            if os.path.exists(screenshot_path):
-                os.remove(screenshot_path)
+    def _burst_stop_path(self, burst_id: int) -> str:
+        return f"{BURST_TAP_STOP_PATH}.{os.getpid()}.{burst_id}"
 
-            # Capture screenshot with specific device
-            result = subprocess.run(
-                f"adb -s {self.device_id} shell screencap /sdcard/screenshot.png",
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=10,  # Add timeout to prevent hanging
+    def _run_burst(
+        self, x: int, y: int, n: int, interval: float, burst_id: int
+    ) -> bool:
+        """Run the whole burst as one device-side loop that polls a stop file"""
+        if self._burst_stopped(burst_id) or n <= 0:
+            return True
+        if not self._ensure_online():
+            return False
+        stop = self._burst_stop_path(burst_id)
+        # A stop that lands after its burst ended leaves its file behind;
+        # clear those of earlier bursts, but never a stop aimed at this one.
+        # The subshell keeps `exit` from closing the persistent shell
+        command = (
+            f"for f in {BURST_TAP_STOP_PATH}.{os.getpid()}.*; do "
+            f'[ "$f" = {stop} ] || rm -f "$f"; done; '
+            f"(i=0; while [ $i -lt {n} ] && [ ! -e {stop} ]; do "
+            f"{self._tap_command(x, y)} || exit 1; sleep {interval:g}; "
+            f"i=$((i+1)); done); c=$?; rm -f {stop}; [ $c -eq 0 ]"
+        )
+        try:
+            result = self._run_input(
+                command, n * interval + deadline_for("input"), scheduled=False
             )
-            if result.returncode != 0:
+            if result.exit_code != 0:
                 print(
-                    f"[{self.instance_name}] Failed to capture screenshot: {result.stderr}"
+                    f"[{self.instance_name}] Failed to burst tap at ({x}, {y}): {result.stderr}"
                 )
-                return None
+                return False
+            return True
+        except Exception as e:
+            print(f"[{self.instance_name}] Error burst tapping: {e}")
+            return False
 
-            # Small delay to ensure screenshot is ready on device
-            time.sleep(0.05)
+    def _signal_burst_stop(self, burst_id: int):
+        """
+        Create the stop file from a separate shell; the burst owns the input one.
 
-            # Download screenshot with specific device
-            result = subprocess.run(
-                f"adb -s {self.device_id} pull /sdcard/screenshot.png {screenshot_path}",
-                shell=True,
-                capture_output=True,
-                text=True,
+        The touch skips the scheduler queue: when other devices' work holds
+        every adb slot, a queued stop would only arrive after the burst.
+        """
+        try:
+            unscheduled(self.transport).shell(
+                f"touch {self._burst_stop_path(burst_id)}"
             )
-            if result.returncode != 0:
-                print(
-                    f"[{self.instance_name}] Failed to download screenshot: {result.stderr}"
-                )
-                return None
+        except Exception as e:
+            print(f"[{self.instance_name}] Failed to stop burst tap: {e}")
 
-            # Load image
-            if not os.path.exists(screenshot_path):
-                print(
-                    f"[{self.instance_name}] Screenshot file not found after download"
-                )
-                return None
+    def swipe(self, x1: int, y1: int, x2: int, y2: int, duration: int = 1000) -> bool:
+        """Swipe on the emulator screen"""
+        if not self._ensure_online():
+            return False
+        try:
+            result = self._run_input(self._swipe_command(x1, y1, x2, y2, duration))
+            if result.exit_code == 0:
+                return True
+            else:
+                print(f"[{self.instance_name}] Failed to swipe: {result.stderr}")
+                return False
+        except Exception as e:
+            print(f"[{self.instance_name}] Error swiping: {e}")
+            return False
 
-            screenshot = cv2.imread(screenshot_path)
-            if screenshot is None:
-                print(f"[{self.instance_name}] Failed to load screenshot image")
-                return None
+    def screenshot(self) -> np.ndarray | None:
+        """Take screenshot via ADB and load it into memory"""
+        frame = self.capture_frame()
+        return frame.image if frame is not None else None
 
-            return screenshot
+    def capture_frame(self, profile=None) -> Frame | None:
+        """Capture a Frame through the selected capture backend"""
+        try:
+            if not self._ensure_online():
+                return None
+            return super().capture_frame(profile)
         except Exception as e:
             print(f"[{self.instance_name}] Error taking screenshot: {e}")
             return None
@@ -147,13 +293,10 @@ class MemuController(BaseEmulatorController):
         """Start Clash Royale app on this emulator instance"""
         try:
             print(f"[{self.instance_name}] Starting app: {package_name}")
-            result = subprocess.run(
-                f"adb -s {self.device_id} shell am start -n {package_name}/com.supercell.titan.GameApp",
-                shell=True,
-                capture_output=True,
-                text=True,
+            result = self.transport.shell(
+                f"am start -n {package_name}/com.supercell.titan.GameApp"
             )
-            return result.returncode == 0
+            return result.exit_code == 0
         except Exception as e:
             print(f"[{self.instance_name}] Error starting app: {e}")
             return False
@@ -163,11 +306,7 @@ class MemuController(BaseEmulatorController):
         try:
             print(f"[{self.instance_name}] Restarting app: {package_name}")
             # Force stop the app
-            subprocess.run(
-                f"adb -s {self.device_id} shell am force-stop {package_name}",
-                shell=True,
-                capture_output=True,
-            )
+            self.transport.shell(f"am force-stop {package_name}")
             time.sleep(2)
             # Start the app
             return self.start_app(package_name)
@@ -0,0 +1,169 @@
+"""
+Persistent interactive shell per device
+
+Keeps one `sh` running on the device and writes commands into it, so input
+injection does not pay for a new adb process/transport per tap. Every
+command is followed by a unique completion marker carrying `$?`, which lets
+the caller know when it finished and whether it succeeded.
+"""
+
+import itertools
+import threading
+import time
+from .adb_client import ShellResult
+from .adb_process import command_kind, deadline_for, record_timeout
+
+_MARKER_PREFIX = "__crbot_done_"
+
+
+class ShellSessionError(Exception):
+    """Raised when a command cannot be completed through the device shell"""
+
+    def __init__(self, message: str, command_sent: bool = False):
+        super().__init__(message)
+        # True when the command reached the shell and may already have run
+        self.command_sent = command_sent
+
+
+class ShellSession:
+    """Long-lived `sh` on the device that accepts one command at a time"""
+
+    def __init__(self, transport, timeout: float | None = None):
+        self.transport = transport
+        self.timeout = timeout
+        self._stream = None
+        self._reader = None
+        self._buffer = bytearray()
+        self._eof = False
+        self._condition = threading.Condition()
+        self._command_lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self.restarts = 0
+
+    @property
+    def alive(self) -> bool:
+        """True while the device shell is running"""
+        return self._stream is not None and not self._eof
+
+    def _start(self):
+        """Spawn a fresh shell and the thread that drains its output"""
+        self._close_stream()
+        stream = self.transport.open_stream("sh")
+        with self._condition:
+            self._stream = stream
+            self._buffer.clear()
+            self._eof = False
+        self._reader = threading.Thread(
+            target=self._read_loop,
+            args=(stream,),
+            name=f"shell-session-{self.transport.device_id}",
+            daemon=True,
+        )
+        self._reader.start()
+
+    def _read_loop(self, stream):
+        """Append shell output to the buffer until the stream ends"""
+        while True:
+            try:
+                chunk = stream.read(65536)
+            except (OSError, ValueError):
+                chunk = b""
+            with self._condition:
+                if stream is not self._stream:
+                    return  # A restart replaced this stream
+                if not chunk:
+                    self._eof = True
+                    self._condition.notify_all()
+                    return
+                self._buffer.extend(chunk)
+                self._condition.notify_all()
+
+    def _close_stream(self):
+        with self._condition:
+            stream, self._stream = self._stream, None
+            self._eof = True
+            self._condition.notify_all()
+        if stream is not None:
+            stream.close()
+
+    def run(self, command: str, timeout: float | None = None) -> ShellResult:
+        """
+        Run one command in the persistent shell.
+
+        Args:
+            command: Single-line shell command
+            timeout: Seconds to wait for the completion marker (default: the
+                session's timeout, else the ADB_TIMEOUTS deadline of the
+                command's kind, as for one-shot adb commands)
+
+        Returns:
+            ShellResult: exit code and combined stdout/stderr
+
+        Raises:
+            ShellSessionError: If the session died and could not be restarted
+        """
+        if "\n" in command:
+            raise ValueError("ShellSession commands must be a single line")
+
+        timeout = timeout or self.timeout or deadline_for(command_kind(command))
+        token = f"{next(self._counter)}_"
+        marker = f"{_MARKER_PREFIX}{token}".encode()
+        # The quotes keep the marker text out of any echoed input
+        line = f'{command} 2>&1; echo "{_MARKER_PREFIX}""{token}$?"\n'.encode()
+
+        with self._command_lock:
+            try:
+                if not self.alive:
+                    self._restart()
+                try:
+                    self._stream.write(line)
+                except OSError:
+                    # The shell died since the last command - restart and resend
+                    self._restart()
+                    self._stream.write(line)
+            except OSError as e:
+                self._close_stream()
+                raise ShellSessionError(f"Cannot start device shell: {e}")
+
+            try:
+                return self._wait_for_marker(marker, command, timeout)
+            except ShellSessionError as e:
+                # The command may still be running; never resend it blindly
+                self._close_stream()
+                raise ShellSessionError(str(e), command_sent=True)
+
+    def _restart(self):
+        """(Re)start the device shell, counting restarts after the first start"""
+        if self._reader is not None:
+            self.restarts += 1
+        self._start()
+
+    def _wait_for_marker(self, marker: bytes, command: str, timeout: float):
+        """Block until the completion marker for `command` arrives"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                index = self._buffer.find(marker)
+                end = self._buffer.find(b"\n", index) if index != -1 else -1
+                if end != -1:
+                    break
+                if self._eof:
+                    raise ShellSessionError("Device shell exited")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    record_timeout(self.transport.device_id, command_kind(command))
+                    raise ShellSessionError(f"Timed out waiting for '{command}'")
+                self._condition.wait(remaining)
+
+            code_start = index + len(marker)
+            output = bytes(self._buffer[:index])
+            code_text = bytes(self._buffer[code_start:end]).strip()
+            del self._buffer[: end + 1]
+
+        exit_code = int(code_text) if code_text.isdigit() else -1
+        return ShellResult(exit_code, output.decode(errors="replace"), "")
+
+    def close(self):
+        """Terminate the device shell"""
+        with self._command_lock:
+            self._close_stream()
@@ -0,0 +1,226 @@
+"""
+Raw touch injection
+
+`input tap` starts the Java `input` tool on the device for every tap, which
+costs hundreds of milliseconds on MEmu. Instead, the touchscreen's evdev
+node is found once with `getevent -pl` and taps/swipes are written to it as
+raw `struct input_event` records with `printf`, through the same persistent
+shell. The escaped event bytes for each coordinate are built once and
+cached.
+
+Screen coordinates are scaled to the touchscreen's axis ranges using the
+display size from `wm size` (portrait orientation is assumed).
+"""
+
+import re
+import struct
+import threading
+import time
+from typing import NamedTuple
+from config import TOUCH_DISCOVERY_RETRY, TOUCH_SWIPE_STEP_MS
+
+EV_SYN, EV_KEY, EV_ABS = 0x00, 0x01, 0x03
+SYN_REPORT, SYN_MT_REPORT = 0, 2
+BTN_TOUCH = 0x14A
+ABS_MT_SLOT = 0x2F
+ABS_MT_POSITION_X, ABS_MT_POSITION_Y = 0x35, 0x36
+ABS_MT_TRACKING_ID = 0x39
+
+_DEVICE_LINE = re.compile(r"add device \d+: (\S+)")
+_AXIS_LINE = re.compile(r"(ABS_MT_\w+)\s*:\s*value -?\d+, min (-?\d+), max (-?\d+)")
+_SIZE_LINE = re.compile(r"(Physical|Override) size: (\d+)x(\d+)")
+_CACHE_SIZE = 4096
+
+
+class TouchScreen(NamedTuple):
+    """What the injector needs to know about one device's touchscreen"""
+
+    path: str
+    x_range: tuple[int, int]
+    y_range: tuple[int, int]
+    display_size: tuple[int, int]
+    multitouch_b: bool  # Slot protocol (tracking IDs) rather than protocol A
+    btn_touch: bool
+    event_size: int  # sizeof(struct input_event): 24 on 64-bit, 16 on 32-bit
+
+
+def parse_getevent(text: str) -> list[dict]:
+    """
+    Parse `getevent -pl` output.
+
+    Returns:
+        list: One dict per device with "path", "axes" {name: (min, max)} and
+        "keys" (set of key names)
+    """
+    devices = []
+    for line in text.splitlines():
+        match = _DEVICE_LINE.search(line)
+        if match:
+            devices.append({"path": match.group(1), "axes": {}, "keys": set()})
+            continue
+        if not devices:
+            continue
+        axis = _AXIS_LINE.search(line)
+        if axis:
+            devices[-1]["axes"][axis.group(1)] = (
+                int(axis.group(2)),
+                int(axis.group(3)),
+            )
+        devices[-1]["keys"].update(re.findall(r"\bBTN_\w+", line))
+    return devices
+
+
+def parse_display_size(text: str) -> tuple[int, int] | None:
+    """(width, height) from `wm size`, preferring an override size"""
+    sizes = {kind: (int(w), int(h)) for kind, w, h in _SIZE_LINE.findall(text)}
+    return sizes.get("Override") or sizes.get("Physical")
+
+
+def _is_touchscreen(device: dict) -> bool:
+    axes = device["axes"]
+    return "ABS_MT_POSITION_X" in axes and "ABS_MT_POSITION_Y" in axes
+
+
+def discover_touchscreen(transport) -> TouchScreen | None:
+    """Find the multitouch device and display size of a device (None if unknown)"""
+    result = transport.shell("getevent -pl")
+    if result.exit_code != 0:
+        return None
+    touch = next(filter(_is_touchscreen, parse_getevent(result.stdout)), None)
+    display_size = parse_display_size(transport.shell("wm size").stdout)
+    if touch is None or display_size is None:
+        return None
+    abi = transport.shell("getprop ro.product.cpu.abi").stdout
+    return TouchScreen(
+        path=touch["path"],
+        x_range=touch["axes"]["ABS_MT_POSITION_X"],
+        y_range=touch["axes"]["ABS_MT_POSITION_Y"],
+        display_size=display_size,
+        multitouch_b="ABS_MT_TRACKING_ID" in touch["axes"],
+        btn_touch="BTN_TOUCH" in touch["keys"],
+        event_size=24 if "64" in abi else 16,
+    )
+
+
+class TouchInjector:
+    """Builds (and caches) shell commands that write raw touch events"""
+
+    def __init__(self, screen: TouchScreen):
+        self.screen = screen
+        self._event = struct.Struct("<qqHHi" if screen.event_size == 24 else "<iiHHi")
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _scale(self, x: int, y: int) -> tuple[int, int]:
+        width, height = self.screen.display_size
+        (x_min, x_max), (y_min, y_max) = self.screen.x_range, self.screen.y_range
+        return (
+            x_min + round(x * (x_max - x_min) / max(width - 1, 1)),
+            y_min + round(y * (y_max - y_min) / max(height - 1, 1)),
+        )
+
+    def _events(self, *events) -> bytes:
+        return b"".join(self._event.pack(0, 0, *event) for event in events)
+
+    def _down(self, x: int, y: int) -> bytes:
+        x, y = self._scale(x, y)
+        events = []
+        if self.screen.multitouch_b:
+            events += [(EV_ABS, ABS_MT_SLOT, 0), (EV_ABS, ABS_MT_TRACKING_ID, 1)]
+        if self.screen.btn_touch:
+            events.append((EV_KEY, BTN_TOUCH, 1))
+        events += [(EV_ABS, ABS_MT_POSITION_X, x), (EV_ABS, ABS_MT_POSITION_Y, y)]
+        if not self.screen.multitouch_b:
+            events.append((EV_SYN, SYN_MT_REPORT, 0))
+        events.append((EV_SYN, SYN_REPORT, 0))
+        return self._events(*events)
+
+    def _move(self, x: int, y: int) -> bytes:
+        x, y = self._scale(x, y)
+        events = [(EV_ABS, ABS_MT_POSITION_X, x), (EV_ABS, ABS_MT_POSITION_Y, y)]
+        if not self.screen.multitouch_b:
+            events.append((EV_SYN, SYN_MT_REPORT, 0))
+        events.append((EV_SYN, SYN_REPORT, 0))
+        return self._events(*events)
+
+    def _up(self) -> bytes:
+        events = []
+        if self.screen.multitouch_b:
+            events.append((EV_ABS, ABS_MT_TRACKING_ID, -1))
+        if self.screen.btn_touch:
+            events.append((EV_KEY, BTN_TOUCH, 0))
+        if not self.screen.multitouch_b:
+            events.append((EV_SYN, SYN_MT_REPORT, 0))
+        events.append((EV_SYN, SYN_REPORT, 0))
+        return self._events(*events)
+
+    def _write(self, data: bytes) -> str:
+        # Octal escapes are understood by every printf; one write per command
+        escaped = "".join(f"\\{byte:03o}" for byte in data)
+        return f"printf '{escaped}' > {self.screen.path}"
+
+    def _cached(self, key, build) -> str:
+        with self._lock:
+            command = self._cache.get(key)
+            if command is None:
+                if len(self._cache) >= _CACHE_SIZE:
+                    self._cache.clear()
+                command = self._cache[key] = build()
+            return command
+
+    def tap_command(self, x: int, y: int) -> str:
+        """Shell command tapping (x, y) in screen coordinates"""
+        return self._cached(
+            ("tap", x, y), lambda: self._write(self._down(x, y) + self._up())
+        )
+
+    def _move_command(self, x: int, y: int) -> str:
+        return self._cached(("move", x, y), lambda: self._write(self._move(x, y)))
+
+    def swipe_command(self, x1: int, y1: int, x2: int, y2: int, duration: int) -> str:
+        """Shell command dragging from (x1, y1) to (x2, y2) over `duration` ms"""
+        steps = max(duration // TOUCH_SWIPE_STEP_MS, 1)
+        pause = f"sleep {duration / steps / 1000:g}"
+        parts = [
+            self._cached(("down", x1, y1), lambda: self._write(self._down(x1, y1)))
+        ]
+        for step in range(1, steps + 1):
+            parts.append(pause)
+            parts.append(
+                self._move_command(
+                    x1 + round((x2 - x1) * step / steps),
+                    y1 + round((y2 - y1) * step / steps),
+                )
+            )
+        parts.append(self._cached("up", lambda: self._write(self._up())))
+        return " && ".join(parts)
+
+
+_screens = {}
+_failed_at = {}  # Device -> when its last discovery found no touchscreen
+_screens_lock = threading.Lock()
+
+
+def get_touch_injector(
+    device_id: str, transport, retry_after: float = TOUCH_DISCOVERY_RETRY
+) -> TouchInjector | None:
+    """
+    Injector for a device, discovering its touchscreen once per process.
+
+    A failed discovery (device still booting, shell hiccup) is not cached:
+    it is retried once `retry_after` seconds have passed, and None is
+    returned meanwhile.
+    """
+    with _screens_lock:
+        screen = _screens.get(device_id)
+        if screen is None:
+            failed_at = _failed_at.get(device_id)
+            if failed_at is not None and time.monotonic() - failed_at < retry_after:
+                return None
+            screen = discover_touchscreen(transport)
+            if screen is None:
+                _failed_at[device_id] = time.monotonic()
+                return None
+            _screens[device_id] = screen
+            _failed_at.pop(device_id, None)
+    return TouchInjector(screen)
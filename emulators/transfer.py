@@ -0,0 +1,195 @@
+"""
+Adaptive transfer encoding for raw captures
+
+With many emulators behind one adb server, shipping ~1 MB raw frames can
+saturate the transport, while compressing on the device (`gzip -1`) trades
+bytes for CPU - and the emulators share the host's cores. Neither choice
+wins everywhere, so each capture path measures both under the current load
+and keeps the one that maximises the fleet's total frame rate:
+
+    fps(mode) = min(1 / seconds_per_frame, cpu_share / host_cpu_per_frame)
+
+where cpu_share is the idle host CPU divided among the active capture
+paths. A saturated link shows up as slower raw frames; a busy host shows
+up as less CPU headroom, which penalises decompression. The other modes
+are re-measured every TRANSFER_REEVALUATE_INTERVAL seconds.
+"""
+
+import os
+import threading
+import time
+import zlib
+from config import (
+    TRANSFER_MAX_FAILURES,
+    TRANSFER_MODES,
+    TRANSFER_PROBE_SAMPLES,
+    TRANSFER_REEVALUATE_INTERVAL,
+)
+
+_INFLATE_CHUNK = 256 * 1024
+_EWMA_WEIGHT = 0.2
+
+
+class HostCpuMonitor:
+    """Estimates idle host CPU cores without extra dependencies"""
+
+    def __init__(self, window: float = 1.0):
+        self.window = window
+        self.cores = os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._last_wall = time.monotonic()
+        self._last_cpu = time.process_time()
+        self._headroom = float(self.cores)
+
+    def headroom(self) -> float:
+        """Idle cores: our own CPU use, or the load average where it exists"""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_wall >= self.window:
+                cpu = time.process_time()
+                busy = (cpu - self._last_cpu) / (now - self._last_wall)
+                if hasattr(os, "getloadavg"):
+                    busy = max(busy, os.getloadavg()[0])
+                self._headroom = max(self.cores - busy, 0.25)
+                self._last_wall, self._last_cpu = now, cpu
+            return self._headroom
+
+
+host_cpu = HostCpuMonitor()
+
+
+class _ModeStats:
+    __slots__ = ("seconds", "cpu", "samples", "failures")
+
+    def __init__(self):
+        self.seconds = None
+        self.cpu = None
+        self.samples = 0
+        self.failures = 0
+
+    def add(self, seconds: float, cpu: float):
+        if self.seconds is None:
+            self.seconds, self.cpu = seconds, cpu
+        else:
+            self.seconds += _EWMA_WEIGHT * (seconds - self.seconds)
+            self.cpu += _EWMA_WEIGHT * (cpu - self.cpu)
+        self.samples += 1
+        self.failures = 0
+
+
+class TransferSelector:
+    """Picks the transfer mode for one capture path from live measurements"""
+
+    _active = 0
+    _active_lock = threading.Lock()
+
+    def __init__(
+        self,
+        modes: tuple = TRANSFER_MODES,
+        reevaluate_interval: float = TRANSFER_REEVALUATE_INTERVAL,
+        probe_samples: int = TRANSFER_PROBE_SAMPLES,
+        cpu_monitor: HostCpuMonitor = host_cpu,
+    ):
+        self.modes = tuple(modes)
+        self.reevaluate_interval = reevaluate_interval
+        self.probe_samples = probe_samples
+        self.cpu_monitor = cpu_monitor
+        self.stats = {mode: _ModeStats() for mode in self.modes}
+        self.disabled = set()
+        self.current = self.modes[0]
+        self._probe_queue = []
+        self._next_evaluation = 0.0
+        with TransferSelector._active_lock:
+            TransferSelector._active += 1
+        self._closed = False
+
+    def choose(self) -> str:
+        """Mode for the next capture (a probe sample or the current best)"""
+        if not self._probe_queue and time.monotonic() >= self._next_evaluation:
+            self._next_evaluation = time.monotonic() + self.reevaluate_interval
+            self._probe_queue = [
+                mode for mode in self.modes if self._needs_probe(mode)
+            ] * self.probe_samples
+        if self._probe_queue:
+            return self._probe_queue[0]
+        return self.current
+
+    def _needs_probe(self, mode: str) -> bool:
+        """Modes still in use are re-timed, except a current mode already timed"""
+        if mode in self.disabled:
+            return False
+        return mode != self.current or self.stats[mode].seconds is None
+
+    def record(self, mode: str, seconds: float, cpu: float):
+        """Add one successful capture's wall time and host CPU time"""
+        self.stats[mode].add(seconds, cpu)
+        self._advance_probe(mode)
+
+    def failed(self, mode: str):
+        """Count a failed capture; modes that keep failing are dropped"""
+        stats = self.stats[mode]
+        stats.failures += 1
+        if stats.failures >= TRANSFER_MAX_FAILURES and mode != self.modes[0]:
+            self.disabled.add(mode)
+            self._probe_queue = [m for m in self._probe_queue if m != mode]
+        self._advance_probe(mode)
+
+    def _advance_probe(self, mode: str):
+        if self._probe_queue and self._probe_queue[0] == mode:
+            self._probe_queue.pop(0)
+        if not self._probe_queue:
+            self.current = self.best()
+
+    def estimated_fps(self, mode: str) -> float | None:
+        """This path's contribution to the fleet frame rate in `mode`"""
+        stats = self.stats[mode]
+        if stats.seconds is None or mode in self.disabled:
+            return None
+        device_fps = 1.0 / max(stats.seconds, 1e-6)
+        cpu_share = self.cpu_monitor.headroom() / max(TransferSelector._active, 1)
+        cpu_fps = cpu_share / max(stats.cpu, 1e-6)
+        return min(device_fps, cpu_fps)
+
+    def best(self) -> str:
+        estimates = {mode: self.estimated_fps(mode) for mode in self.modes}
+        measured = {mode: fps for mode, fps in estimates.items() if fps is not None}
+        if not measured:
+            return self.current if self.current not in self.disabled else self.modes[0]
+        return max(measured, key=measured.get)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            with TransferSelector._active_lock:
+                TransferSelector._active -= 1
+
+
+class GzipInflater:
+    """Inflates gzip streams into one output buffer reused across frames"""
+
+    def __init__(self):
+        self._out = bytearray()
+
+    def inflate(self, data) -> memoryview:
+        """
+        Decompress a complete gzip stream.
+
+        Returns a view of the reused buffer, valid until the next call.
+
+        Raises:
+            zlib.error: If the stream is corrupt or truncated
+        """
+        inflater = zlib.decompressobj(wbits=31)
+        out = self._out
+        size = 0
+        pending = data
+        while not inflater.eof:
+            chunk = inflater.decompress(pending, _INFLATE_CHUNK)
+            if not chunk and not inflater.unconsumed_tail:
+                raise zlib.error("Truncated gzip stream")
+            # Overwrites in place once the buffer has grown to frame size
+            end = size + len(chunk)
+            out[size:end] = chunk
+            size = end
+            pending = inflater.unconsumed_tail
+        return memoryview(out)[:size]
@@ -0,0 +1,439 @@
+"""
+ADB transports used by the emulator controllers
+
+Both transports expose the same small surface (shell, exec_out, pull,
+connect) so a controller can switch between spawning the `adb` binary and
+talking to the adb server socket without changing its own logic.
+"""
+
+import socket
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from config import ADB_MAX_CONCURRENT, ADB_TRANSPORT
+from .adb_client import (
+    AdbClient,
+    AdbError,
+    AdbServerUnavailable,
+    ShellResult,
+    get_adb_client,
+    grow_buffer,
+)
+from .adb_process import command_kind, deadline_for, record_timeout, run_adb
+from .adb_scheduler import DISCOVERY, AdbScheduler, get_adb_scheduler
+
+
+class DeviceStream(ABC):
+    """Bidirectional byte stream to a long-running command on the device"""
+
+    @abstractmethod
+    def write(self, data: bytes):
+        """Send bytes to the command's stdin"""
+        pass
+
+    @abstractmethod
+    def read(self, size: int) -> bytes:
+        """Read up to `size` bytes of stdout; b"" means the command exited"""
+        pass
+
+    @abstractmethod
+    def close(self):
+        """Terminate the stream"""
+        pass
+
+
+class SocketStream(DeviceStream):
+    """Device stream backed by an adb server socket (exec: service)"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.sock.settimeout(None)
+
+    def write(self, data: bytes):
+        self.sock.sendall(data)
+
+    def read(self, size: int) -> bytes:
+        return self.sock.recv(size)
+
+    def readinto(self, buffer) -> int:
+        return self.sock.recv_into(buffer)
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class ProcessStream(DeviceStream):
+    """Device stream backed by a long-lived adb child process"""
+
+    def __init__(self, process: subprocess.Popen):
+        self.process = process
+
+    def write(self, data: bytes):
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def read(self, size: int) -> bytes:
+        return self.process.stdout.read1(size)
+
+    def readinto(self, buffer) -> int:
+        return self.process.stdout.readinto1(buffer)
+
+    def close(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
+class AdbTransport(ABC):
+    """Common interface for running ADB operations against one device"""
+
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+
+    @abstractmethod
+    def shell(self, command: str, timeout: float | None = None) -> ShellResult:
+        """Run a shell command on the device"""
+        pass
+
+    @abstractmethod
+    def exec_out(self, command: str, timeout: float | None = None) -> bytes | None:
+        """Run a command and return its raw stdout, or None on failure"""
+        pass
+
+    def exec_out_into(
+        self, command: str, buffer: bytearray, timeout: float | None = None
+    ) -> int | None:
+        """
+        Run a command and write its raw stdout into `buffer`.
+
+        A buffer too small for the output is grown (see grow_buffer()).
+        Returns the number of bytes written, or None on failure.
+        """
+        data = self.exec_out(command, timeout=timeout)
+        if data is None:
+            return None
+        grow_buffer(buffer, len(data))
+        buffer[: len(data)] = data
+        return len(data)
+
+    @abstractmethod
+    def pull(
+        self, remote_path: str, local_path: str, timeout: float | None = None
+    ) -> bool:
+        """Copy a device file to the host"""
+        pass
+
+    @abstractmethod
+    def connect(self) -> bool:
+        """Connect the adb server to this (TCP) device"""
+        pass
+
+    @abstractmethod
+    def open_stream(self, command: str) -> DeviceStream:
+        """Start a long-running command with raw stdin/stdout (raises OSError)"""
+        pass
+
+    @abstractmethod
+    def forward(self, local: str, remote: str) -> bool:
+        """Forward a host socket (e.g. "tcp:27183") to a device socket"""
+        pass
+
+    @abstractmethod
+    def remove_forward(self, local: str) -> bool:
+        """Remove the forward of a host socket set up by forward()"""
+        pass
+
+
+class SubprocessTransport(AdbTransport):
+    """Spawns the adb binary for every operation (legacy behaviour)"""
+
+    def shell(self, command: str, timeout: float | None = None) -> ShellResult:
+        try:
+            # Argument list, so `&&`, `;`, `>` and `$…` in `command` are
+            # interpreted by the device shell, not the host's
+            result = run_adb(
+                ["adb", "-s", self.device_id, "shell", command],
+                kind=command_kind(command),
+                device_id=self.device_id,
+                timeout=timeout,
+                text=True,
+            )
+        except subprocess.TimeoutExpired:
+            return ShellResult(-1, "", "Command timeout")
+        except OSError as e:
+            return ShellResult(-1, "", str(e))
+        return ShellResult(result.returncode, result.stdout, result.stderr)
+
+    def exec_out(self, command: str, timeout: float | None = None) -> bytes | None:
+        try:
+            # Argument list, so pipes in `command` run on the device, not the host
+            result = run_adb(
+                ["adb", "-s", self.device_id, "exec-out", command],
+                kind=command_kind(command),
+                device_id=self.device_id,
+                timeout=timeout,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout
+
+    def pull(
+        self, remote_path: str, local_path: str, timeout: float | None = None
+    ) -> bool:
+        try:
+            result = run_adb(
+                ["adb", "-s", self.device_id, "pull", remote_path, local_path],
+                kind="pull",
+                device_id=self.device_id,
+                timeout=timeout,
+                text=True,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+    def connect(self) -> bool:
+        try:
+            result = run_adb(
+                ["adb", "connect", self.device_id],
+                kind="connect",
+                device_id=self.device_id,
+                text=True,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+    def open_stream(self, command: str) -> DeviceStream:
+        # With stdin not attached to a TTY, adb uses a raw (non-PTY) shell
+        process = subprocess.Popen(
+            ["adb", "-s", self.device_id, "shell", command],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        return ProcessStream(process)
+
+    def forward(self, local: str, remote: str) -> bool:
+        try:
+            result = run_adb(
+                ["adb", "-s", self.device_id, "forward", local, remote],
+                kind="connect",
+                device_id=self.device_id,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+    def remove_forward(self, local: str) -> bool:
+        try:
+            result = run_adb(
+                ["adb", "-s", self.device_id, "forward", "--remove", local],
+                kind="connect",
+                device_id=self.device_id,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+
+
+_server_start_lock = threading.Lock()
+
+
+def ensure_adb_server(client: AdbClient) -> bool:
+    """Start the adb server through the binary if the socket is not answering"""
+    with _server_start_lock:
+        if client.wait_for_server(timeout=0):
+            return True
+        try:
+            run_adb(["adb", "start-server"], kind="server")
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return client.wait_for_server(timeout=5)
+
+
+class SocketTransport(AdbTransport):
+    """Talks to the adb server smart-socket protocol without spawning processes"""
+
+    def __init__(self, device_id: str, client: AdbClient | None = None):
+        super().__init__(device_id)
+        self.client = client or get_adb_client()
+
+    def _call(self, operation, *args, kind="default", timeout=None):
+        """Run a client call, starting the adb server once if it is down"""
+        timeout = timeout if timeout is not None else deadline_for(kind)
+        try:
+            try:
+                return operation(self.device_id, *args, timeout=timeout)
+            except AdbServerUnavailable:
+                if not ensure_adb_server(self.client):
+                    raise
+                return operation(self.device_id, *args, timeout=timeout)
+        except TimeoutError:
+            record_timeout(self.device_id, kind)
+            raise
+
+    def shell(self, command: str, timeout: float | None = None) -> ShellResult:
+        try:
+            return self._call(
+                self.client.shell, command, kind=command_kind(command), timeout=timeout
+            )
+        except (AdbError, OSError) as e:
+            return ShellResult(-1, "", str(e))
+
+    def exec_out(self, command: str, timeout: float | None = None) -> bytes | None:
+        try:
+            return self._call(
+                self.client.exec_out,
+                command,
+                kind=command_kind(command),
+                timeout=timeout,
+            )
+        except (AdbError, OSError):
+            return None
+
+    def exec_out_into(
+        self, command: str, buffer: bytearray, timeout: float | None = None
+    ) -> int | None:
+        try:
+            return self._call(
+                self.client.exec_out_into,
+                command,
+                buffer,
+                kind=command_kind(command),
+                timeout=timeout,
+            )
+        except (AdbError, OSError):
+            return None
+
+    def pull(
+        self, remote_path: str, local_path: str, timeout: float | None = None
+    ) -> bool:
+        try:
+            data = self._call(
+                self.client.pull, remote_path, kind="pull", timeout=timeout
+            )
+        except (AdbError, OSError):
+            return False
+        with open(local_path, "wb") as f:
+            f.write(data)
+        return True
+
+    def connect(self) -> bool:
+        try:
+            message = self._call(self.client.connect, kind="connect")
+        except (AdbError, OSError):
+            return False
+        return "connected" in message
+
+    def open_stream(self, command: str) -> DeviceStream:
+        try:
+            sock = self._call(
+                self.client.open_service, f"exec:{command}", kind="connect"
+            )
+        except AdbError as e:
+            raise OSError(f"Cannot open stream for '{command}': {e}")
+        sock.settimeout(None)  # The deadline covers opening; the stream is long-lived
+        return SocketStream(sock)
+
+    def forward(self, local: str, remote: str) -> bool:
+        try:
+            self._call(self.client.forward, local, remote, kind="connect")
+        except (AdbError, OSError):
+            return False
+        return True
+
+    def remove_forward(self, local: str) -> bool:
+        try:
+            self._call(self.client.remove_forward, local, kind="connect")
+        except (AdbError, OSError):
+            return False
+        return True
+
+
+class ScheduledTransport(AdbTransport):
+    """
+    Runs another transport's operations through the fleet-wide AdbScheduler.
+
+    Streams only hold a slot while they are being opened. Commands on the
+    persistent shell take their own slot (MemuController._run_input), except
+    long-running burst loops, which would keep it for seconds; the video
+    stream's traffic is not scheduled.
+    """
+
+    def __init__(self, inner: AdbTransport, scheduler: AdbScheduler | None = None):
+        super().__init__(inner.device_id)
+        self.inner = inner
+        self.scheduler = scheduler or get_adb_scheduler()
+
+    def shell(self, command: str, timeout: float | None = None) -> ShellResult:
+        with self.scheduler.slot():
+            return self.inner.shell(command, timeout=timeout)
+
+    def exec_out(self, command: str, timeout: float | None = None) -> bytes | None:
+        with self.scheduler.slot():
+            return self.inner.exec_out(command, timeout=timeout)
+
+    def exec_out_into(
+        self, command: str, buffer: bytearray, timeout: float | None = None
+    ) -> int | None:
+        with self.scheduler.slot():
+            return self.inner.exec_out_into(command, buffer, timeout=timeout)
+
+    def pull(
+        self, remote_path: str, local_path: str, timeout: float | None = None
+    ) -> bool:
+        with self.scheduler.slot():
+            return self.inner.pull(remote_path, local_path, timeout=timeout)
+
+    def connect(self) -> bool:
+        with self.scheduler.slot(DISCOVERY):
+            return self.inner.connect()
+
+    def open_stream(self, command: str) -> DeviceStream:
+        with self.scheduler.slot():
+            return self.inner.open_stream(command)
+
+    def forward(self, local: str, remote: str) -> bool:
+        with self.scheduler.slot():
+            return self.inner.forward(local, remote)
+
+    def remove_forward(self, local: str) -> bool:
+        with self.scheduler.slot():
+            return self.inner.remove_forward(local)
+
+
+TRANSPORTS = {
+    "subprocess": SubprocessTransport,
+    "socket": SocketTransport,
+}
+
+
+def scheduled(transport: AdbTransport) -> AdbTransport:
+    """Route a transport through the AdbScheduler unless scheduling is disabled"""
+    if ADB_MAX_CONCURRENT > 0 and not isinstance(transport, ScheduledTransport):
+        return ScheduledTransport(transport)
+    return transport
+
+
+def unscheduled(transport: AdbTransport) -> AdbTransport:
+    """The transport under a ScheduledTransport, for work that must not hold a slot"""
+    if isinstance(transport, ScheduledTransport):
+        return transport.inner
+    return transport
+
+
+def create_transport(device_id: str, kind: str = ADB_TRANSPORT) -> AdbTransport:
+    """Create the configured (scheduled) transport for a device"""
+    try:
+        return scheduled(TRANSPORTS[kind](device_id))
+    except KeyError:
+        raise ValueError(f"Unknown ADB transport: {kind}")
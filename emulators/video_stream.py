@@ -0,0 +1,174 @@
+"""
+Continuous video-stream capture
+
+Instead of one `screencap` per tick, the device runs a single long-lived
+encoder (`screenrecord --output-format=h264 -`) whose output is decoded on
+the host. OpenCV's FFmpeg backend cannot read from a Python file object, so
+the encoded bytes are relayed to it over a loopback TCP socket.
+"""
+
+import os
+import socket
+import threading
+import time
+import cv2
+import numpy as np
+from config import CAPTURE_TIMEOUT
+from .frame import Frame
+
+# Decode frames as soon as they arrive instead of buffering for smoothness
+os.environ.setdefault(
+    "OPENCV_FFMPEG_CAPTURE_OPTIONS", "fflags;nobuffer|flags;low_delay"
+)
+
+_RELAY_CHUNK = 64 * 1024
+
+
+class ReplaySource:
+    """Stand-in for a device stream that plays an encoded video file"""
+
+    def __init__(self, path: str, chunk_delay: float = 0.0):
+        self.path = path
+        self.chunk_delay = chunk_delay
+        self._file = open(path, "rb")
+
+    def write(self, data: bytes):
+        pass
+
+    def read(self, size: int) -> bytes:
+        if self.chunk_delay:
+            time.sleep(self.chunk_delay)
+        if self._file.closed:
+            return b""
+        return self._file.read(size)
+
+    def close(self):
+        self._file.close()
+
+
+class VideoStream:
+    """
+    Decodes an encoded screen stream one frame at a time.
+
+    `open_source` returns a readable stream (a DeviceStream or ReplaySource).
+    When the stream ends - screenrecord stops after its time limit - the next
+    read_frame() call transparently starts a new one.
+    """
+
+    def __init__(
+        self,
+        open_source,
+        name: str = "video-stream",
+        timeout: float = CAPTURE_TIMEOUT,
+    ):
+        self.open_source = open_source
+        self.name = name
+        self.timeout = timeout
+        self._capture = None
+        self._source = None
+        self._server = None
+        self._relay_thread = None
+        self._lock = threading.Lock()
+        self.restarts = 0
+        self.frames = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self._capture is not None
+
+    def _relay(self, server: socket.socket, source):
+        """Pump encoded bytes from the device stream to the decoder"""
+        try:
+            conn, _ = server.accept()
+        except OSError:
+            return
+        with conn:
+            try:
+                while True:
+                    chunk = source.read(_RELAY_CHUNK)
+                    if not chunk:
+                        break
+                    conn.sendall(chunk)
+            except OSError:
+                pass  # Decoder went away or the stream was closed
+        source.close()
+
+    def open(self) -> bool:
+        """Start the encoder stream and attach a decoder to it"""
+        with self._lock:
+            if self._capture is not None:
+                return True
+            try:
+                source = self.open_source()
+            except OSError as e:
+                print(f"[{self.name}] Failed to start video stream: {e}")
+                return False
+
+            server = socket.create_server(("127.0.0.1", 0))
+            server.settimeout(self.timeout)
+            port = server.getsockname()[1]
+            self._relay_thread = threading.Thread(
+                target=self._relay,
+                args=(server, source),
+                name=f"{self.name}-relay",
+                daemon=True,
+            )
+            self._relay_thread.start()
+
+            timeout_ms = int(self.timeout * 1000)
+            capture = cv2.VideoCapture(
+                f"tcp://127.0.0.1:{port}",
+                cv2.CAP_FFMPEG,
+                [
+                    cv2.CAP_PROP_OPEN_TIMEOUT_MSEC,
+                    timeout_ms,
+                    cv2.CAP_PROP_READ_TIMEOUT_MSEC,
+                    timeout_ms,
+                ],
+            )
+            if not capture.isOpened():
+                print(f"[{self.name}] Decoder could not open the video stream")
+                capture.release()
+                source.close()
+                server.close()
+                return False
+
+            self._source = source
+            self._server = server
+            self._capture = capture
+            return True
+
+    def read_frame(self) -> np.ndarray | None:
+        """Block until the next decoded BGR frame (None when the stream ended)"""
+        if self._capture is None and not self.open():
+            return None
+        capture = self._capture
+        if capture is None:
+            return None  # Closed from another thread
+        ok, image = capture.read()
+        if not ok or image is None:
+            self.close()
+            self.restarts += 1
+            return None
+        self.frames += 1
+        return image
+
+    def read(self) -> Frame | None:
+        """read_frame() wrapped in a Frame stamped with the decode time"""
+        image = self.read_frame()
+        if image is None:
+            return None
+        return Frame(image, backend="video")
+
+    def close(self):
+        """Stop the encoder stream and the decoder"""
+        with self._lock:
+            capture, self._capture = self._capture, None
+            source, self._source = self._source, None
+            server, self._server = self._server, None
+        if source is not None:
+            source.close()
+        if server is not None:
+            server.close()
+        if capture is not None:
+            capture.release()
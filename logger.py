@@ -57,6 +57,21 @@ class Logger:
             "failures": 0,
             "restarts": 0,
             "last_activity": "Starting",
+            # Frame timing stats
+            "frames_timed": 0,
+            "avg_capture_ms": 0.0,
+            "avg_decision_latency_ms": 0.0,
+            # Card play input timing (select + place)
+            "card_plays_timed": 0,
+            "avg_card_play_ms": 0.0,
+            "card_placement_mode": "tap",
+            "transition_waits": 0,
+            "wait_time_saved": 0.0,
+            "input_latency_samples": 0,
+            "input_latency_p50_ms": 0.0,
+            "input_latency_p90_ms": 0.0,
+            "adb_timeouts": 0,
+            "adb_timeouts_by_kind": {},
         }
 
         # Action system for user interaction
@@ -135,6 +150,11 @@ class Logger:
                 losses=self.stats["losses"],
                 cards_played=self.stats["cards_played"],
                 restarts=self.stats["restarts"],
+                capture_ms=self.stats["avg_capture_ms"],
+                card_play_ms=self.stats["avg_card_play_ms"],
+                input_latency_ms=self.stats["input_latency_p50_ms"],
+                wait_saved=self.stats["wait_time_saved"],
+                adb_timeouts=self.stats["adb_timeouts"],
             )
 
     # Battle stat methods
@@ -212,6 +232,52 @@ class Logger:
         self.log(f"🔄 App restart recorded. Total restarts: {self.stats['restarts']}")
         self._update_console_stats()
 
+    def record_frame_latency(self, frame):
+        """Record capture time and capture-to-decision latency of a Frame"""
+        if frame is None or not hasattr(frame, "capture_start"):
+            return
+        count = self.stats["frames_timed"] + 1
+        capture_ms = frame.capture_duration * 1000
+        decision_ms = (time.monotonic() - frame.capture_start) * 1000
+
+        # Running averages so long sessions don't keep every sample
+        self.stats["avg_capture_ms"] += (capture_ms - self.stats["avg_capture_ms"]) / count
+        self.stats["avg_decision_latency_ms"] += (
+            decision_ms - self.stats["avg_decision_latency_ms"]
+        ) / count
+        self.stats["frames_timed"] = count
+        self._update_console_stats()
+
+    def record_card_play_latency(self, seconds: float, placement_mode: str = "tap"):
+        """Record how long sending one card play (select + place) took"""
+        self.stats["card_placement_mode"] = placement_mode
+        count = self.stats["card_plays_timed"] + 1
+        self.stats["avg_card_play_ms"] += (
+            seconds * 1000 - self.stats["avg_card_play_ms"]
+        ) / count
+        self.stats["card_plays_timed"] = count
+        self._update_console_stats()
+
+    def record_wait_saved(self, seconds: float):
+        """Record time a transition-aware wait saved over its fixed sleep"""
+        self.stats["transition_waits"] += 1
+        self.stats["wait_time_saved"] += seconds
+        self._update_console_stats()
+
+    def record_input_latency(self, p50: float, p90: float, samples: int):
+        """Record the device's current tap-to-visible-change latency estimate"""
+        self.stats["input_latency_samples"] = samples
+        self.stats["input_latency_p50_ms"] = p50 * 1000
+        self.stats["input_latency_p90_ms"] = p90 * 1000
+        self._update_console_stats()
+
+    def record_adb_timeout(self, kind: str):
+        """Record an adb command killed at its deadline"""
+        self.stats["adb_timeouts"] += 1
+        by_kind = self.stats["adb_timeouts_by_kind"]
+        by_kind[kind] = by_kind.get(kind, 0) + 1
+        self._update_console_stats()
+
     # Action system for user interaction
     def request_user_action(self, text: str, callback_function=None):
         """Request user action with callback"""
@@ -259,4 +325,32 @@ class Logger:
             self.log(f"Cards Upgraded: {stats['cards_upgraded']}")
             self.log(f"App Restarts: {stats['restarts']}")
             self.log(f"Failures: {stats['failures']}")
+            if stats["frames_timed"]:
+                self.log(
+                    f"Frame Timing: capture {stats['avg_capture_ms']:.0f}ms, "
+                    f"capture-to-decision {stats['avg_decision_latency_ms']:.0f}ms"
+                )
+            if stats["card_plays_timed"]:
+                self.log(
+                    f"Card Play Input ({stats['card_placement_mode']}): "
+                    f"{stats['avg_card_play_ms']:.0f}ms avg "
+                    f"over {stats['card_plays_timed']} plays"
+                )
+            if stats["input_latency_samples"]:
+                self.log(
+                    f"Input Latency: p50 {stats['input_latency_p50_ms']:.0f}ms, "
+                    f"p90 {stats['input_latency_p90_ms']:.0f}ms "
+                    f"over {stats['input_latency_samples']} samples"
+                )
+            if stats["transition_waits"]:
+                self.log(
+                    f"Transition Waits: {stats['wait_time_saved']:.0f}s saved "
+                    f"over {stats['transition_waits']} taps"
+                )
+            if stats["adb_timeouts"]:
+                kinds = ", ".join(
+                    f"{kind} {count}"
+                    for kind, count in sorted(stats["adb_timeouts_by_kind"].items())
+                )
+                self.log(f"ADB Timeouts: {stats['adb_timeouts']} ({kinds})")
             self.log("=" * 50)
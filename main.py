@@ -2,7 +2,6 @@
 Main entry point for the Multi-MEmu Clash Royale Bot
 """
 
-import os
 import time
 import signal
 import subprocess
@@ -12,8 +11,12 @@ from emulator_bot import EmulatorBot
 from battle_runner import BattleRunner
 from war_runner import WarRunner
 from emulator_utils import detect_memu_instances
-from config import REF_IMAGES
+from config import CAPTURE_PROCESSES
 from console_display import console_display
+from emulators.adb_process import run_adb
+from emulators.adb_scheduler import get_adb_scheduler
+from emulators.frame_bus import FrameBus
+from template_store import get_template_store
 
 
 # Global variable to handle graceful shutdown
@@ -33,11 +36,10 @@ def signal_handler(signum, frame):
 
 
 def verify_template_images():
-    """Verify that all required template images exist"""
-    missing_templates = []
-    for name, path in REF_IMAGES.items():
-        if not os.path.exists(path):
-            missing_templates.append(f"{name}: {path}")
+    """Load every template image once and verify that none are missing"""
+    missing_templates = [
+        f"{name}: {path}" for name, path in get_template_store().missing.items()
+    ]
 
     if missing_templates:
         print("ERROR: Missing template images:")
@@ -150,6 +152,19 @@ def run_battlepass_mode(instances, logger_callback=None):
             print("All battlepass claiming bots stopped. Goodbye!")
 
 
+def start_frame_source(device_id, instance_name, frame_buses):
+    """Start a capture process for an emulator when CAPTURE_PROCESSES is enabled"""
+    if not CAPTURE_PROCESSES:
+        return None
+    # One adb slot cap for the bots and every capture process
+    bus = FrameBus(
+        device_id, instance_name, adb_slots=get_adb_scheduler().shared_slots()
+    )
+    bus.start()
+    frame_buses.append(bus)
+    return bus.reader()
+
+
 def run_war_mode(instances, max_battles=0, no_gui=False, logger_callback=None):
     """Run the bot in clan war mode"""
     print(f"\n⚔️ WAR MODE: Will play clan wars on {len(instances)} MEmu instance(s)")
@@ -163,6 +178,7 @@ def run_war_mode(instances, max_battles=0, no_gui=False, logger_callback=None):
     # Create bot instances
     bots = []
     war_runners = []
+    frame_buses = []
     for i, instance in enumerate(instances):
         # Handle both old and new instance formats
         if isinstance(instance, dict):
@@ -179,6 +195,7 @@ def run_war_mode(instances, max_battles=0, no_gui=False, logger_callback=None):
                 instance_name,
                 use_console_display=not no_gui and logger_callback is None,
                 logger_callback=logger_callback,
+                frame_source=start_frame_source(device_id, instance_name, frame_buses),
             )
         else:
             device_id, instance_name = instance
@@ -187,6 +204,7 @@ def run_war_mode(instances, max_battles=0, no_gui=False, logger_callback=None):
                 instance_name,
                 use_console_display=not no_gui and logger_callback is None,
                 logger_callback=logger_callback,
+                frame_source=start_frame_source(device_id, instance_name, frame_buses),
             )
 
         runner = WarRunner(bot, lambda: shutdown_requested, max_battles=max_battles)
@@ -228,6 +246,13 @@ def run_war_mode(instances, max_battles=0, no_gui=False, logger_callback=None):
             # Wait for threads to finish
             executor.shutdown(wait=True)
 
+            # Stop capture processes
+            for bus in frame_buses:
+                bus.stop()
+
+            # Queue depth and wait times of the shared adb server
+            print(get_adb_scheduler().report())
+
             # Show final summary
             if not no_gui:
                 console_display.print_final_summary()
@@ -250,6 +275,7 @@ def run_battle_mode(instances, max_battles=0, no_gui=False, logger_callback=None
     # Create bot instances
     bots = []
     battle_runners = []
+    frame_buses = []
     for i, instance in enumerate(instances):
         # Handle both old and new instance formats
         if isinstance(instance, dict):
@@ -268,6 +294,7 @@ def run_battle_mode(instances, max_battles=0, no_gui=False, logger_callback=None
                 instance_name,
                 use_console_display=not no_gui and logger_callback is None,
                 logger_callback=logger_callback,
+                frame_source=start_frame_source(device_id, instance_name, frame_buses),
             )
         else:
             # Legacy format (device_id, instance_name)
@@ -277,6 +304,7 @@ def run_battle_mode(instances, max_battles=0, no_gui=False, logger_callback=None
                 instance_name,
                 use_console_display=not no_gui and logger_callback is None,
                 logger_callback=logger_callback,
+                frame_source=start_frame_source(device_id, instance_name, frame_buses),
             )
 
         runner = BattleRunner(bot, lambda: shutdown_requested, max_battles=max_battles)
@@ -320,6 +348,13 @@ def run_battle_mode(instances, max_battles=0, no_gui=False, logger_callback=None
             # Wait for threads to finish
             executor.shutdown(wait=True)
 
+            # Stop capture processes
+            for bus in frame_buses:
+                bus.stop()
+
+            # Queue depth and wait times of the shared adb server
+            print(get_adb_scheduler().report())
+
             # Show final summary
             if not no_gui:
                 console_display.print_final_summary()
@@ -361,6 +396,7 @@ def main(mode="battle", **kwargs):
 
         from config import MEMU_PORTS
         from emulator_utils import test_device_responsiveness
+        from emulators.transport import create_transport
 
         print(f"🔍 Checking {len(MEMU_PORTS)} potential MEmu ports...")
 
@@ -370,7 +406,7 @@ def main(mode="battle", **kwargs):
             instance_name = f"MEmu_{i + 1}"
 
             # Try to connect first
-            subprocess.run(f"adb connect {device_id}", shell=True, capture_output=True)
+            create_transport(device_id).connect()
             time.sleep(0.5)
 
             # Test responsiveness
@@ -412,7 +448,10 @@ def main(mode="battle", **kwargs):
 
         # Try to connect to the MEmu instance
         print(f"Connecting to MEmu instance at {device_id}...")
-        subprocess.run(f"adb connect {device_id}", shell=True, capture_output=True)
+        try:
+            run_adb(["adb", "connect", device_id], kind="connect", device_id=device_id)
+        except (OSError, subprocess.TimeoutExpired):
+            pass  # The responsiveness check below reports the failure
         time.sleep(1)  # Give it a moment to establish connection
 
         # Validate the connection
@@ -438,9 +477,7 @@ def main(mode="battle", **kwargs):
         print(f"Looking for {num_emulators} available MEmu instance(s)...")
 
         try:
-            result = subprocess.run(
-                "adb devices", shell=True, capture_output=True, text=True
-            )
+            result = run_adb(["adb", "devices"], kind="devices", text=True)
             if result.returncode != 0:
                 print("❌ Failed to get ADB devices list")
                 return
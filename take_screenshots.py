@@ -3,16 +3,17 @@ Script to take screenshots from all available MEmu devices
 Saves screenshots to screenshots folder with device name
 """
 
-import subprocess
 import os
 import time
 from datetime import datetime
 from config import MEMU_PORTS
+from emulators.adb_process import run_adb
+from emulators.transport import create_transport
 
 def get_connected_devices():
     """Get list of connected ADB devices"""
     try:
-        result = subprocess.run(['adb', 'devices'], capture_output=True, text=True)
+        result = run_adb(['adb', 'devices'], kind="devices", text=True)
         lines = result.stdout.strip().split('\n')[1:]  # Skip header
         devices = []
         for line in lines:
@@ -38,33 +39,18 @@ def take_screenshot_from_device(device_id, output_folder):
         
         print(f"Taking screenshot from {device_id}...")
         
-        # Take screenshot on device
-        subprocess.run(
-            ['adb', '-s', device_id, 'shell', 'screencap', '-p', '/sdcard/screenshot.png'],
-            check=True,
-            capture_output=True
-        )
-        
-        # Pull screenshot to PC
-        subprocess.run(
-            ['adb', '-s', device_id, 'pull', '/sdcard/screenshot.png', output_path],
-            check=True,
-            capture_output=True
-        )
-        
-        # Clean up screenshot on device
-        subprocess.run(
-            ['adb', '-s', device_id, 'shell', 'rm', '/sdcard/screenshot.png'],
-            check=False,
-            capture_output=True
-        )
+        # Stream the PNG straight to the PC (no temp file on the device)
+        png_data = create_transport(device_id).exec_out("screencap -p", timeout=15)
+        if not png_data:
+            print(f"✗ Failed to take screenshot from {device_id}")
+            return False
+
+        with open(output_path, 'wb') as f:
+            f.write(png_data)
         
         print(f"✓ Screenshot saved: {output_path}")
         return True
         
-    except subprocess.CalledProcessError as e:
-        print(f"✗ Failed to take screenshot from {device_id}: {e}")
-        return False
     except Exception as e:
         print(f"✗ Error with {device_id}: {e}")
         return False
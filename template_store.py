@@ -0,0 +1,134 @@
+"""
+Process-wide template image store
+
+Every REF_IMAGES entry is read and decoded once, the first time the store
+is used, and shared read-only by all detectors. File names are matched
+case-insensitively (templates/RampUp.png finds templates/rampup.png), and a
+template that cannot be loaded is reported once and then remembered as
+missing instead of being looked up on disk again on every match.
+
+Templates adapted to a reduced capture profile (scaled, grayscale) are
+built on first use and kept alongside the originals.
+"""
+
+import os
+import threading
+from types import MappingProxyType
+
+import cv2
+from config import REF_IMAGES
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def resolve_template_path(path):
+    """
+    Find a template file, tolerating differences in file name case.
+
+    Relative paths are tried against the working directory, then the
+    project directory.
+
+    Returns:
+        str | None: Path of the existing file, or None
+    """
+    candidates = [path]
+    if not os.path.isabs(path):
+        candidates.append(os.path.join(PROJECT_DIR, path))
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+    for candidate in candidates:
+        directory, name = os.path.split(candidate)
+        try:
+            entries = os.listdir(directory or ".")
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.lower() == name.lower():
+                return os.path.join(directory, entry)
+    return None
+
+
+def _read_only(image):
+    image.flags.writeable = False
+    return image
+
+
+class TemplateStore:
+    """Immutable set of decoded templates, safe to share between threads"""
+
+    def __init__(self, paths=None):
+        paths = REF_IMAGES if paths is None else paths
+        templates = {}
+        missing = {}
+        for name, path in paths.items():
+            resolved = resolve_template_path(path)
+            image = cv2.imread(resolved) if resolved else None
+            if image is None:
+                if resolved is None:
+                    print(f"Template image not found: {path}")
+                else:
+                    print(f"Failed to load template: {resolved}")
+                missing[name] = path
+                continue
+            templates[name] = _read_only(image)
+        self._templates = MappingProxyType(templates)
+        self.missing = MappingProxyType(missing)
+        # Adapted copies per (name, scale, grayscale); only ever added to
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._templates
+
+    def __len__(self):
+        return len(self._templates)
+
+    @property
+    def names(self):
+        """Names of the templates that loaded"""
+        return tuple(self._templates)
+
+    def get(self, name, scale=1.0, grayscale=False):
+        """
+        Template `name` as BGR, or adapted to a reduced frame.
+
+        Returns:
+            numpy.ndarray | None: Read-only image, None if it failed to load
+
+        Raises:
+            KeyError: If `name` is not a known template
+        """
+        template = self._templates.get(name)
+        if template is None:
+            if name in self.missing:
+                return None
+            raise KeyError(name)
+        if scale == 1.0 and not grayscale:
+            return template
+
+        key = (name, scale, grayscale)
+        variant = self._variants.get(key)
+        if variant is None:
+            if grayscale:
+                template = cv2.cvtColor(template, cv2.COLOR_BGR2GRAY)
+            if scale != 1.0:
+                template = cv2.resize(
+                    template, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA
+                )
+            with self._lock:
+                variant = self._variants.setdefault(key, _read_only(template))
+        return variant
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_template_store():
+    """Process-wide store of the REF_IMAGES templates, loaded on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TemplateStore()
+        return _store
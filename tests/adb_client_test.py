@@ -0,0 +1,233 @@
+"""AdbClient against a local fake adb server speaking the smart-socket protocol."""
+
+import socket
+import struct
+import threading
+
+import pytest
+
+from emulators.adb_client import AdbClient, AdbError, ShellResult
+
+SERIAL = "127.0.0.1:21503"
+DEVICE_FILES = {"/sdcard/screenshot.png": b"\x89PNG" + bytes(range(256)) * 300}
+
+
+def _recv_exact(conn, size):
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("client went away")
+        data += chunk
+    return data
+
+
+def _read_request(conn):
+    length = int(_recv_exact(conn, 4), 16)
+    return _recv_exact(conn, length).decode()
+
+
+def _fail(conn, message):
+    payload = message.encode()
+    conn.sendall(b"FAIL" + b"%04x" % len(payload) + payload)
+
+
+def _reply(conn, payload):
+    conn.sendall(b"OKAY" + b"%04x" % len(payload) + payload)
+
+
+class FakeAdbServer:
+    """Serves one device with canned shell/exec/sync behaviour"""
+
+    def __init__(self):
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen()
+        self.port = self.listener.getsockname()[1]
+        self.sync_sessions = 0
+        self.commands = []
+        self.forwards = []
+        self.shell_v2_failure = None  # FAIL message for shell,v2 requests
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def close(self):
+        self.listener.close()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                request = _read_request(conn)
+                if request == "host:version":
+                    _reply(conn, b"0029")
+                elif request == "host:devices":
+                    _reply(conn, f"{SERIAL}\tdevice\nemulator-5554\toffline\n".encode())
+                elif request == "host:track-devices":
+                    # One list now, one per change, until the client hangs up
+                    _reply(conn, f"{SERIAL}\tdevice\n".encode())
+                    conn.sendall(b"0000")
+                elif request.startswith(f"host-serial:{SERIAL}:forward:"):
+                    self.forwards.append(request.rsplit(":forward:", 1)[1])
+                    conn.sendall(b"OKAYOKAY")
+                elif request.startswith(f"host-serial:{SERIAL}:killforward:"):
+                    local = request.rsplit(":killforward:", 1)[1]
+                    self.forwards = [
+                        forward
+                        for forward in self.forwards
+                        if not forward.startswith(f"{local};")
+                    ]
+                    conn.sendall(b"OKAYOKAY")
+                elif request == f"host:transport:{SERIAL}":
+                    conn.sendall(b"OKAY")
+                    self._handle_device_service(conn, _read_request(conn))
+                else:
+                    _fail(conn, f"unknown request {request}")
+            except ConnectionError:
+                pass
+
+    def _handle_device_service(self, conn, service):
+        if service.startswith("shell,v2,raw:") and self.shell_v2_failure:
+            _fail(conn, self.shell_v2_failure)
+        elif service.startswith("shell:"):
+            command = service.split(":", 1)[1].split(";", 1)[0]
+            self.commands.append(command)
+            conn.sendall(b"OKAY")
+            conn.sendall(command.replace("echo ", "").encode() + b"\n")
+            conn.sendall(b"__adb_exit__0\n")
+        elif service.startswith("shell,v2,raw:"):
+            command = service.split(":", 1)[1]
+            self.commands.append(command)
+            conn.sendall(b"OKAY")
+            if command == "false":
+                conn.sendall(struct.pack("<BI", 2, 4) + b"oops")
+                conn.sendall(struct.pack("<BIB", 3, 1, 1))
+            else:
+                output = command.replace("echo ", "").encode() + b"\n"
+                conn.sendall(struct.pack("<BI", 1, len(output)) + output)
+                conn.sendall(struct.pack("<BIB", 3, 1, 0))
+        elif service.startswith("exec:"):
+            self.commands.append(service)
+            conn.sendall(b"OKAY")
+            conn.sendall(b"\x00\x01\x02" * 1000)
+        elif service == "sync:":
+            self.sync_sessions += 1
+            conn.sendall(b"OKAY")
+            self._serve_sync(conn)
+        else:
+            _fail(conn, f"unknown service {service}")
+
+    def _serve_sync(self, conn):
+        while True:
+            tag, length = struct.unpack("<4sI", _recv_exact(conn, 8))
+            if tag == b"QUIT":
+                return
+            path = _recv_exact(conn, length).decode()
+            data = DEVICE_FILES.get(path)
+            if data is None:
+                message = b"No such file or directory"
+                conn.sendall(b"FAIL" + struct.pack("<I", len(message)) + message)
+                continue
+            for start in range(0, len(data), 65536):
+                end = start + 65536
+                chunk = data[start:end]
+                conn.sendall(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+            conn.sendall(b"DONE" + struct.pack("<I", 0))
+
+
+@pytest.fixture
+def server():
+    fake = FakeAdbServer()
+    yield fake
+    fake.close()
+
+
+@pytest.fixture
+def client(server):
+    adb = AdbClient(port=server.port, timeout=5)
+    yield adb
+    adb.close()
+
+
+def test_host_services(client):
+    assert client.version() == 0x29
+    assert client.devices() == {SERIAL: "device", "emulator-5554": "offline"}
+
+
+def test_track_devices_streams_device_lists(client):
+    with client.track_devices() as sock:
+        data = b""
+        while chunk := sock.recv(1024):
+            data += chunk
+    payload = f"{SERIAL}\tdevice\n".encode()
+    assert data == b"%04x" % len(payload) + payload + b"0000"
+
+
+def test_shell_reports_output_and_exit_code(client, server):
+    result = client.shell(SERIAL, "echo hello")
+    assert result.exit_code == 0
+    assert result.stdout == "hello\n"
+
+    failed = client.shell(SERIAL, "false")
+    assert failed.exit_code == 1
+    assert failed.stderr == "oops"
+    assert server.commands == ["echo hello", "false"]
+
+
+def test_exec_out_is_binary_safe(client):
+    assert client.exec_out(SERIAL, "screencap") == b"\x00\x01\x02" * 1000
+
+
+def test_exec_out_into_grows_the_buffer_within_one_stream(client, server):
+    buffer = bytearray(100)
+    count = client.exec_out_into(SERIAL, "screencap", buffer)
+
+    assert count == 3000 and len(buffer) > 3000
+    assert bytes(buffer[:count]) == b"\x00\x01\x02" * 1000
+    assert server.commands == ["exec:screencap"]
+
+
+def test_pull_reuses_pooled_sync_connection(client, server):
+    for _ in range(3):
+        assert client.pull(SERIAL, "/sdcard/screenshot.png") == (
+            DEVICE_FILES["/sdcard/screenshot.png"]
+        )
+    assert server.sync_sessions == 1
+
+    with pytest.raises(AdbError):
+        client.pull(SERIAL, "/sdcard/missing.png")
+
+
+def test_unknown_device_raises(client):
+    with pytest.raises(AdbError):
+        client.exec_out("127.0.0.1:9999", "screencap")
+
+
+def test_forward_waits_for_both_okays(client, server):
+    client.forward(SERIAL, "tcp:6100", "tcp:27183")
+    assert server.forwards == ["tcp:6100;tcp:27183"]
+
+    client.remove_forward(SERIAL, "tcp:6100")
+    assert server.forwards == []
+
+
+def test_transient_shell_v2_failure_keeps_v2(client, server):
+    server.shell_v2_failure = "device offline"
+    with pytest.raises(AdbError):
+        client.shell(SERIAL, "echo hi")
+
+    server.shell_v2_failure = None
+    result = client.shell(SERIAL, "false")
+    assert result.exit_code == 1 and result.stderr == "oops"  # Still v2
+
+
+def test_missing_shell_v2_falls_back_to_v1(client, server):
+    server.shell_v2_failure = "unknown service"
+    assert client.shell(SERIAL, "echo hi") == ShellResult(0, "hi\n", "")
+    assert client._shell_v2[SERIAL] is False
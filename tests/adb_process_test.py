@@ -0,0 +1,54 @@
+"""Hard deadlines for adb child processes and per-device timeout counts."""
+
+import subprocess
+import sys
+import time
+
+import pytest
+
+from emulators.adb_process import (
+    add_timeout_listener,
+    command_kind,
+    remove_timeout_listener,
+    run_adb,
+    timeout_counts,
+)
+
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(5)"]
+
+
+def test_command_kinds():
+    assert command_kind("input tap 1 2") == "input"
+    assert command_kind("  am force-stop com.example") == "app"
+    assert command_kind("screencap -p") == "capture"
+    assert command_kind("getprop ro.product.model") == "shell"
+
+
+def test_run_adb_returns_output():
+    result = run_adb([sys.executable, "-c", "print('ok')"], text=True)
+    assert result.returncode == 0 and result.stdout.strip() == "ok"
+
+
+def test_stuck_process_is_killed_and_counted_against_its_device():
+    seen = []
+    listener = lambda device_id, kind: seen.append((device_id, kind))  # noqa: E731
+    add_timeout_listener(listener)
+    try:
+        started = time.monotonic()
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_adb(SLEEPER, kind="input", device_id="stuck-1", timeout=0.2)
+        assert time.monotonic() - started < 3
+    finally:
+        remove_timeout_listener(listener)
+
+    assert timeout_counts("stuck-1") == {"input": 1}
+    assert timeout_counts("stuck-2") == {}
+    assert seen == [("stuck-1", "input")]
+
+
+def test_stuck_process_tree_is_killed():
+    # The shell's child would keep the pipe open if only the shell were killed
+    started = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        run_adb("sleep 5 | cat", shell=True, device_id="stuck-tree", timeout=0.2)
+    assert time.monotonic() - started < 3
@@ -0,0 +1,138 @@
+"""Fleet-wide adb slot cap, priority order and wait statistics."""
+
+import threading
+import time
+
+from emulators.adb_client import ShellResult
+from emulators.adb_scheduler import (
+    CAPTURE,
+    CARD_PLAY,
+    DISCOVERY,
+    NAVIGATION,
+    AdbScheduler,
+    adb_priority,
+    current_priority,
+)
+from emulators.transport import ScheduledTransport
+
+
+def _hold(scheduler, release, priority=NAVIGATION):
+    """Thread that takes a slot and keeps it until `release` is set"""
+    taken = threading.Event()
+
+    def run():
+        with scheduler.slot(priority):
+            taken.set()
+            release.wait(2)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert taken.wait(2)
+    return thread
+
+
+def test_concurrency_is_capped():
+    scheduler = AdbScheduler(max_concurrent=2)
+    release = threading.Event()
+    holders = [_hold(scheduler, release) for _ in range(2)]
+    ran = []
+
+    def take_slot():
+        with scheduler.slot():
+            ran.append(True)
+
+    waiter = threading.Thread(target=take_slot)
+    waiter.start()
+    time.sleep(0.05)
+
+    assert scheduler.active == 2 and scheduler.queue_depth == 1 and not ran
+    release.set()
+    for thread in holders + [waiter]:
+        thread.join(2)
+    assert ran and scheduler.queue_depth == 0 and scheduler.active == 0
+
+
+def test_free_slots_go_to_the_most_urgent_waiter():
+    scheduler = AdbScheduler(max_concurrent=1)
+    release = threading.Event()
+    holder = _hold(scheduler, release)
+    order = []
+
+    def wait_for_slot(name, priority):
+        with scheduler.slot(priority):
+            order.append(name)
+
+    waiters = []
+    for name, priority in [
+        ("discovery", DISCOVERY),
+        ("menu 1", NAVIGATION),
+        ("menu 2", NAVIGATION),
+        ("capture", CAPTURE),
+        ("card", CARD_PLAY),
+    ]:
+        waiters.append(threading.Thread(target=wait_for_slot, args=(name, priority)))
+        waiters[-1].start()
+        time.sleep(0.02)  # Fixes the arrival order
+
+    release.set()
+    for thread in [holder] + waiters:
+        thread.join(2)
+    assert order == ["card", "capture", "menu 1", "menu 2", "discovery"]
+
+    stats = scheduler.stats()
+    assert stats["card_play"]["operations"] == 1
+    assert stats["discovery"]["max_wait_ms"] > stats["card_play"]["max_wait_ms"]
+    assert "card_play 1 ops" in scheduler.report()
+
+
+def test_nested_operations_reuse_the_outer_slot():
+    scheduler = AdbScheduler(max_concurrent=1)
+    with scheduler.slot():
+        with scheduler.slot():
+            assert scheduler.active == 1
+
+
+class EchoTransport:
+    device_id = "emulator-5554"
+
+    def shell(self, command, timeout=None):
+        return ShellResult(0, command, "")
+
+
+def test_transport_operations_take_the_thread_priority():
+    scheduler = AdbScheduler(max_concurrent=1)
+    transport = ScheduledTransport(EchoTransport(), scheduler)
+
+    assert current_priority() == NAVIGATION
+    with adb_priority(CARD_PLAY):
+        assert transport.shell("input tap 1 2").stdout == "input tap 1 2"
+    transport.shell("input tap 3 4")
+
+    stats = scheduler.stats()
+    assert stats["card_play"]["operations"] == 1
+    assert stats["navigation"]["operations"] == 1
+
+
+def test_shared_slots_cap_schedulers_of_other_processes():
+    parent = AdbScheduler(max_concurrent=1)
+    # A capture process's scheduler, drawing from the parent's semaphore
+    child = AdbScheduler(max_concurrent=1, shared=parent.shared_slots())
+    release = threading.Event()
+    holder = _hold(parent, release)
+    ran = []
+
+    def take_slot():
+        with child.slot():
+            ran.append(True)
+
+    waiter = threading.Thread(target=take_slot)
+    waiter.start()
+    time.sleep(0.05)
+
+    assert not ran
+    release.set()
+    for thread in (holder, waiter):
+        thread.join(2)
+    assert ran and parent.active == child.active == 0
+    # The time spent waiting on the other process counts as scheduler wait
+    assert child.stats()["navigation"]["max_wait_ms"] >= 40
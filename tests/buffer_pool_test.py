@@ -0,0 +1,47 @@
+"""BufferPool reuse and pooled frame decoding."""
+
+import struct
+
+import numpy as np
+
+from emulators.buffer_pool import BufferPool
+from emulators.frame import Frame
+from emulators.framebuffer import decode_raw_screencap, PIXEL_FORMAT_RGBA_8888
+
+
+def test_released_buffers_are_reused():
+    pool = BufferPool(max_per_shape=2)
+
+    first = pool.acquire((4, 6, 3))
+    pool.release(first)
+    second = pool.acquire((4, 6, 3))
+
+    assert second is first
+    assert pool.stats()["allocations"] == 1
+    assert pool.stats()["reuses"] == 1
+
+
+def test_views_and_surplus_buffers_are_not_pooled():
+    pool = BufferPool(max_per_shape=1)
+    base = pool.acquire((4, 6, 3))
+
+    pool.release(base[1:])
+    pool.release(base)
+    pool.release(np.empty((4, 6, 3), dtype=np.uint8))
+
+    assert pool.stats()["idle"] == 1
+    assert pool.stats()["dropped"] == 2
+
+
+def test_frame_release_returns_decoded_buffer_to_pool():
+    pool = BufferPool()
+    rgba = np.full((4, 3, 4), 255, dtype=np.uint8)
+    raw = bytearray(struct.pack("<III", 3, 4, PIXEL_FORMAT_RGBA_8888) + rgba.tobytes())
+
+    for _ in range(3):
+        image = decode_raw_screencap(memoryview(raw), out=pool.acquire((4, 3, 3)))
+        with Frame(image, pool=pool) as frame:
+            assert frame.shape == (4, 3, 3)
+        assert frame.image is None
+
+    assert pool.stats()["allocations"] == 1
@@ -0,0 +1,127 @@
+"""Capture backend registry and startup auto-selection."""
+
+import json
+import multiprocessing
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from emulators import capture_backends
+from emulators.base import BaseEmulatorController
+from emulators.capture_backends import CaptureBackend, ReplayCaptureBackend
+
+
+class FakeController(BaseEmulatorController):
+    def click(self, x, y, clicks=1, interval=0.1):
+        return True
+
+    def swipe(self, x1, y1, x2, y2, duration=1000):
+        return True
+
+    def screenshot(self):
+        frame = self.capture_frame()
+        return frame.image if frame is not None else None
+
+    def start_app(self, package_name):
+        return True
+
+    def restart_app(self, package_name):
+        return True
+
+
+def _backend(name, delay, works=True):
+    class Backend(CaptureBackend):
+        captures = 0
+        undeploys = 0
+
+        def capture(self):
+            type(self).captures += 1
+            time.sleep(delay)
+            return np.zeros((4, 4, 3), dtype=np.uint8) if works else None
+
+        def undeploy(self):
+            type(self).undeploys += 1
+
+    Backend.name = name
+    return Backend
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    backends = {
+        "slow": _backend("slow", 0.02),
+        "fast": _backend("fast", 0.0),
+        "broken": _backend("broken", 0.0, works=False),
+    }
+    monkeypatch.setattr(capture_backends, "CAPTURE_BACKENDS", dict(backends))
+    monkeypatch.setattr("emulators.base.CAPTURE_BACKENDS", dict(backends))
+    return backends
+
+
+def test_auto_select_picks_fastest_working_backend_and_caches_it(registry, tmp_path):
+    cache = str(tmp_path / "backends.json")
+    controller = FakeController("emulator-5554", "test")
+
+    assert controller.auto_select_capture_backend(cache) == "fast"
+    assert controller.capture_frame().backend == "fast"
+
+    entry = json.load(open(cache))["emulator-5554"]
+    assert entry["backend"] == "fast"
+    assert entry["timings_ms"]["broken"] is None
+
+    # Backends that lost are removed from the device, the winner is kept
+    assert registry["slow"].undeploys == registry["broken"].undeploys == 1
+    assert registry["fast"].undeploys == 0
+
+
+def test_video_is_never_probed():
+    assert not capture_backends.CAPTURE_BACKENDS["video"].auto_select
+
+
+def test_cached_choice_skips_the_probe(registry, tmp_path):
+    cache = str(tmp_path / "backends.json")
+    FakeController("emulator-5554", "first").auto_select_capture_backend(cache)
+    slow_captures = registry["slow"].captures
+
+    second = FakeController("emulator-5554", "second")
+    assert second.auto_select_capture_backend(cache) == "fast"
+    assert registry["slow"].captures == slow_captures
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        FakeController("emulator-5554", "test").use_capture_backend("nope")
+
+
+def test_replay_backend_cycles_saved_screenshots(tmp_path):
+    for i in range(2):
+        cv2.imwrite(str(tmp_path / f"{i}.png"), np.full((4, 4, 3), i, np.uint8))
+    controller = FakeController("emulator-5554", "test")
+    controller.capture_backend = ReplayCaptureBackend(controller, str(tmp_path))
+
+    values = [controller.capture_frame()[0, 0, 0] for _ in range(3)]
+
+    assert values == [0, 1, 0]
+
+
+def _save_choices(path, prefix, count):
+    for i in range(count):
+        capture_backends.save_backend_choice(
+            f"{prefix}-{i}", "raw", {"raw": 0.01}, path
+        )
+
+
+def test_cache_writes_from_several_processes_are_not_lost(tmp_path):
+    cache = str(tmp_path / "backends.json")
+    workers = [
+        multiprocessing.Process(target=_save_choices, args=(cache, f"dev{n}", 10))
+        for n in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(20)
+
+    assert len(json.load(open(cache))) == 30
@@ -0,0 +1,137 @@
+"""Reduced capture profiles and coordinate mapping."""
+
+import gzip
+import re
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from detection import ImageDetector
+from emulators.adb_client import grow_buffer
+from emulators.buffer_pool import BufferPool
+from emulators.capture_backends import RawCaptureBackend
+from emulators.capture_profiles import CaptureProfile, apply_profile
+from emulators.frame import Frame
+from emulators.framebuffer import PIXEL_FORMAT_RGBA_8888
+from template_store import TemplateStore
+
+WIDTH, HEIGHT = 40, 60
+
+
+def _screen():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+
+def test_band_frame_is_indexed_in_screen_coordinates():
+    screen = _screen()
+    band = apply_profile(Frame(screen.copy()), CaptureProfile("band", rows=(30, 50)))
+
+    assert band.shape == (20, WIDTH, 3)
+    assert band.origin == (0, 30)
+    assert np.array_equal(band[35, 7], screen[35, 7])
+    assert np.array_equal(band[30:32, 5:9], screen[30:32, 5:9])
+    with pytest.raises(IndexError):
+        band[10, 7]
+
+
+def test_half_gray_frame_maps_coordinates_back():
+    frame = apply_profile(
+        Frame(_screen()), CaptureProfile("half_gray", scale=0.5, grayscale=True)
+    )
+
+    assert frame.shape == (HEIGHT // 2, WIDTH // 2)
+    assert frame.to_screen(10, 4) == (20, 8)
+    assert frame.to_frame(20, 8) == (10, 4)
+
+
+def test_find_template_on_reduced_frames_returns_screen_coordinates(tmp_path):
+    screen = np.zeros((200, 120, 3), dtype=np.uint8)
+    template = np.zeros((24, 24, 3), dtype=np.uint8)
+    cv2.circle(template, (12, 12), 9, (40, 200, 250), -1)
+    cv2.rectangle(template, (2, 2), (8, 8), (250, 80, 30), -1)
+    screen[120:144, 60:84] = template
+    cv2.imwrite(str(tmp_path / "target.png"), template)
+    templates = TemplateStore({"target": str(tmp_path / "target.png")})
+    detector = ImageDetector("test", use_cache=False, templates=templates)
+
+    for profile in (
+        CaptureProfile("band", rows=(100, 160)),
+        CaptureProfile("gray", grayscale=True),
+        CaptureProfile("half", scale=0.5),
+    ):
+        frame = apply_profile(Frame(screen.copy()), profile)
+        position, _ = detector.find_template("target", frame, confidence=0.6)
+        assert position is not None, profile.name
+        assert abs(position[0] - 72) <= 2 and abs(position[1] - 132) <= 2
+
+
+class DumpTransport:
+    """Serves a fixed raw dump and emulates the device-side band cut and gzip"""
+
+    def __init__(self, dump):
+        self.dump = dump
+        self.commands = []
+
+    def _output(self, command):
+        self.commands.append(command)
+        data = self.dump
+        match = re.search(r"tail -c \+(\d+) \| head -c (\d+)", command)
+        if match:
+            start = int(match.group(1)) - 1
+            end = start + int(match.group(2))
+            data = data[start:end]
+        if command.endswith("| gzip -1"):
+            data = gzip.compress(data, compresslevel=1)
+        return data
+
+    def exec_out(self, command, timeout=None):
+        return self._output(command)
+
+    def exec_out_into(self, command, buffer, timeout=None):
+        data = self._output(command)
+        grow_buffer(buffer, len(data))
+        buffer[: len(data)] = data
+        return len(data)
+
+
+class DumpController:
+    device_id = "emulator-5554"
+    instance_name = "test"
+
+    def __init__(self):
+        self.buffer_pool = BufferPool()
+
+
+def test_a_larger_dump_is_read_without_capturing_again():
+    def dump(width, height):
+        header = struct.pack("<IIII", width, height, PIXEL_FORMAT_RGBA_8888, 0)
+        return header + np.zeros((height, width, 4), np.uint8).tobytes()
+
+    backend = RawCaptureBackend(DumpController())
+    backend.transport = DumpTransport(dump(WIDTH, HEIGHT))
+    backend.transport.exec_out = None  # Every read must stream into the buffer
+    assert backend.capture().shape == (HEIGHT, WIDTH, 3)
+
+    backend.transport.dump = dump(WIDTH, HEIGHT * 2)
+    assert backend.capture().shape == (HEIGHT * 2, WIDTH, 3)
+    assert len(backend.transport.commands) == 2
+
+
+def test_raw_backend_cuts_bands_on_the_device():
+    rgba = np.random.default_rng(1).integers(0, 255, (HEIGHT, WIDTH, 4), dtype=np.uint8)
+    dump = struct.pack("<IIII", WIDTH, HEIGHT, PIXEL_FORMAT_RGBA_8888, 0)
+    dump += rgba.tobytes()
+    backend = RawCaptureBackend(DumpController())
+    backend.transport = DumpTransport(dump)
+    cards = CaptureProfile("cards", rows=(20, 30))
+
+    full_band = backend.read_frame(cards)  # Learns the layout from a full dump
+    device_band = backend.read_frame(cards)
+
+    assert "tail -c" in backend.transport.commands[-1]
+    assert device_band.origin == (0, 20) and device_band.shape == (10, WIDTH, 3)
+    assert np.array_equal(device_band.image, full_band.image)
+    assert tuple(device_band[25, 3]) == tuple(rgba[25, 3, 2::-1])
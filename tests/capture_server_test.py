@@ -0,0 +1,162 @@
+"""Device-side capture server backend against a loopback stand-in."""
+
+import shutil
+import socket
+import struct
+import subprocess
+import threading
+
+import numpy as np
+import pytest
+
+from emulators import capture_server
+from emulators.adb_client import ShellResult
+from emulators.buffer_pool import BufferPool
+from emulators.capture_backends import ServerCaptureBackend
+from emulators.framebuffer import PIXEL_FORMAT_RGBA_8888
+
+WIDTH, HEIGHT = 8, 6
+
+
+class StandInDevice:
+    """
+    Plays both adb and the helper: the forwarded port accepts connections
+    like adb does, but only answers while the helper is "running".
+    """
+
+    def __init__(self):
+        rgba = np.random.default_rng(2).integers(0, 255, (HEIGHT, WIDTH, 4), np.uint8)
+        self.rgba = rgba
+        self.dump = struct.pack("<IIII", WIDTH, HEIGHT, PIXEL_FORMAT_RGBA_8888, 0)
+        self.dump += rgba.tobytes()
+        self.helper_running = False
+        self.commands = []
+        self.listener = None
+        self.forwarded = None
+        self.connections = []
+
+    # Transport surface used by CaptureServer
+    def shell(self, command, timeout=None):
+        self.commands.append(command)
+        if "nc -L" in command:
+            self.helper_running = True
+        return ShellResult(0, "", "")
+
+    def forward(self, local, remote):
+        if self.listener is not None:
+            self.listener.close()
+        self.listener = socket.create_server(("127.0.0.1", int(local[4:])))
+        self.forwarded = local
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        return True
+
+    def remove_forward(self, local):
+        if local == self.forwarded:
+            self.listener.close()
+            self.listener = self.forwarded = None
+        return True
+
+    def kill_helper(self):
+        self.helper_running = False
+        for conn in self.connections:
+            conn.shutdown(socket.SHUT_RDWR)
+
+    def _accept_loop(self):
+        listener = self.listener
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            if not self.helper_running:
+                conn.close()  # adb forward with nothing listening on the device
+                continue
+            self.connections.append(conn)
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        try:
+            for line in conn.makefile("rb"):
+                request = line.strip()
+                if request == b"F":
+                    conn.sendall(self.dump)
+                elif request == b"I":
+                    conn.sendall(b"%d\n" % len(self.dump))
+                elif request == b"P":
+                    conn.sendall(b"OK\n")
+                else:
+                    break
+        except OSError:
+            pass
+        conn.close()
+
+
+class StandInController:
+    device_id = "emulator-5554"
+    instance_name = "test"
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.buffer_pool = BufferPool()
+
+
+def test_frames_are_served_over_one_connection():
+    device = StandInDevice()
+    backend = ServerCaptureBackend(StandInController(device))
+    try:
+        for _ in range(3):
+            image = backend.capture()
+            assert np.array_equal(image, device.rgba[:, :, 2::-1])
+        assert backend.server.deploys == 1
+        assert len(device.connections) == 1
+    finally:
+        backend.close()
+
+
+def test_dead_helper_is_redeployed(monkeypatch):
+    monkeypatch.setattr("emulators.capture_server.CAPTURE_SERVER_REDEPLOY_DELAY", 0)
+    device = StandInDevice()
+    backend = ServerCaptureBackend(StandInController(device))
+    try:
+        assert backend.capture() is not None
+        device.kill_helper()
+
+        assert backend.capture() is None  # In-flight request fails
+        image = backend.capture()
+
+        assert image is not None and image.shape == (HEIGHT, WIDTH, 3)
+        assert backend.server.deploys == 2
+        assert sum("nc -L" in command for command in device.commands) == 2
+    finally:
+        backend.close()
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs a POSIX shell")
+def test_undeploy_stops_the_helper(monkeypatch, tmp_path):
+    script, pid_file = tmp_path / "crbot_capture.sh", tmp_path / "crbot_capture.pid"
+    monkeypatch.setattr(capture_server, "CAPTURE_SERVER_PATH", str(script))
+    monkeypatch.setattr(capture_server, "CAPTURE_SERVER_PID_PATH", str(pid_file))
+    device = StandInDevice()
+    backend = ServerCaptureBackend(StandInController(device))
+    assert backend.capture() is not None
+
+    # From here the commands run in a local shell, like the device's would
+    listener = subprocess.Popen(["sleep", "30"])
+    script.touch()
+    pid_file.write_text(f"{listener.pid}\n")
+
+    def device_shell(command, timeout=None):
+        device.commands.append(command)
+        result = subprocess.run(["sh", "-c", command], capture_output=True, text=True)
+        return ShellResult(result.returncode, result.stdout, result.stderr)
+
+    device.shell = device_shell
+    try:
+        backend.undeploy()
+        assert listener.wait(timeout=2) is not None
+    finally:
+        listener.kill()
+
+    assert not script.exists() and not pid_file.exists()
+    assert not backend.server.connected and backend.server.local_port is None
+    assert device.forwarded is None
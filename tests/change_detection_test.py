@@ -0,0 +1,52 @@
+"""Frame fingerprints and the detector's unchanged-screen cache."""
+
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import detection
+from detection import ImageDetector
+from emulators.frame import Frame, fingerprints_differ
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _screen(seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 255, (633, 419, 3), dtype=np.uint8)
+
+
+def test_small_ui_change_is_detected_but_noise_is_not():
+    screen = _screen()
+    noisy = cv2.add(screen, np.full_like(screen, 3))
+    with_button = screen.copy()
+    with_button[300:315, 200:215] = 255
+
+    assert not Frame(noisy).changed_since(Frame(screen))
+    assert Frame(with_button).changed_since(Frame(screen))
+    assert fingerprints_differ(None, Frame(screen).fingerprint)
+
+
+def test_find_template_reuses_results_until_screen_changes(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    calls = []
+    match_template = cv2.matchTemplate
+
+    def counting_match(*args):
+        calls.append(1)
+        return match_template(*args)
+
+    monkeypatch.setattr(detection.cv2, "matchTemplate", counting_match)
+    detector = ImageDetector("test", use_cache=True)
+    if "ok_button" not in detector.templates:
+        pytest.skip("Template images not available")
+
+    first = detector.find_template("ok_button", Frame(_screen()))
+    second = detector.find_template("ok_button", Frame(_screen()))
+    assert first == second
+    assert len(calls) == 1 and detector.cache_hits == 1
+
+    detector.find_template("ok_button", Frame(_screen(seed=1)))
+    assert len(calls) == 2
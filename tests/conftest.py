@@ -0,0 +1,83 @@
+"""Fakes and fixtures shared by the controller and bot tests."""
+
+import numpy as np
+import pytest
+
+import emulator_bot
+from emulators import memu
+from emulators.adb_client import ShellResult
+from emulators.frame import Frame
+from emulators.memu import MemuController
+
+
+class OnlineTracker:
+    def add_listener(self, callback):
+        pass
+
+    def remove_listener(self, callback):
+        pass
+
+    def watch(self, device_id):
+        pass
+
+    def unwatch(self, device_id):
+        pass
+
+    def is_online(self, device_id):
+        return True
+
+
+class RecordingTransport:
+    device_id = "emulator-5554"
+
+    def __init__(self, exit_code=0):
+        self.commands = []
+        self.exit_code = exit_code
+
+    def shell(self, command, timeout=None):
+        self.commands.append(command)
+        return ShellResult(self.exit_code, "", "")
+
+
+@pytest.fixture
+def device_tracker(monkeypatch):
+    """Replace the shared device tracker with one that reports every device online"""
+    monkeypatch.setattr(memu, "get_device_tracker", OnlineTracker)
+
+
+@pytest.fixture
+def recording_transport():
+    return RecordingTransport()
+
+
+@pytest.fixture
+def controller(device_tracker, recording_transport, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    emulator = MemuController(
+        "emulator-5554", "test", capture_mode="replay", transport=recording_transport
+    )
+    emulator.shell_session = None  # One-shot shell commands are easier to record
+    yield emulator
+    emulator.stop()
+
+
+@pytest.fixture
+def bot_factory(monkeypatch, controller):
+    monkeypatch.setattr(
+        emulator_bot, "MemuController", lambda *args, **kwargs: controller
+    )
+    bots = []
+
+    def make(instance_name="test", **kwargs):
+        bot = emulator_bot.EmulatorBot(
+            "emulator-5554", instance_name, use_console_display=False, **kwargs
+        )
+        bots.append(bot)
+        bot.take_screenshot = lambda profile=None: Frame(np.zeros((4, 4, 3), np.uint8))
+        bot.battle_logic.check_which_cards_are_available = lambda frame: [2]
+        return bot
+
+    yield make
+    # Drops each bot's adb timeout listener and stops its input worker
+    for bot in bots:
+        bot.stop()
@@ -0,0 +1,190 @@
+"""Device registry: snapshot parsing, change callbacks, reconnects and tracking."""
+
+import io
+import socket
+import subprocess
+import threading
+import time
+
+from emulators import device_tracker
+from emulators.device_tracker import (
+    STATE_ABSENT,
+    STATE_OFFLINE,
+    STATE_ONLINE,
+    DeviceTracker,
+    parse_device_list,
+)
+
+MEMU = "127.0.0.1:21503"
+
+
+def _device_list(states):
+    payload = "".join(f"{serial}\t{state}\n" for serial, state in states.items())
+    return b"%04x" % len(payload) + payload.encode()
+
+
+def test_parse_device_list():
+    text = f"List of devices attached\n{MEMU}\tdevice\nemulator-5554\toffline\n\n"
+
+    assert parse_device_list(text) == {MEMU: "device", "emulator-5554": "offline"}
+    assert parse_device_list("") == {}
+
+
+def test_snapshots_fire_callbacks_and_schedule_reconnects():
+    tracker = DeviceTracker(kind="subprocess")
+    changes, reconnects = [], []
+    tracker.add_listener(lambda *change: changes.append(change))
+    tracker._schedule_reconnect = reconnects.append
+    tracker.watch(MEMU)
+
+    tracker._apply_snapshot({MEMU: STATE_OFFLINE, "emulator-5554": STATE_ONLINE})
+    assert sorted(changes) == [
+        (MEMU, STATE_ABSENT, STATE_OFFLINE),
+        ("emulator-5554", STATE_ABSENT, STATE_ONLINE),
+    ]
+    assert reconnects == [MEMU]  # Only watched devices are reconnected
+
+    changes.clear()
+    tracker._apply_snapshot({MEMU: STATE_ONLINE, "emulator-5554": STATE_ONLINE})
+    assert changes == [(MEMU, STATE_OFFLINE, STATE_ONLINE)]
+    assert reconnects == [MEMU]
+    assert tracker.is_online(MEMU)
+
+
+def test_reconnect_loop_stops_once_the_device_is_back():
+    tracker = DeviceTracker(kind="subprocess")
+    tracker._running = True
+    attempts = []
+
+    def connect(device_id):
+        attempts.append(device_id)
+        tracker._apply_snapshot({device_id: STATE_ONLINE})
+
+    tracker._connect = connect
+    tracker._apply_snapshot({MEMU: STATE_OFFLINE})
+    tracker.watch(MEMU)
+
+    assert tracker.wait_for_online(MEMU, 2)
+    deadline = time.monotonic() + 2
+    while tracker._reconnecting and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert attempts == [MEMU] and not tracker._reconnecting
+    tracker.stop()
+
+
+def test_unwatched_devices_are_no_longer_reconnected():
+    tracker = DeviceTracker(kind="subprocess")
+    tracker._running = True
+    attempts = []
+    tracker._connect = attempts.append
+    tracker._apply_snapshot({MEMU: STATE_OFFLINE})
+    tracker.watch(MEMU)  # Two controllers on one device
+    tracker.watch(MEMU)
+    deadline = time.monotonic() + 2
+    while not attempts and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    tracker.unwatch(MEMU)
+    assert MEMU in tracker._watched
+    tracker.unwatch(MEMU)
+    deadline = time.monotonic() + 2
+    while tracker._reconnecting and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not tracker._reconnecting  # The backoff wait ended early
+
+    reconnects = []
+    tracker._schedule_reconnect = reconnects.append
+    tracker._apply_snapshot({})
+    assert MEMU not in tracker._watched and reconnects == []
+    assert len(attempts) == 1
+    tracker.stop()
+
+
+def test_wait_for_online_wakes_on_a_snapshot():
+    tracker = DeviceTracker(kind="subprocess")
+    tracker._apply_snapshot({MEMU: STATE_OFFLINE})
+    timer = threading.Timer(0.05, tracker._apply_snapshot, [{MEMU: STATE_ONLINE}])
+    timer.start()
+
+    started = time.monotonic()
+    assert tracker.wait_for_online(MEMU, 2)
+    assert time.monotonic() - started < 1
+    timer.join()
+
+
+def test_follow_track_devices_applies_every_list():
+    tracker = DeviceTracker(kind="subprocess")
+    tracker._running = True
+    changes, closed = [], []
+    tracker.add_listener(lambda *change: changes.append(change))
+    lists = [_device_list({MEMU: STATE_OFFLINE}), _device_list({MEMU: STATE_ONLINE})]
+    stream = io.BytesIO(b"".join(lists) + b"0000")
+    tracker._open_track_stream = lambda: (stream, lambda: closed.append(True))
+
+    assert tracker._follow_track_devices()
+
+    assert changes == [
+        (MEMU, STATE_ABSENT, STATE_OFFLINE),
+        (MEMU, STATE_OFFLINE, STATE_ONLINE),
+        (MEMU, STATE_ONLINE, STATE_ABSENT),
+    ]
+    assert closed == [True]
+
+
+class TrackingClient:
+    """Hands out the client end of a socket pair as host:track-devices"""
+
+    def __init__(self):
+        self.client_end, self.server_end = socket.socketpair()
+
+    def track_devices(self):
+        return self.client_end
+
+
+def test_socket_transport_tracks_without_spawning_adb(monkeypatch):
+    def no_spawn(*args, **kwargs):
+        raise AssertionError("adb binary spawned")
+
+    monkeypatch.setattr(device_tracker.subprocess, "Popen", no_spawn)
+    client = TrackingClient()
+    monkeypatch.setattr(device_tracker, "get_adb_client", lambda: client)
+    tracker = DeviceTracker(kind="socket")
+    tracker._running = True
+
+    client.server_end.sendall(_device_list({MEMU: STATE_ONLINE}))
+    client.server_end.close()
+
+    assert tracker._follow_track_devices()
+    assert tracker.get_state(MEMU) == STATE_ONLINE
+
+
+def test_stop_closes_a_blocked_stream(monkeypatch):
+    client = TrackingClient()
+    monkeypatch.setattr(device_tracker, "get_adb_client", lambda: client)
+    tracker = DeviceTracker(kind="socket")
+    tracker._running = True
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(tracker._follow_track_devices())
+    )
+    thread.start()
+    time.sleep(0.05)
+
+    tracker.stop()
+    thread.join(2)
+    assert result == [False] and not thread.is_alive()
+    client.server_end.close()
+
+
+def test_refresh_uses_the_adb_binary_for_the_subprocess_transport(monkeypatch):
+    calls = []
+
+    def run_adb(args, **kwargs):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0, f"{MEMU}\tdevice\n", "")
+
+    monkeypatch.setattr(device_tracker, "run_adb", run_adb)
+    tracker = DeviceTracker(kind="subprocess")
+
+    assert tracker.refresh() and tracker.is_online(MEMU)
+    assert calls == [["adb", "devices"]]
@@ -0,0 +1,303 @@
+"""EmulatorBot input flows: card placement, transition waits, calibration."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import emulator_bot
+from config import ADB_TIMEOUT_RECYCLE_LIMIT, CARD_DRAG_DURATION, CARD_SLOTS
+from emulators.adb_process import record_timeout
+from emulators.frame import Frame
+from emulators.input_latency import InputLatencyTracker
+
+
+def test_bot_with_a_frame_source_does_not_probe_capture(monkeypatch, controller):
+    modes = []
+
+    def make_controller(device_id, instance_name, capture_mode="auto"):
+        modes.append(capture_mode)
+        return controller
+
+    monkeypatch.setattr(emulator_bot, "MemuController", make_controller)
+    emulator_bot.EmulatorBot(
+        "emulator-5554",
+        "test",
+        use_console_display=False,
+        frame_source=StreamOfFrames(),
+    ).stop()
+
+    assert modes == [emulator_bot.CAPTURE_FALLBACK_MODE]
+
+
+def test_drag_placement_plays_a_card_with_one_swipe(bot_factory, controller):
+    bot = bot_factory(placement_mode="drag")
+    bot.battle_strategy.get_strategic_play_position = lambda: (200, 300)
+
+    assert bot.play_card_strategically()
+
+    slot_x, slot_y = CARD_SLOTS[2]
+    assert controller.transport.commands == [
+        f"input swipe {slot_x} {slot_y} 200 300 {CARD_DRAG_DURATION}"
+    ]
+    assert bot.logger.stats["card_placement_mode"] == "drag"
+
+
+def test_placement_mode_is_chosen_per_instance(monkeypatch, bot_factory):
+    monkeypatch.setattr("emulator_bot.CARD_PLACEMENT_MODES", {"MEmu_2": "drag"})
+
+    assert bot_factory("MEmu_1").placement_mode == "tap"
+    assert bot_factory("MEmu_2").placement_mode == "drag"
+    with pytest.raises(ValueError):
+        bot_factory(placement_mode="fling")
+
+
+class StreamOfFrames:
+    """Frame source handing out numbered frames on request"""
+
+    def __init__(self):
+        self.seq = 0
+
+    def wait_for_frame(self, after_seq=0, timeout=None):
+        time.sleep(0.01)
+        self.seq = max(self.seq, after_seq) + 1
+        frame = Frame(np.zeros((4, 4, 3), np.uint8))
+        frame.seq = self.seq
+        return self.seq, frame
+
+    def stop(self):
+        pass
+
+
+def test_burst_tap_until_stops_when_the_template_appears(bot_factory, controller):
+    bot = bot_factory(frame_source=StreamOfFrames())
+    seen = []
+
+    def find_template(name, frame):
+        seen.append(frame.seq)
+        return ((5, 5), 0.9) if len(seen) == 3 else (None, None)
+
+    bot.find_template = find_template
+    position, confidence, taps = bot.burst_tap_until(
+        114, 271, "ClaimRewards", max_taps=100, interval=0.05
+    )
+
+    assert position == (5, 5) and confidence == 0.9
+    assert taps < 100
+    assert all("input tap 114 271" in c for c in controller.transport.commands)
+
+
+def test_battle_state_reaches_the_frame_source(bot_factory, controller):
+    source = StreamOfFrames()
+    bot = bot_factory(frame_source=source)
+    bot.battle_logic.is_in_battle = lambda screenshot: True
+
+    assert bot.is_in_battle()
+    assert controller.in_battle and source.in_battle
+
+
+def test_tap_and_wait_returns_once_the_screen_changes(bot_factory, controller):
+    bot = bot_factory()
+    rng = np.random.default_rng(0)
+    before = Frame(rng.integers(0, 255, (64, 64, 3), dtype=np.uint8))
+    after = Frame(rng.integers(0, 255, (64, 64, 3), dtype=np.uint8))
+    screens = iter([before, before, after])
+    bot.take_screenshot = lambda profile=None: next(screens, after)
+
+    started = time.monotonic()
+    assert bot.tap_and_wait(5, 6, max_wait=3, reference=before, label="OK")
+
+    assert time.monotonic() - started < 1
+    assert controller.transport.commands == ["input tap 5 6"]
+    assert bot.logger.stats["transition_waits"] == 1
+    assert bot.logger.stats["wait_time_saved"] > 2
+
+
+def test_tap_and_wait_releases_only_the_reference_it_captured(bot_factory):
+    bot = bot_factory()
+    rng = np.random.default_rng(0)
+    before = Frame(rng.integers(0, 255, (64, 64, 3), dtype=np.uint8))
+    after = Frame(rng.integers(0, 255, (64, 64, 3), dtype=np.uint8))
+    screens = iter([before, after])
+    bot.take_screenshot = lambda profile=None: next(screens)
+
+    assert bot.tap_and_wait(5, 6, max_wait=3, label="OK")
+    assert before.image is None and after.image is None
+
+    reference = Frame(rng.integers(0, 255, (64, 64, 3), dtype=np.uint8))
+    bot.take_screenshot = lambda profile=None: Frame(
+        rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+    )
+    assert bot.tap_and_wait(5, 6, max_wait=3, reference=reference, label="OK")
+    assert reference.image is not None
+
+
+def test_tap_and_wait_waits_for_an_expected_template(bot_factory):
+    bot = bot_factory()
+    checks = []
+    appears_at = [4]
+
+    def find_template(name, screenshot):
+        checks.append(name)
+        return ((1, 1), 0.9) if len(checks) in appears_at else (None, None)
+
+    bot.find_template = find_template
+    assert bot.tap_and_wait(5, 6, until=("battle_button", "ok_button"), max_wait=3)
+    assert checks == ["battle_button", "ok_button"] * 2
+    assert bot.logger.stats["transition_waits"] == 1
+
+    appears_at.clear()
+    started = time.monotonic()
+    bot.tap_and_wait(5, 6, until="battle_button", max_wait=0.3)
+    assert time.monotonic() - started >= 0.3  # The old sleep is the upper bound
+    assert bot.logger.stats["transition_waits"] == 1
+
+
+def test_battlepass_claim_waits_for_the_reward_screen_not_a_fixed_time(
+    tmp_path, bot_factory, controller
+):
+    (tmp_path / "templates").mkdir()
+    (tmp_path / "templates" / "ClaimRewards.png").touch()
+    bot = bot_factory()
+    found = iter([((50, 60), 0.9, 3), (None, None, 40)])
+    bot.burst_tap_until = lambda *args, **kwargs: next(found)
+    before, after = _screens(5, 2)
+    screens = iter([before, after])
+    bot.take_screenshot = lambda profile=None: next(screens, after)
+
+    started = time.monotonic()
+    assert bot.auto_claim_battlepass() == 1
+
+    assert time.monotonic() - started < 1.5
+    assert controller.transport.commands == ["input tap 50 60"]
+    assert bot.logger.stats["transition_waits"] == 1
+
+
+def _screens(seed, count):
+    rng = np.random.default_rng(seed)
+    return [
+        Frame(rng.integers(0, 255, (633, 419, 3), dtype=np.uint8)) for _ in range(count)
+    ]
+
+
+def test_calibration_measures_card_slot_taps(monkeypatch, bot_factory, controller):
+    monkeypatch.setattr(
+        emulator_bot, "get_latency_tracker", lambda device_id: InputLatencyTracker()
+    )
+    bot = bot_factory()
+    screens = _screens(1, 2)
+    # The arena animates constantly; only the card slot follows the taps
+    arena = iter(range(10**6))
+    for screen in screens:
+        screen.image[:500] = 0
+    taps = []
+
+    def take_screenshot(profile=None):
+        frame = Frame(screens[len(taps) % 2].image.copy())
+        frame.image[:500] = next(arena) % 256
+        return frame
+
+    bot.take_screenshot = take_screenshot
+    bot.tap_screen = lambda x, y: taps.append((x, y)) or True
+
+    assert (
+        bot.calibrate_input_latency(taps=3) == 4
+    )  # Rounded up to leave the hand as it was
+    assert taps == [CARD_SLOTS[0]] * 4
+    assert bot.logger.stats["input_latency_samples"] == 4
+    assert bot.calibrate_input_latency() == 0  # Once per bot
+
+
+def test_calibration_lowers_a_card_it_leaves_raised(monkeypatch, bot_factory):
+    monkeypatch.setattr(
+        emulator_bot, "get_latency_tracker", lambda device_id: InputLatencyTracker()
+    )
+    bot = bot_factory()
+    (screen,) = _screens(3, 1)
+    # The card never visibly reacts, so calibration gives up after one tap
+    bot.take_screenshot = lambda profile=None: Frame(screen.image.copy())
+    taps = []
+    bot.tap_screen = lambda x, y: taps.append((x, y)) or True
+
+    assert bot.calibrate_input_latency(taps=2) == 0
+    assert taps == [CARD_SLOTS[0]] * 2
+
+
+def test_menu_transitions_leave_the_input_latency_alone(monkeypatch, bot_factory):
+    tracker = InputLatencyTracker()
+    monkeypatch.setattr(emulator_bot, "get_latency_tracker", lambda device_id: tracker)
+    bot = bot_factory()
+    before, after = _screens(4, 2)
+    screens = iter([before, after])
+    bot.take_screenshot = lambda profile=None: next(screens, after)
+
+    assert bot.tap_and_wait(5, 6, max_wait=3, reference=before, label="OK")
+    assert bot.logger.stats["transition_waits"] == 1
+    assert tracker.samples == 0
+
+
+def test_calibration_skips_taps_while_the_card_slot_moves(monkeypatch, bot_factory):
+    monkeypatch.setattr(
+        emulator_bot, "get_latency_tracker", lambda device_id: InputLatencyTracker()
+    )
+    bot = bot_factory()
+    screens = iter(_screens(2, 100))
+    bot.take_screenshot = lambda profile=None: next(screens)
+    taps = []
+    bot.tap_screen = lambda x, y: taps.append((x, y)) or True
+
+    assert bot.calibrate_input_latency(taps=2) == 0
+    assert taps == []
+
+
+def test_repeated_adb_timeouts_recycle_the_instance(bot_factory, controller):
+    bot = bot_factory()
+    restarts = []
+    bot.restart_app = lambda: restarts.append(True)
+    controller.transport.connect = lambda: True
+
+    record_timeout("another-device", "input")
+    for _ in range(ADB_TIMEOUT_RECYCLE_LIMIT):
+        record_timeout("emulator-5554", "input")
+
+    assert bot.logger.stats["adb_timeouts"] == ADB_TIMEOUT_RECYCLE_LIMIT
+    assert bot.recycle_if_wedged() and restarts == [True]
+    assert not bot.recycle_if_wedged()  # Until it times out again
+
+
+def test_adb_timeouts_from_many_threads_are_all_counted(bot_factory, controller):
+    bot = bot_factory()
+    bot.restart_app = lambda: None
+    controller.transport.connect = lambda: True
+
+    def time_out():
+        for _ in range(50):
+            record_timeout("emulator-5554", "capture")
+
+    threads = [threading.Thread(target=time_out) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert bot.logger.stats["adb_timeouts"] == 400
+    assert bot.logger.stats["adb_timeouts_by_kind"] == {"capture": 400}
+    assert bot.recycle_if_wedged() is True
+
+
+def test_tap_counts_as_input_once_it_has_been_sent(bot_factory, controller):
+    bot = bot_factory()
+    release = threading.Event()
+    controller.input_worker.submit(release.wait, 2)  # adb is slow to take the tap
+    tapped = []
+    tapping = threading.Thread(target=lambda: tapped.append(bot.tap_screen(3, 4)))
+    tapping.start()
+
+    time.sleep(0.1)
+    assert bot._last_input_time == 0.0  # Still queued, not on the device
+    released_at = time.monotonic()
+    release.set()
+    tapping.join(2)
+
+    assert tapped == [True] and bot._last_input_time >= released_at
@@ -0,0 +1,26 @@
+"""adb binary invocations of the emulator detection helpers."""
+
+import subprocess
+
+import emulator_utils
+
+
+def test_adb_commands_are_argument_lists(monkeypatch):
+    calls = []
+
+    def run_adb(args, **kwargs):
+        calls.append((args, kwargs))
+        return subprocess.CompletedProcess(args, 0, "", "")
+
+    monkeypatch.setattr(emulator_utils, "run_adb", run_adb)
+
+    assert emulator_utils.check_adb_available()
+    assert emulator_utils.send_adb_command(
+        "127.0.0.1:21503", "shell 'echo a b && echo c'"
+    ) == (True, "", "")
+
+    assert [args for args, _ in calls] == [
+        ["adb", "version"],
+        ["adb", "-s", "127.0.0.1:21503", "shell", "echo a b && echo c"],
+    ]
+    assert not any(kwargs.get("shell") for _, kwargs in calls)
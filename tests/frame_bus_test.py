@@ -0,0 +1,151 @@
+"""Shared-memory frame ring and capture process handoff."""
+
+import struct
+import time
+
+import numpy as np
+
+from emulators.frame import Frame
+from emulators.frame_bus import FrameBus, SharedFrameRing
+
+
+def _frame(value, shape=(6, 4, 3)):
+    return Frame(np.full(shape, value, dtype=np.uint8), capture_start=float(value))
+
+
+def test_ring_returns_newest_frame_with_metadata():
+    ring = SharedFrameRing.create(slots=2, slot_bytes=6 * 4 * 3)
+    try:
+        assert ring.read(0) is None
+        for value in (1, 2, 3):
+            ring.publish(_frame(value))
+
+        seq, image, start, _ = ring.read(0, copy_into=np.empty)
+        assert seq == 3 and start == 3.0
+        assert image.shape == (6, 4, 3) and (image == 3).all()
+        assert ring.read(3) is None
+        assert not ring.publish(_frame(9, shape=(10, 10, 3)))  # Larger than a slot
+    finally:
+        ring.close()
+
+
+def test_zero_copy_view_is_invalidated_when_the_ring_wraps():
+    ring = SharedFrameRing.create(slots=2, slot_bytes=6 * 4)
+    try:
+        ring.publish(_frame(1, shape=(6, 4)))
+        seq, view, _, _ = ring.read(0)
+        assert view.shape == (6, 4) and ring.is_current(seq)
+
+        ring.publish(_frame(2, shape=(6, 4)))
+        assert ring.is_current(seq)
+        ring.publish(_frame(3, shape=(6, 4)))
+        assert not ring.is_current(seq)
+        del view
+    finally:
+        ring.close()
+
+
+def test_torn_copies_go_back_to_the_caller():
+    ring = SharedFrameRing.create(slots=2, slot_bytes=6 * 4 * 3)
+    try:
+        ring.publish(_frame(1))
+        offset = ring._slot_offset(1)
+        handed_out, discarded = [], []
+
+        def copy_into(shape):
+            # The writer starts and finishes the slot again during every copy
+            lock = struct.unpack_from("<Q", ring.shm.buf, offset)[0]
+            struct.pack_into("<Q", ring.shm.buf, offset, lock + 2)
+            handed_out.append(np.empty(shape, np.uint8))
+            return handed_out[-1]
+
+        assert ring.read(0, copy_into, discarded.append) is None
+        assert len(handed_out) > 1
+        assert [id(a) for a in discarded] == [id(a) for a in handed_out]
+    finally:
+        ring.close()
+
+
+class CountingController:
+    """Publishes frames filled with an increasing value"""
+
+    def __init__(self, device_id, instance_name):
+        self.value = 0
+
+    def capture_frame(self):
+        time.sleep(0.005)
+        self.value = self.value % 255 + 1
+        return _frame(self.value, shape=(120, 80, 3))
+
+    def stop(self):
+        pass
+
+
+def test_capture_process_publishes_untorn_frames():
+    bus = FrameBus(
+        "emulator-5554",
+        "test",
+        slots=2,
+        slot_bytes=120 * 80 * 3,
+        controller_factory=CountingController,
+    )
+    bus.start()
+    reader = bus.reader()
+    try:
+        last_seq = 0
+        for _ in range(20):
+            seq, frame = reader.wait_for_frame(last_seq, timeout=10)
+            assert frame is not None and seq > last_seq
+            assert (frame.image == frame.image[0, 0, 0]).all()
+            assert frame.capture_start <= time.monotonic()
+            frame.release()
+            last_seq = seq
+    finally:
+        reader.close()
+        bus.stop()
+    assert bus.process.exitcode == 0
+
+
+class BattleAwareController:
+    """Publishes 2-filled frames while told the bot is in battle, else 1s"""
+
+    def __init__(self, device_id, instance_name):
+        self.in_battle = False
+
+    def capture_frame(self):
+        time.sleep(0.005)
+        return _frame(2 if self.in_battle else 1)
+
+    def stop(self):
+        pass
+
+
+def _next_value(reader, after_seq):
+    seq, frame = reader.wait_for_frame(after_seq, timeout=10)
+    value = int(frame.image[0, 0, 0])
+    frame.release()
+    return seq, value
+
+
+def test_capture_process_follows_the_bots_battle_state():
+    bus = FrameBus(
+        "emulator-5554",
+        "test",
+        slots=2,
+        slot_bytes=6 * 4 * 3,
+        controller_factory=BattleAwareController,
+    )
+    bus.start()
+    reader = bus.reader()
+    try:
+        seq, value = _next_value(reader, 0)
+        assert value == 1
+        for in_battle, expected in [(True, 2), (False, 1)]:
+            reader.in_battle = in_battle
+            deadline = time.monotonic() + 10
+            while value != expected and time.monotonic() < deadline:
+                seq, value = _next_value(reader, seq)
+            assert value == expected
+    finally:
+        reader.close()
+        bus.stop()
@@ -0,0 +1,37 @@
+"""FrameGrabber latest-frame slot and sequence numbers."""
+
+import itertools
+import time
+
+from emulators.frame_grabber import FrameGrabber
+
+
+def test_wait_for_frame_returns_newer_frames_in_sequence():
+    counter = itertools.count(1)
+
+    def capture():
+        time.sleep(0.01)
+        return next(counter)
+
+    grabber = FrameGrabber(capture, interval=0)
+    grabber.start()
+    try:
+        seq, frame = grabber.wait_for_frame(0, timeout=2)
+        assert seq >= 1 and frame is not None
+
+        newer_seq, newer_frame = grabber.wait_for_frame(seq, timeout=2)
+        assert newer_seq > seq
+        assert newer_frame > frame
+        assert grabber.latest()[0] >= newer_seq
+    finally:
+        grabber.stop()
+
+
+def test_wait_for_frame_times_out_when_capture_fails():
+    grabber = FrameGrabber(lambda: None, retry_delay=0.01)
+    grabber.start()
+    try:
+        assert grabber.wait_for_frame(0, timeout=0.1) == (0, None)
+        assert grabber.failures > 0
+    finally:
+        grabber.stop()
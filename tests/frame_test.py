@@ -0,0 +1,53 @@
+"""Frame metadata and ndarray compatibility."""
+
+import numpy as np
+
+from emulators.base import BaseEmulatorController
+from emulators.frame import Frame, as_image
+
+
+class StaticController(BaseEmulatorController):
+    def __init__(self, image):
+        super().__init__("test-device", "test")
+        self.image = image
+
+    def click(self, x, y, clicks=1, interval=0.1):
+        return True
+
+    def swipe(self, x1, y1, x2, y2, duration=1000):
+        return True
+
+    def screenshot(self):
+        return self.image
+
+    def start_app(self, package_name):
+        return True
+
+    def restart_app(self, package_name):
+        return True
+
+
+def test_capture_frame_numbers_frames_and_records_timing():
+    image = np.zeros((4, 6, 3), dtype=np.uint8)
+    controller = StaticController(image)
+
+    first = controller.capture_frame()
+    second = controller.capture_frame()
+
+    assert (first.seq, second.seq) == (1, 2)
+    assert first.backend == "screenshot"
+    assert first.resolution == (6, 4)
+    assert first.capture_duration >= 0
+    assert second.capture_start >= first.capture_end
+
+
+def test_frame_behaves_like_its_image():
+    image = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+    frame = Frame(image, seq=7)
+
+    assert frame.shape == image.shape
+    assert np.array_equal(frame[1, 2], image[1, 2])
+    assert np.array_equal(np.asarray(frame), image)
+    assert as_image(frame) is image
+    assert as_image(image) is image
+    assert not frame.is_stale(60)
@@ -0,0 +1,35 @@
+"""Raw screencap decoding without the emulator."""
+
+import struct
+
+import numpy as np
+import pytest
+
+from emulators.framebuffer import decode_raw_screencap, PIXEL_FORMAT_RGBA_8888
+
+
+def _raw_dump(rgba, header_size=16):
+    height, width = rgba.shape[:2]
+    header = struct.pack("<III", width, height, PIXEL_FORMAT_RGBA_8888)
+    header += b"\x00" * (header_size - len(header))
+    return header + rgba.tobytes()
+
+
+@pytest.mark.parametrize("header_size", [12, 16])
+def test_decode_raw_screencap_returns_bgr(header_size):
+    rgba = np.zeros((4, 3, 4), dtype=np.uint8)
+    rgba[..., 0] = 10  # R
+    rgba[..., 1] = 20  # G
+    rgba[..., 2] = 30  # B
+    rgba[..., 3] = 255
+
+    image = decode_raw_screencap(_raw_dump(rgba, header_size))
+
+    assert image.shape == (4, 3, 3)
+    assert tuple(image[0, 0]) == (30, 20, 10)
+
+
+def test_decode_raw_screencap_rejects_truncated_dump():
+    rgba = np.zeros((4, 3, 4), dtype=np.uint8)
+    with pytest.raises(ValueError):
+        decode_raw_screencap(_raw_dump(rgba)[:-5])
@@ -0,0 +1,39 @@
+"""Rolling input latency percentiles and the delays scaled by them."""
+
+from config import INPUT_LATENCY_REFERENCE, INPUT_LATENCY_SCALE_LIMITS
+from emulators.input_latency import InputLatencyTracker, get_latency_tracker
+
+
+def test_configured_delays_are_kept_until_calibrated():
+    tracker = InputLatencyTracker(min_samples=3)
+    tracker.record(0.01)
+    tracker.record(0.01)
+
+    assert not tracker.calibrated
+    assert tracker.delay(0.15) == 0.15
+
+
+def test_percentile_follows_the_rolling_window():
+    tracker = InputLatencyTracker(window=5, min_samples=1)
+    for seconds in (0.5, 0.5, 0.5, 0.1, 0.1, 0.1, 0.1, 0.1):
+        tracker.record(seconds)
+
+    assert tracker.samples == 5
+    assert tracker.percentile(90) == 0.1  # The slow samples have rolled out
+    tracker.record(0.2)
+    assert tracker.percentile(50) == 0.1 and tracker.percentile(100) == 0.2
+
+
+def test_delays_scale_with_latency_within_limits():
+    fast = InputLatencyTracker(min_samples=1)
+    fast.record(INPUT_LATENCY_REFERENCE / 2)
+    assert abs(fast.delay(2.0) - 1.0) < 1e-9
+
+    slow = InputLatencyTracker(min_samples=1)
+    slow.record(INPUT_LATENCY_REFERENCE * 100)
+    assert slow.delay(1.0) == INPUT_LATENCY_SCALE_LIMITS[1]
+
+
+def test_trackers_are_shared_per_device():
+    assert get_latency_tracker("emulator-5554") is get_latency_tracker("emulator-5554")
+    assert get_latency_tracker("emulator-5554") is not get_latency_tracker("other")
@@ -0,0 +1,138 @@
+"""InputWorker ordering, futures and shutdown."""
+
+import threading
+import time
+
+import pytest
+
+from emulators.input_worker import (
+    PRIORITY_CRITICAL,
+    PRIORITY_HOUSEKEEPING,
+    PRIORITY_NORMAL,
+    InputWorker,
+)
+
+
+def test_commands_run_in_submission_order():
+    worker = InputWorker(rate_limit=0)
+    ran = []
+
+    def command(index):
+        time.sleep(0.001 * (5 - index))  # Earlier commands are slower
+        ran.append(index)
+        return index
+
+    try:
+        futures = [worker.submit(command, i) for i in range(5)]
+        assert [future.result(timeout=2) for future in futures] == list(range(5))
+        assert ran == list(range(5))
+    finally:
+        worker.stop()
+
+
+def test_errors_are_delivered_through_the_future():
+    worker = InputWorker()
+    try:
+        future = worker.submit(lambda: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            future.result(timeout=2)
+        assert worker.submit(lambda: "still running").result(timeout=2)
+    finally:
+        worker.stop()
+
+
+def test_stop_cancels_queued_commands():
+    worker = InputWorker()
+    release = threading.Event()
+    in_flight = worker.submit(release.wait, 2)
+    queued = worker.submit(lambda: "never")
+    time.sleep(0.05)
+
+    stopper = threading.Thread(target=worker.stop)
+    stopper.start()
+    time.sleep(0.05)  # stop() drains the queue while the first tap is running
+    release.set()
+    stopper.join()
+
+    assert in_flight.result(timeout=2) is True
+    assert queued.cancelled()
+    assert worker.submit(lambda: "late").cancelled()
+
+
+def _blocked_worker(**kwargs):
+    """Worker whose thread is busy until the returned event is set"""
+    worker = InputWorker(**kwargs)
+    release = threading.Event()
+    worker.submit(release.wait, 2)
+    time.sleep(0.05)
+    return worker, release
+
+
+def test_duplicate_pending_taps_are_merged():
+    worker, release = _blocked_worker(rate_limit=0)
+    ran = []
+    try:
+        first = worker.submit(ran.append, 1, priority=PRIORITY_HOUSEKEEPING, key="a")
+        again = worker.submit(ran.append, 2, priority=PRIORITY_HOUSEKEEPING, key="a")
+        other = worker.submit(ran.append, 3, priority=PRIORITY_HOUSEKEEPING, key="b")
+        assert again is first and worker.coalesced == 1
+        release.set()
+        other.result(timeout=2)
+        assert ran == [1, 3]
+
+        # Once a tap has run, the same tap queues again
+        later = worker.submit(ran.append, 4, priority=PRIORITY_HOUSEKEEPING, key="a")
+        assert later is not first
+        later.result(timeout=2)
+    finally:
+        worker.stop()
+
+
+def test_critical_input_overtakes_housekeeping():
+    worker, release = _blocked_worker(rate_limit=0)
+    ran = []
+    try:
+        worker.submit(ran.append, "deadspace", priority=PRIORITY_HOUSEKEEPING)
+        worker.submit(ran.append, "card", priority=PRIORITY_CRITICAL)
+        worker.submit(ran.append, "second card", priority=PRIORITY_CRITICAL)
+        last = worker.submit(ran.append, "tap")
+        release.set()
+        last.result(timeout=2)
+        time.sleep(0.05)
+        assert ran == ["card", "second card", "tap", "deadspace"]
+    finally:
+        worker.stop()
+
+
+def test_taps_the_caller_waits_for_are_not_throttled():
+    worker = InputWorker(rate_limit=2)
+    try:
+        futures = [
+            worker.submit(time.monotonic, priority=PRIORITY_NORMAL, key="same")
+            for _ in range(3)
+        ]
+        times = [future.result(timeout=2) for future in futures]
+        assert times[2] - times[0] < 0.1
+        assert worker.coalesced == 0 and worker.throttled == 0
+    finally:
+        worker.stop()
+
+
+def test_rate_limit_spaces_housekeeping_but_not_card_plays():
+    worker = InputWorker(rate_limit=10)
+    try:
+        started = time.monotonic()
+        futures = [
+            worker.submit(time.monotonic, priority=PRIORITY_HOUSEKEEPING, key=i)
+            for i in range(3)
+        ]
+        times = [future.result(timeout=2) for future in futures]
+        assert times[2] - started >= 0.18
+
+        critical = [
+            worker.submit(time.monotonic, priority=PRIORITY_CRITICAL) for _ in range(3)
+        ]
+        times = [future.result(timeout=2) for future in critical]
+        assert times[2] - times[0] < 0.1
+    finally:
+        worker.stop()
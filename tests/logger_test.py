@@ -0,0 +1,21 @@
+"""Logger statistics reach the console display."""
+
+from console_display import console_display
+from logger import Logger
+
+
+def test_timing_and_adb_stats_update_the_console():
+    logger = Logger("console-test", use_console_display=True)
+    try:
+        logger.record_card_play_latency(0.08)
+        logger.record_wait_saved(1.5)
+        logger.record_input_latency(0.06, 0.09, 5)
+        logger.record_adb_timeout("input")
+
+        row = console_display.emulator_data["console-test"]
+        assert round(row["card_play_ms"]) == 80
+        assert row["wait_saved"] == 1.5
+        assert round(row["input_latency_ms"]) == 60
+        assert row["adb_timeouts"] == 1
+    finally:
+        console_display.emulator_data.pop("console-test", None)
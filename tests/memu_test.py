@@ -0,0 +1,334 @@
+"""Input injection through MemuController with a recording transport."""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import pytest
+
+from emulators import memu, touch_input, transport
+from emulators.adb_client import ShellResult
+from emulators.adb_scheduler import AdbScheduler
+from emulators.device_tracker import DeviceTracker
+from emulators.memu import MemuController
+from emulators.transport import SubprocessTransport
+
+
+def test_capture_only_controller_has_no_input_side(
+    monkeypatch, tmp_path, recording_transport
+):
+    def no_tracker():
+        raise AssertionError("capture-only controllers don't track devices")
+
+    monkeypatch.setattr(memu, "get_device_tracker", no_tracker)
+    monkeypatch.chdir(tmp_path)
+    emulator = MemuController(
+        "emulator-5554",
+        "test",
+        capture_mode="replay",
+        transport=recording_transport,
+        capture_only=True,
+    )
+    assert emulator.shell_session is None and emulator.device_tracker is None
+    emulator.stop()
+
+
+def test_stopped_controller_no_longer_keeps_its_device_connected(
+    monkeypatch, tmp_path, recording_transport
+):
+    tracker = DeviceTracker(kind="subprocess")
+    monkeypatch.setattr(memu, "get_device_tracker", lambda: tracker)
+    monkeypatch.chdir(tmp_path)
+    emulator = MemuController(
+        "127.0.0.1:21503", "test", capture_mode="replay", transport=recording_transport
+    )
+    assert "127.0.0.1:21503" in tracker._watched
+
+    emulator.stop()
+    assert tracker._watched == {} and tracker._listeners == []
+
+
+def test_tap_sequence_is_one_command_with_device_side_delays(controller):
+    assert controller.tap_sequence([(10, 20, 0.15), (30, 40)])
+    assert controller.transport.commands == [
+        "input tap 10 20 && sleep 0.15 && input tap 30 40"
+    ]
+
+
+def test_tap_sequence_runs_in_the_device_shell(monkeypatch, tmp_path, device_tracker):
+    """The whole sequence is one adb argv element, so the host shell never sees it"""
+    monkeypatch.chdir(tmp_path)
+    argv = []
+
+    def run_adb(args, **kwargs):
+        argv.append(args)
+        assert not kwargs.get("shell")
+        return subprocess.CompletedProcess(args, 0, "", "")
+
+    monkeypatch.setattr(transport, "run_adb", run_adb)
+    emulator = MemuController(
+        "emulator-5554",
+        "test",
+        capture_mode="replay",
+        transport=SubprocessTransport("emulator-5554"),
+    )
+    emulator.shell_session = None
+    try:
+        assert emulator.tap_sequence([(10, 20, 0.15), (30, 40)])
+    finally:
+        emulator.stop()
+
+    assert argv == [
+        [
+            "adb",
+            "-s",
+            "emulator-5554",
+            "shell",
+            "input tap 10 20 && sleep 0.15 && input tap 30 40",
+        ]
+    ]
+
+
+class RecordingSession:
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+        self.active_during_run = []
+
+    def run(self, command, timeout=None):
+        self.active_during_run.append(self.scheduler.active)
+        return ShellResult(0, "", "")
+
+    def close(self):
+        pass
+
+
+def test_persistent_shell_input_takes_an_adb_slot(monkeypatch, controller):
+    scheduler = AdbScheduler(max_concurrent=1)
+    monkeypatch.setattr(memu, "get_adb_scheduler", lambda: scheduler)
+    controller.shell_session = RecordingSession(scheduler)
+
+    assert controller.tap_sequence_async([(1, 2), (3, 4)]).result(timeout=2)
+
+    assert controller.shell_session.active_during_run == [1]
+    assert scheduler.stats()["card_play"]["operations"] == 1
+
+
+class BlockingShell:
+    """Shell whose commands run until `finish` is set, like a device-side loop"""
+
+    device_id = "emulator-5554"
+
+    def __init__(self):
+        self.started, self.finish = threading.Event(), threading.Event()
+
+    def run(self, command, timeout=None):
+        self.started.set()
+        self.finish.wait(2)
+        return ShellResult(0, "", "")
+
+    def shell(self, command, timeout=None):
+        return self.run(command, timeout)
+
+    def close(self):
+        pass
+
+
+def _slot_is_free(scheduler):
+    """True if another operation gets an adb slot without queueing"""
+    taken = threading.Event()
+
+    def take():
+        with scheduler.slot():
+            taken.set()
+
+    thread = threading.Thread(target=take)
+    thread.start()
+    free = taken.wait(0.5)
+    thread.join(2)
+    return free
+
+
+def _hold_slot(scheduler, release):
+    with scheduler.slot():
+        release.wait(2)
+
+
+def _wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_a_running_burst_holds_no_adb_slot(monkeypatch, controller):
+    scheduler = AdbScheduler(max_concurrent=1)
+    monkeypatch.setattr(memu, "get_adb_scheduler", lambda: scheduler)
+    shell = BlockingShell()
+
+    # Persistent shell, then the one-shot fallback through a scheduled transport
+    for session, shell_transport in [
+        (shell, controller.transport),
+        (None, transport.ScheduledTransport(shell, scheduler)),
+    ]:
+        shell.started.clear()
+        shell.finish.clear()
+        controller.shell_session = session
+        controller.transport = shell_transport
+        burst = controller.burst_tap_async(1, 2, 200, 0.05)
+        assert shell.started.wait(2)
+
+        assert scheduler.active == 0 and _slot_is_free(scheduler)
+        shell.finish.set()
+        assert burst.result(timeout=2)
+
+
+def test_raw_touch_is_used_once_a_late_touchscreen_is_found(monkeypatch, controller):
+    screen = touch_input.TouchScreen(
+        "/dev/input/event2", (0, 4095), (0, 4095), (720, 1280), True, True, 24
+    )
+    found = []
+    monkeypatch.setattr(
+        memu,
+        "get_touch_injector",
+        lambda device_id, transport: (
+            touch_input.TouchInjector(screen) if found else None
+        ),
+    )
+    controller.touch_mode = "sendevent"
+
+    assert controller.click(1, 2)
+    found.append(True)
+    assert controller.click(1, 2)
+
+    assert controller.touch_mode == "sendevent"
+    first, second = controller.transport.commands
+    assert first == "input tap 1 2"
+    assert second.startswith("printf ") and second.endswith("> /dev/input/event2")
+
+
+def test_tap_sequence_reports_failure(controller):
+    controller.transport.exit_code = 1
+    assert not controller.tap_sequence([(1, 2), (3, 4)])
+
+
+def test_async_input_keeps_device_order(controller):
+    taps = [controller.tap_async(i, i) for i in range(3)]
+    swipe = controller.swipe_async(0, 0, 5, 5, 100)
+
+    assert all(future.result(timeout=2) for future in taps + [swipe])
+    assert controller.transport.commands == [
+        "input tap 0 0",
+        "input tap 1 1",
+        "input tap 2 2",
+        "input swipe 0 0 5 5 100",
+    ]
+
+
+def test_identical_normal_taps_both_run(controller):
+    release = threading.Event()
+    controller.input_worker.submit(release.wait, 2)  # Keeps both taps queued
+    first = controller.tap_async(7, 8)
+    second = controller.tap_async(7, 8)
+    release.set()
+
+    assert first is not second
+    assert first.result(timeout=2) and second.result(timeout=2)
+    assert controller.transport.commands == ["input tap 7 8", "input tap 7 8"]
+
+
+def test_burst_tap_is_one_device_loop(controller):
+    assert controller.burst_tap(10, 20, 30, 0.05)
+
+    (command,) = controller.transport.commands
+    assert "[ $i -lt 30 ]" in command and "input tap 10 20 || exit 1" in command
+    assert "sleep 0.05" in command
+
+
+def test_stop_burst_cancels_a_queued_burst_or_signals_a_running_one(controller):
+    release = threading.Event()
+    controller.input_worker.submit(release.wait, 2)
+    queued = controller.burst_tap_async(1, 2, 5)
+    controller.stop_burst()
+    release.set()
+    assert queued.cancelled()
+
+    started, finish = threading.Event(), threading.Event()
+    controller.transport.shell = lambda command, timeout=None: (
+        started.set() or finish.wait(2) and ShellResult(0, "", "")
+    )
+    running = controller.burst_tap_async(1, 2, 5)
+    assert started.wait(2)
+    touched = []
+    controller.transport.shell = lambda command, timeout=None: (
+        touched.append(command) or ShellResult(0, "", "")
+    )
+    controller.stop_burst()
+    finish.set()
+    assert running.result(timeout=2)
+    assert touched[0].startswith("touch /data/local/tmp/crbot_burst_stop.")
+
+
+def test_stop_burst_gets_through_when_every_adb_slot_is_taken(monkeypatch, controller):
+    scheduler = AdbScheduler(max_concurrent=1)
+    monkeypatch.setattr(memu, "get_adb_scheduler", lambda: scheduler)
+    shell = BlockingShell()
+    controller.shell_session = shell
+    controller.transport = transport.ScheduledTransport(controller.transport, scheduler)
+    burst = controller.burst_tap_async(1, 2, 200, 0.05)
+    assert shell.started.wait(2)
+
+    # Another device's long operation holds the only slot
+    release = threading.Event()
+    holder = threading.Thread(target=_hold_slot, args=(scheduler, release))
+    holder.start()
+    try:
+        assert _wait_until(lambda: scheduler.active == 1)
+        stopper = threading.Thread(target=controller.stop_burst)
+        stopper.start()
+        stopper.join(1)
+        assert not stopper.is_alive()
+        assert controller.transport.inner.commands[-1].startswith(
+            "touch /data/local/tmp/crbot_burst_stop."
+        )
+    finally:
+        release.set()
+        shell.finish.set()
+        holder.join(2)
+    assert burst.result(timeout=2)
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="needs a POSIX shell")
+def test_burst_clears_stop_files_left_by_earlier_bursts(
+    monkeypatch, tmp_path, controller
+):
+    prefix = str(tmp_path / "stop")
+    monkeypatch.setattr(memu, "BURST_TAP_STOP_PATH", prefix)
+    stale = tmp_path / f"stop.{os.getpid()}.1"
+    stale.touch()
+    other_process = tmp_path / "stop.1.1"
+    other_process.touch()
+    controller._burst_id = 1  # The next burst is number 2
+
+    def device_shell(command, timeout=None):
+        # `input` is a no-op here; the rest runs as the device shell would
+        result = subprocess.run(
+            ["sh", "-c", "input() { :; }; " + command], capture_output=True, text=True
+        )
+        return ShellResult(result.returncode, result.stdout, result.stderr)
+
+    controller.transport.shell = device_shell
+    assert controller.burst_tap(1, 2, 2, 0.01)
+    assert not stale.exists()
+    assert other_process.exists()
+
+    # A stop sent before the burst reaches the device still cuts it short
+    stop = tmp_path / f"stop.{os.getpid()}.3"
+    stop.touch()
+    started = time.monotonic()
+    assert controller.burst_tap(1, 2, 1000, 0.01)
+    assert time.monotonic() - started < 5
+    assert not stop.exists()
@@ -0,0 +1,85 @@
+"""ShellSession against a local `sh` standing in for the device shell."""
+
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from emulators import adb_process
+from emulators.shell_session import ShellSession, ShellSessionError
+from emulators.transport import ProcessStream
+
+pytestmark = pytest.mark.skipif(shutil.which("sh") is None, reason="needs sh")
+
+
+class LocalShellTransport:
+    """Opens streams to a local process instead of a device"""
+
+    device_id = "local"
+
+    def __init__(self):
+        self.streams = []
+
+    def open_stream(self, command):
+        process = subprocess.Popen(
+            [command], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        stream = ProcessStream(process)
+        self.streams.append(stream)
+        return stream
+
+
+def test_run_reports_output_and_exit_code():
+    session = ShellSession(LocalShellTransport(), timeout=5)
+    try:
+        ok = session.run("echo tapped")
+        assert ok.exit_code == 0
+        assert ok.stdout == "tapped\n"
+
+        failed = session.run("exit_code_test() { return 3; }; exit_code_test")
+        assert failed.exit_code == 3
+    finally:
+        session.close()
+
+
+def test_session_is_reused_and_restarts_after_dying():
+    transport = LocalShellTransport()
+    session = ShellSession(transport, timeout=5)
+    try:
+        session.run("true")
+        session.run("true")
+        assert len(transport.streams) == 1
+
+        transport.streams[0].process.kill()
+        session._reader.join(timeout=5)  # Let the session notice the exit
+
+        assert session.run("echo again").stdout == "again\n"
+        assert session.restarts == 1
+        assert len(transport.streams) == 2
+    finally:
+        session.close()
+
+
+def test_timeout_marks_command_as_sent():
+    session = ShellSession(LocalShellTransport(), timeout=0.2)
+    try:
+        with pytest.raises(ShellSessionError) as error:
+            session.run("sleep 2")
+        assert error.value.command_sent
+    finally:
+        session.close()
+
+
+def test_commands_get_the_deadline_of_their_kind(monkeypatch):
+    monkeypatch.setitem(adb_process.ADB_TIMEOUTS, "input", 0.2)
+    session = ShellSession(LocalShellTransport())
+    try:
+        session.run("input() { sleep 2; }")  # A slow `input` tool
+        started = time.monotonic()
+        with pytest.raises(ShellSessionError):
+            session.run("input tap 1 2")
+        assert time.monotonic() - started < 1
+        assert adb_process.timeout_counts("local")["input"] >= 1
+    finally:
+        session.close()
@@ -0,0 +1,62 @@
+"""Preloaded template store: case-insensitive files, missing entries, variants."""
+
+import cv2
+import numpy as np
+import pytest
+
+import template_store
+from template_store import TemplateStore, resolve_template_path
+
+
+def _write(path, size=(20, 30)):
+    image = np.random.default_rng(0).integers(0, 255, (*size, 3), dtype=np.uint8)
+    cv2.imwrite(str(path), image)
+    return image
+
+
+def test_file_name_case_is_ignored(tmp_path):
+    _write(tmp_path / "rampup.png")
+
+    assert resolve_template_path(str(tmp_path / "RampUp.png")) == str(
+        tmp_path / "rampup.png"
+    )
+    assert resolve_template_path(str(tmp_path / "Other.png")) is None
+
+
+def test_templates_are_loaded_once_and_read_only(monkeypatch, tmp_path):
+    expected = _write(tmp_path / "ok.png")
+    reads = []
+    imread = cv2.imread
+    monkeypatch.setattr(
+        template_store.cv2, "imread", lambda path: reads.append(path) or imread(path)
+    )
+    store = TemplateStore({"ok": str(tmp_path / "OK.png")})
+
+    for _ in range(3):
+        template = store.get("ok")
+    assert np.array_equal(template, expected)
+    assert not template.flags.writeable
+    assert len(reads) == 1
+
+
+def test_missing_templates_are_reported_once(capsys, tmp_path):
+    store = TemplateStore({"gone": str(tmp_path / "gone.png")})
+    assert "gone.png" in capsys.readouterr().out
+
+    assert store.get("gone") is None and store.get("gone", scale=0.5) is None
+    assert "gone" not in store and dict(store.missing) == {
+        "gone": str(tmp_path / "gone.png")
+    }
+    assert capsys.readouterr().out == ""
+    with pytest.raises(KeyError):
+        store.get("never_configured")
+
+
+def test_adapted_variants_are_built_once(tmp_path):
+    _write(tmp_path / "t.png", size=(20, 30))
+    store = TemplateStore({"t": str(tmp_path / "t.png")})
+
+    half_gray = store.get("t", scale=0.5, grayscale=True)
+    assert half_gray.shape == (10, 15)
+    assert store.get("t", scale=0.5, grayscale=True) is half_gray
+    assert store.get("t", scale=0.5).shape == (10, 15, 3)
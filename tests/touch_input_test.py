@@ -0,0 +1,112 @@
+"""Touchscreen discovery and precompiled raw touch events."""
+
+import re
+import struct
+
+from emulators import touch_input
+from emulators.adb_client import ShellResult
+from emulators.touch_input import (
+    ABS_MT_POSITION_X,
+    ABS_MT_POSITION_Y,
+    ABS_MT_TRACKING_ID,
+    BTN_TOUCH,
+    EV_ABS,
+    EV_KEY,
+    EV_SYN,
+    TouchInjector,
+    discover_touchscreen,
+    get_touch_injector,
+)
+
+GETEVENT = """\
+add device 1: /dev/input/event1
+  name:     "Power Button"
+  events:
+    KEY (0001): KEY_POWER
+add device 2: /dev/input/event2
+  name:     "Memu Touchscreen"
+  events:
+    KEY (0001): BTN_TOUCH
+    ABS (0003): ABS_MT_SLOT           : value 0, min 0, max 9, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_X     : value 0, min 0, max 4095, fuzz 0, flat 0, resolution 0
+                ABS_MT_POSITION_Y     : value 0, min 0, max 4095, fuzz 0, flat 0, resolution 0
+                ABS_MT_TRACKING_ID    : value 0, min 0, max 65535, fuzz 0, flat 0, resolution 0
+  input props:
+    INPUT_PROP_DIRECT
+"""
+
+OUTPUTS = {
+    "getevent -pl": GETEVENT,
+    "wm size": "Physical size: 720x1280\n",
+    "getprop ro.product.cpu.abi": "x86_64\n",
+}
+
+
+class CannedTransport:
+    def __init__(self):
+        self.commands = []
+
+    def shell(self, command, timeout=None):
+        self.commands.append(command)
+        return ShellResult(0, OUTPUTS.get(command, ""), "")
+
+
+def _decode(command):
+    """Events written by a `printf '...' > node` command"""
+    escaped = re.search(r"printf '([^']*)'", command).group(1)
+    data = bytes(int(code, 8) for code in escaped.split("\\")[1:])
+    return [event[2:] for event in struct.iter_unpack("<qqHHi", data)]
+
+
+def test_discovery_finds_the_multitouch_device():
+    screen = discover_touchscreen(CannedTransport())
+
+    assert screen.path == "/dev/input/event2"
+    assert screen.x_range == (0, 4095) and screen.display_size == (720, 1280)
+    assert screen.multitouch_b and screen.btn_touch and screen.event_size == 24
+
+
+def test_tap_is_precompiled_raw_events_scaled_to_the_touchscreen():
+    injector = TouchInjector(discover_touchscreen(CannedTransport()))
+
+    command = injector.tap_command(719, 0)
+    events = _decode(command)
+
+    assert command.endswith("> /dev/input/event2")
+    assert (EV_ABS, ABS_MT_TRACKING_ID, 1) in events
+    assert (EV_KEY, BTN_TOUCH, 1) in events and (EV_KEY, BTN_TOUCH, 0) in events
+    assert (EV_ABS, ABS_MT_POSITION_X, 4095) in events
+    assert (EV_ABS, ABS_MT_POSITION_Y, 0) in events
+    assert events[-1] == (EV_SYN, 0, 0)
+    assert injector.tap_command(719, 0) is command  # Cached
+
+
+def test_swipe_moves_in_steps_to_the_target():
+    injector = TouchInjector(discover_touchscreen(CannedTransport()))
+
+    parts = injector.swipe_command(0, 0, 719, 1279, 64).split(" && ")
+
+    assert parts.count("sleep 0.016") == 4
+    assert (EV_ABS, ABS_MT_POSITION_X, 4095) in _decode(parts[-2])
+    assert (EV_ABS, ABS_MT_TRACKING_ID, -1) in _decode(parts[-1])
+
+
+def test_a_failed_discovery_is_retried_after_the_backoff(monkeypatch):
+    monkeypatch.setattr(touch_input, "_screens", {})
+    monkeypatch.setattr(touch_input, "_failed_at", {})
+    device = CannedTransport()
+    device.booted = False
+    shell = device.shell
+    device.shell = lambda command, timeout=None: (
+        shell(command) if device.booted else ShellResult(1, "", "not ready")
+    )
+
+    assert get_touch_injector("emulator-5554", device, retry_after=60) is None
+    device.booted = True
+    assert get_touch_injector("emulator-5554", device, retry_after=60) is None
+    assert device.commands == []  # Still backing off
+
+    assert get_touch_injector("emulator-5554", device, retry_after=0) is not None
+    looked_up = len(device.commands)
+    assert get_touch_injector("emulator-5554", device, retry_after=0) is not None
+    assert len(device.commands) == looked_up  # Found once, then cached
@@ -0,0 +1,74 @@
+"""Adaptive raw/gzip transfer selection and buffer-reusing inflate."""
+
+import gzip
+import zlib
+
+import pytest
+
+from emulators.transfer import GzipInflater, TransferSelector
+
+
+class FixedCpu:
+    def __init__(self, cores):
+        self.cores = cores
+
+    def headroom(self):
+        return self.cores
+
+
+def _probe(selector, timings):
+    """Feed probe samples until the selector settles on a mode"""
+    for _ in range(20):
+        mode = selector.choose()
+        if mode == selector.current and not selector._probe_queue:
+            return mode
+        selector.record(mode, *timings[mode])
+    raise AssertionError("selector never settled")
+
+
+@pytest.mark.parametrize(
+    "cores, expected",
+    [
+        (8.0, "gzip"),  # Idle host: the smaller transfer wins
+        (0.25, "raw"),  # Busy host: decompression CPU is the bottleneck
+    ],
+)
+def test_selector_maximises_fleet_frame_rate(cores, expected):
+    # raw: slow on a saturated link but cheap; gzip: fast but CPU-hungry
+    timings = {"raw": (0.20, 0.005), "gzip": (0.08, 0.04)}
+    selector = TransferSelector(cpu_monitor=FixedCpu(cores), reevaluate_interval=60)
+    try:
+        assert _probe(selector, timings) == expected
+    finally:
+        selector.close()
+
+
+def test_failing_mode_is_dropped():
+    selector = TransferSelector(cpu_monitor=FixedCpu(8.0))
+    try:
+        for _ in range(10):
+            mode = selector.choose()
+            if mode == "gzip":
+                selector.failed(mode)
+            else:
+                selector.record(mode, 0.1, 0.01)
+        assert "gzip" in selector.disabled
+        assert selector.choose() == "raw"
+    finally:
+        selector.close()
+
+
+def test_inflater_reuses_its_output_buffer():
+    inflater = GzipInflater()
+    frame = bytes(range(256)) * 4000
+
+    first = inflater.inflate(gzip.compress(frame, compresslevel=1))
+    assert first == frame
+    buffer = first.obj
+    del first
+
+    second = inflater.inflate(gzip.compress(frame[::-1], compresslevel=1))
+    assert second == frame[::-1] and second.obj is buffer
+
+    with pytest.raises(zlib.error):
+        inflater.inflate(gzip.compress(frame)[:-100])
@@ -0,0 +1,87 @@
+"""Host-side argv of the adb binary transport."""
+
+import subprocess
+
+from emulators import transport
+from emulators.adb_process import deadline_for, timeout_counts
+from emulators.transport import SocketTransport, SubprocessTransport
+
+
+def _recording_run_adb(calls, stdout=""):
+    def run_adb(args, **kwargs):
+        calls.append((args, kwargs))
+        return subprocess.CompletedProcess(args, 0, stdout, "")
+
+    return run_adb
+
+
+def test_compound_shell_command_reaches_the_device_shell_unparsed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(transport, "run_adb", _recording_run_adb(calls))
+    command = "input tap 1 2 && sleep 0.15 && printf '\\x01' > /dev/input/event2"
+
+    assert SubprocessTransport("emulator-5554").shell(command).exit_code == 0
+
+    ((args, kwargs),) = calls
+    assert args == ["adb", "-s", "emulator-5554", "shell", command]
+    assert not kwargs.get("shell")
+
+
+def test_pull_and_connect_use_argument_lists(monkeypatch):
+    calls = []
+    monkeypatch.setattr(transport, "run_adb", _recording_run_adb(calls))
+    device = SubprocessTransport("127.0.0.1:21503")
+
+    assert device.pull("/sdcard/a b.png", "out dir/a.png")
+    assert device.connect()
+
+    assert [args for args, _ in calls] == [
+        ["adb", "-s", "127.0.0.1:21503", "pull", "/sdcard/a b.png", "out dir/a.png"],
+        ["adb", "connect", "127.0.0.1:21503"],
+    ]
+    assert not any(kwargs.get("shell") for _, kwargs in calls)
+
+
+def test_missing_adb_binary_is_a_failed_operation(monkeypatch):
+    def run_adb(args, **kwargs):
+        raise FileNotFoundError(2, "No such file or directory", "adb")
+
+    monkeypatch.setattr(transport, "run_adb", run_adb)
+    device = SubprocessTransport("127.0.0.1:21503")
+
+    assert device.shell("echo hi").exit_code == -1
+    assert device.exec_out("screencap") is None
+    assert not device.forward("tcp:6100", "tcp:27183")
+    assert not device.remove_forward("tcp:6100")
+    assert not device.pull("/sdcard/a.png", "a.png")
+    assert not device.connect()
+
+
+def test_adb_server_is_started_without_a_host_shell(monkeypatch):
+    class DownServer:
+        def wait_for_server(self, timeout):
+            return False
+
+    calls = []
+    monkeypatch.setattr(transport, "run_adb", _recording_run_adb(calls))
+    transport.ensure_adb_server(DownServer())
+
+    ((args, kwargs),) = calls
+    assert args == ["adb", "start-server"] and not kwargs.get("shell")
+
+
+def test_socket_connect_has_a_deadline_and_counts_timeouts():
+    class HangingClient:
+        def __init__(self):
+            self.timeouts = []
+
+        def connect(self, address, timeout=None):
+            self.timeouts.append(timeout)
+            raise TimeoutError("timed out")
+
+    client = HangingClient()
+    device = SocketTransport("127.0.0.1:21513", client=client)
+
+    assert not device.connect()
+    assert client.timeouts == [deadline_for("connect")]
+    assert timeout_counts("127.0.0.1:21513") == {"connect": 1}
@@ -5,7 +5,7 @@ Automatically searches for and plays clan war battles
 
 import time
 from war_utils import find_available_war_battles, click_battle_if_found
-from config import DEFAULT_TIMEOUTS
+from config import DEFAULT_TIMEOUTS, NAVIGATION_CAPTURE_PROFILE
 
 
 class WarRunner:
@@ -37,6 +37,9 @@ class WarRunner:
                     )
                     break
 
+                # adb kept timing out on this device - reconnect and restart the game
+                self.bot.recycle_if_wedged()
+
                 self.logger.change_status(
                     f"--- War Round {war_round} (Battle {self.battle_count + 1}) ---"
                 )
@@ -112,7 +115,7 @@ class WarRunner:
             if not self.bot.running or self.shutdown_check():
                 return False
 
-            screenshot = self.bot.take_screenshot()
+            screenshot = self.bot.take_screenshot(NAVIGATION_CAPTURE_PROFILE)
             if screenshot is None:
                 time.sleep(1)
                 continue
@@ -152,7 +155,7 @@ class WarRunner:
                 f"Looking for War Battle button... ({elapsed:.0f}s / {battle_timeout}s)"
             )
 
-            screenshot = self.bot.take_screenshot()
+            screenshot = self.bot.take_screenshot(NAVIGATION_CAPTURE_PROFILE)
             if screenshot is None:
                 time.sleep(1)
                 continue
@@ -167,7 +170,7 @@ class WarRunner:
                 )
                 self.bot.tap_screen(battle_pos[0], battle_pos[1])
                 battle_button_found = True
-                time.sleep(2)  # Wait for battle to start
+                time.sleep(self.bot.adaptive_delay(2))  # Wait for battle to start
                 break
 
             # Second priority: Check if we're back at war selection screen
@@ -202,7 +205,14 @@ class WarRunner:
 
         self.logger.change_status("Playing war battle...")
 
+        # Measure this device's input latency once, while cards are on screen
+        self.bot.calibrate_input_latency()
+
         while self.bot.running and not self.shutdown_check():
+            if self.bot.recycle_requested:
+                self.logger.log("Leaving battle to recycle the instance")
+                break
+
             battle_elapsed = time.time() - battle_start_time
 
             # Check if still in battle
@@ -241,16 +251,16 @@ class WarRunner:
                 self.logger.log("War battle timed out after 5 minutes")
                 return False
 
-            # Get current battle phase and strategy
-            screenshot = self.bot.take_screenshot()
+            # Get current battle phase and strategy (card/elixir rows only)
+            screenshot = self.bot.take_screenshot(profile="cards")
             if screenshot is None:
                 continue
 
             current_elixir = self.bot.battle_logic.detect_elixir_amount(screenshot)
-            is_2x_elixir = self.bot.battle_logic.detect_2x_elixir(screenshot)
 
             # Log battle status every 10 seconds
             if int(battle_elapsed) % 10 == 0:
+                is_2x_elixir = self.bot.is_double_elixir()
                 battle_phase = self.bot.battle_strategy.get_battle_phase()
                 self.logger.change_status(
                     f"War Battle - Phase: {battle_phase}, Elapsed: {battle_elapsed:.1f}s, "
@@ -261,6 +271,8 @@ class WarRunner:
             should_play = False
             if current_elixir is not None and current_elixir >= 6:
                 should_play = True
+            self.logger.record_frame_latency(screenshot)
+            screenshot.release()  # Buffer goes back to the capture pool
 
             if should_play:
                 if self.bot.play_card_strategically():
@@ -297,7 +309,7 @@ class WarRunner:
             if not self.bot.running or self.shutdown_check():
                 return False
 
-            screenshot = self.bot.take_screenshot()
+            screenshot = self.bot.take_screenshot(NAVIGATION_CAPTURE_PROFILE)
             if screenshot is None:
                 time.sleep(1)
                 continue
@@ -308,8 +320,10 @@ class WarRunner:
                 self.logger.log(
                     f"Found OK button (confidence: {ok_confidence:.2f}), clicking to return to war screen..."
                 )
-                self.bot.tap_screen(ok_pos[0], ok_pos[1])
-                time.sleep(3)  # Wait for transition back to war screen
+                # Wait (up to 3s) for the transition back to the war screen
+                self.bot.tap_and_wait(
+                    ok_pos[0], ok_pos[1], max_wait=3, reference=screenshot, label="OK"
+                )
                 return True
 
             # Also check for Play Again button (alternative post-battle button)
@@ -321,13 +335,13 @@ class WarRunner:
                     f"Found Play Again button (confidence: {pa_confidence:.2f}), clicking OK instead..."
                 )
                 # Try to find OK button instead or click deadspace
-                self.bot.tap_screen(20, 200)  # Click deadspace to close
-                time.sleep(2)
+                self.bot.tap_screen_async(20, 200)  # Click deadspace to close
+                time.sleep(self.bot.adaptive_delay(2))
                 continue
 
             # Click deadspace to close any popups
-            self.bot.tap_screen(20, 200)
-            time.sleep(1)
+            self.bot.tap_screen_async(20, 200)
+            time.sleep(self.bot.adaptive_delay(1))
 
         self.logger.log("Timeout waiting for OK button after war battle")
         return False
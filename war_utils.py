@@ -66,7 +66,8 @@ def click_battle_if_found(bot, available_battles, logger=None, delay=2.0):
         bot: EmulatorBot instance
         available_battles: List of tuples (battle_name, position, confidence)
         logger: Optional logger instance for logging
-        delay: Delay after clicking in seconds
+        delay: Maximum wait after clicking in seconds (ends early once the
+               War Battle button shows up)
     
     Returns:
         bool: True if a battle was found and clicked, False otherwise
@@ -75,9 +76,13 @@ def click_battle_if_found(bot, available_battles, logger=None, delay=2.0):
     
     if selected:
         battle_name, battle_pos, battle_confidence = selected
-        bot.tap_screen(battle_pos[0], battle_pos[1])
-        import time
-        time.sleep(delay)
+        bot.tap_and_wait(
+            battle_pos[0],
+            battle_pos[1],
+            until="war_battle_button",
+            max_wait=delay,
+            label=battle_name,
+        )
         return True
     
     return False